@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup Auto-Tuner untuk Face Recognition System
+DET_SIZE, thread ORT, module, dan frame skip di main.py biasanya diatur manual
+sambil melihat overlay. auto_tune.py mengkalibrasi kombinasi tersebut di host ini
+dan menyimpan profile terbaik untuk target FPS / latency:
+
+1. Frame: rekaman (--source, video / folder / glob) atau sintetis (SyntheticCamera)
+2. Untuk setiap module preset x ORT intra-op threads: build_face_app sekali, lalu
+   untuk setiap det_size (input detection dinamis, tanpa load ulang model):
+   - detect ms per frame (detect_faces, termasuk module landmark/attribute)
+   - embedding ms per wajah (crop probe, batch = jumlah wajah per frame)
+   - detection recall vs det_size terbesar (hanya wajah yang akan di-embed:
+     det_score >= min_det dan sisi >= min_face_size)
+3. Latency per frame = detect ms + wajah per frame x embedding ms
+4. Profile: det_size terbesar yang lolos recall dan latency <= target (akurasi
+   deteksi wajah kecil lebih penting dari sisa waktu); tie-break latency terkecil.
+   Jika tidak ada yang memenuhi target -> kombinasi tercepat yang lolos recall.
+5. Frame skip: target_latency_ms AdaptiveScheduler (lihat frame_scheduler.py) =
+   target, minimal latency / max_duty supaya detection tidak terus-menerus overrun
+
+Profile disimpan per model & host (tune_profile.json); main.py memakainya saat start
+(AUTO_TUNE_PROFILE). THRESHOLD tidak di-tune: itu kalibrasi akurasi, bukan kecepatan.
+
+Usage:
+    python auto_tune.py --source recordings/gate_pagi.mp4 --target-fps 10
+    python auto_tune.py --synthetic --target-latency 200 --threads 1,2,4 --det-sizes 160,256,320
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+PROFILE_FILE = "tune_profile.json"
+PROFILE_KEYS = ("det_size", "intra_op_threads", "modules", "target_latency_ms")
+
+DET_SIZES = (160, 224, 256, 320, 416, 480, 640)  # Kelipatan 32 (stride terbesar SCRFD)
+
+
+def default_threads() -> List[int]:
+    """1, 2, 4, ... sampai jumlah CPU (plus jumlah CPU itu sendiri)"""
+    cpus = os.cpu_count() or 1
+    threads, t = [], 1
+    while t < cpus:
+        threads.append(t)
+        t *= 2
+    return threads + [cpus]
+
+
+def synthetic_frames(width: int, height: int, count: int) -> List[np.ndarray]:
+    from synthetic_source import SyntheticCamera
+    cam = SyntheticCamera(width=width, height=height, max_frames=count, pool_size=min(count, 16))
+    frames = []
+    while True:
+        ok, frame = cam.read()
+        if not ok:
+            break
+        frames.append(frame)
+    return frames
+
+
+def set_det_size(app, det_size: int) -> bool:
+    """Ganti input_size detection tanpa load ulang; False jika model tidak mendukung input dinamis"""
+    from roi_detector import supports_dynamic_input
+    if tuple(app.det_model.input_size or ()) == (det_size, det_size):
+        return True
+    if not supports_dynamic_input(app.det_model):
+        return False
+    app.det_model.input_size = (det_size, det_size)
+    app.det_size = (det_size, det_size)
+    return True
+
+
+def probe_faces(count: int):
+    """(img, face) dengan landmark template ArcFace untuk mengukur embedding saja"""
+    from insightface.app.common import Face
+    from insightface.utils import face_align
+
+    img = np.full((112, 112, 3), 127, dtype=np.uint8)
+    return [(img, Face(bbox=np.array([0, 0, 112, 112], dtype=np.float32),
+                       kps=face_align.arcface_dst.copy(), det_score=1.0)) for _ in range(count)]
+
+
+def measure_embed_ms(app, faces_per_frame: int, runs: int = 10) -> float:
+    """Median waktu embedding per wajah (batch = faces_per_frame, path embed_faces)"""
+    from facegate_insightface import embed_faces
+    batch = max(1, faces_per_frame)
+    times = []
+    for _ in range(runs + 2):
+        items = probe_faces(batch)
+        start = time.perf_counter()
+        embed_faces(app, items)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times[2:])) * 1000.0 / batch
+
+
+def countable_boxes(faces, min_det_score: float, min_face_size: int) -> np.ndarray:
+    """Bbox wajah yang akan di-embed (sama dengan filter score & size FaceQualityGate)"""
+    boxes = [f.bbox[:4] for f in faces if float(f.det_score) >= min_det_score
+             and min(f.bbox[2] - f.bbox[0], f.bbox[3] - f.bbox[1]) >= min_face_size]
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def recall(detections: List[np.ndarray], reference: List[np.ndarray], iou_threshold: float = 0.5) -> Optional[float]:
+    from face_tracker import iou_matrix
+    total = found = 0
+    for boxes, ref in zip(detections, reference):
+        total += len(ref)
+        if len(ref) and len(boxes):
+            found += int((iou_matrix(ref, boxes).max(axis=1) >= iou_threshold).sum())
+    return found / total if total else None
+
+
+def measure_det_sizes(app, frames: List[np.ndarray], det_sizes: Sequence[int],
+                      min_det_score: float, min_face_size: int, warmup: int = 2) -> Dict[int, Dict]:
+    """detect ms + bbox per frame untuk setiap det_size (app yang sama)"""
+    from facegate_insightface import detect_faces
+    results = {}
+    for det_size in det_sizes:
+        if not set_det_size(app, det_size):
+            continue
+        for frame in frames[:warmup]:
+            detect_faces(app, frame)
+        times, boxes = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            faces = detect_faces(app, frame)
+            times.append(time.perf_counter() - start)
+            boxes.append(countable_boxes(faces, min_det_score, min_face_size))
+        results[det_size] = {'times': times, 'boxes': boxes}
+    return results
+
+
+def calibrate(frames: List[np.ndarray],
+              model_name: str = "buffalo_l",
+              device: str = "cpu",
+              precision: str = "fp32",
+              backend: str = "ort",
+              modules: Sequence[str] = ("recognize",),
+              threads: Sequence[int] = (1, 2, 4),
+              det_sizes: Sequence[int] = DET_SIZES,
+              faces_per_frame: Optional[float] = None,
+              min_det_score: float = 0.6,
+              min_face_size: int = 40,
+              warmup: int = 2) -> Dict:
+    """
+    Ukur semua kombinasi module x threads x det_size
+
+    Returns:
+        {'candidates': [...], 'faces_per_frame': float, 'reference_det_size': int}
+    """
+    from facegate_insightface import build_face_app
+    from roi_detector import supports_dynamic_input
+
+    det_sizes = sorted(set(det_sizes))
+    reference = None
+    ref_det_size = det_sizes[-1]
+    candidates = []
+
+    for preset in modules:
+        for num_threads in threads:
+            print(f"[*] Kalibrasi: modules={preset} threads={num_threads}")
+            app = build_face_app(model_name=model_name, det_size=ref_det_size, device=device,
+                                 modules=preset, intra_op_threads=num_threads,
+                                 precision=precision, backend=backend)
+            sizes = det_sizes
+            if not supports_dynamic_input(app.det_model):
+                sizes = [max(app.det_model.input_size)]
+                print(f"[!] Input detection model tetap ({sizes[0]}); det_size lain tidak bisa dipakai")
+            measured = measure_det_sizes(app, frames, sizes, min_det_score, min_face_size, warmup)
+
+            if reference is None:
+                ref_det_size = max(measured)
+                reference = measured[ref_det_size]['boxes']
+                if faces_per_frame is None:
+                    faces_per_frame = float(np.mean([len(b) for b in reference])) if frames else 0.0
+                    if faces_per_frame == 0.0:
+                        print("[!] Tidak ada wajah di frame (sintetis?): recall tidak dicek, "
+                              "embedding dihitung 1 wajah per frame")
+                        faces_per_frame = 1.0
+
+            embed_ms = measure_embed_ms(app, int(np.ceil(faces_per_frame)))
+            for det_size, m in measured.items():
+                detect_ms = float(np.mean(m['times'])) * 1000.0
+                r = recall(m['boxes'], reference)
+                candidates.append({
+                    'modules': preset,
+                    'intra_op_threads': num_threads,
+                    'det_size': det_size,
+                    'detect_ms': round(detect_ms, 2),
+                    'detect_p90_ms': round(float(np.percentile(m['times'], 90)) * 1000.0, 2),
+                    'embed_ms_per_face': round(embed_ms, 2),
+                    'latency_ms': round(detect_ms + faces_per_frame * embed_ms, 2),
+                    'recall': round(r, 4) if r is not None else None,
+                })
+            del app
+            gc.collect()
+
+    return {'candidates': candidates, 'faces_per_frame': round(faces_per_frame or 0.0, 2),
+            'reference_det_size': ref_det_size}
+
+
+def choose_profile(candidates: List[Dict], target_latency_ms: float,
+                   min_recall: float = 0.95, max_duty: float = 0.85) -> Dict:
+    """
+    det_size terbesar yang lolos recall & target latency (tie-break latency);
+    fallback: kombinasi tercepat yang lolos recall
+    """
+    passing = [c for c in candidates if c['recall'] is None or c['recall'] >= min_recall] or candidates
+    within = [c for c in passing if c['latency_ms'] <= target_latency_ms]
+    if within:
+        best = min(within, key=lambda c: (-c['det_size'], c['latency_ms']))
+    else:
+        best = min(passing, key=lambda c: c['latency_ms'])
+
+    # Frame skip: jangan minta latency yang tidak mungkin dicapai -> scheduler tidak overrun
+    target = max(target_latency_ms, best['latency_ms'] / max_duty)
+    return {
+        'det_size': best['det_size'],
+        'intra_op_threads': best['intra_op_threads'],
+        'modules': best['modules'],
+        'target_latency_ms': round(target, 1),
+        'meets_target': bool(within),
+        'measured': best,
+    }
+
+
+def profile_key(model_name: str, precision: str = "fp32") -> str:
+    """Key profile = folder model yang di-load build_face_app"""
+    return model_name if precision == "fp32" else f"{model_name}_{precision}"
+
+
+def save_profile(path: str, model_name: str, profile: Dict, meta: Optional[Dict] = None):
+    """Simpan profile untuk model_name di host ini (entry model lain dipertahankan)"""
+    from inference_backend import host_fingerprint
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        profiles = {}
+    profiles[model_name] = {'profile': profile, 'host': host_fingerprint(), 'meta': meta or {},
+                            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_profile(path: str, model_name: str) -> Optional[Dict]:
+    """
+    Profile tersimpan untuk model_name (profile_key); None jika belum di-tune atau dibuat di host lain
+
+    Returns:
+        {'det_size', 'intra_op_threads', 'modules', 'target_latency_ms'}
+    """
+    from inference_backend import host_fingerprint
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f).get(model_name)
+    except (OSError, ValueError):
+        return None
+    if not entry:
+        return None
+    if entry.get('host') != host_fingerprint():
+        print(f"[!] Profile auto-tune {path} dibuat di host lain, diabaikan "
+              f"(jalankan ulang: python auto_tune.py --model {model_name})")
+        return None
+    return {k: entry['profile'][k] for k in PROFILE_KEYS if k in entry['profile']}
+
+
+def print_report(result: Dict, profile: Dict, target_latency_ms: float):
+    print("\n" + "=" * 84)
+    print("  AUTO-TUNE")
+    print("=" * 84)
+    print(f"{'modules':>10} {'threads':>8} {'det':>5} {'detect ms':>10} {'p90':>8} {'embed ms':>9} "
+          f"{'latency':>9} {'recall':>7}")
+    for c in sorted(result['candidates'], key=lambda c: c['latency_ms']):
+        rec = f"{c['recall']:.3f}" if c['recall'] is not None else "-"
+        print(f"{c['modules']:>10} {c['intra_op_threads']:>8} {c['det_size']:>5} {c['detect_ms']:>10.2f} "
+              f"{c['detect_p90_ms']:>8.2f} {c['embed_ms_per_face']:>9.2f} {c['latency_ms']:>9.2f} {rec:>7}")
+    print("-" * 84)
+    print(f"Wajah per frame: {result['faces_per_frame']} | target: {target_latency_ms:.0f} ms | "
+          f"recall vs det_size {result['reference_det_size']}")
+    status = "[OK]" if profile['meets_target'] else "[!] target tidak tercapai, pakai yang tercepat:"
+    print(f"{status} det_size={profile['det_size']} threads={profile['intra_op_threads']} "
+          f"modules={profile['modules']} target_latency_ms={profile['target_latency_ms']}")
+    print("=" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kalibrasi det_size, frame skip, thread ORT, dan module untuk host ini.")
+    parser.add_argument("--source", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Video file, folder gambar, atau glob pattern (rekaman gate)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Pakai frame sintetis (tanpa wajah: recall tidak dicek)")
+    parser.add_argument("--w", type=int, default=640, help="Lebar frame sintetis")
+    parser.add_argument("--h", type=int, default=480, help="Tinggi frame sintetis")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--device", type=str, default="cpu", choices=["cpu", "cuda"])
+    parser.add_argument("--precision", type=str, default="fp32", choices=["fp32", "int8"])
+    parser.add_argument("--backend", type=str, default="ort", choices=["ort", "opencv", "auto"])
+    parser.add_argument("--modules", type=str, default="recognize",
+                        help="Preset module dipisah ';' yang boleh dipilih (e.g., recognize;enroll)")
+    parser.add_argument("--threads", type=str, default="",
+                        help="ORT intra-op threads dipisah koma (default: 1,2,4,... sampai jumlah CPU)")
+    parser.add_argument("--det-sizes", type=str, default=",".join(str(d) for d in DET_SIZES))
+    parser.add_argument("--target-fps", type=float, default=0.0,
+                        help="Target detection per detik (override --target-latency)")
+    parser.add_argument("--target-latency", type=float, default=150.0,
+                        help="Target latency wajah muncul -> hasil tampil (ms)")
+    parser.add_argument("--faces", type=float, default=0.0,
+                        help="Wajah per frame untuk biaya embedding (0 = rata-rata dari frame)")
+    parser.add_argument("--min-recall", type=float, default=0.95,
+                        help="Detection recall minimum vs det_size terbesar")
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--min-face-size", type=int, default=40,
+                        help="Wajah lebih kecil tidak dihitung di recall (di-skip quality gate)")
+    parser.add_argument("--max-frames", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--profile", type=str, default=PROFILE_FILE, help="Path profile (dibaca main.py)")
+    parser.add_argument("--report", type=str, default="bench/auto_tune.json", help="Path output JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        frames = synthetic_frames(args.w, args.h, args.max_frames)
+        source = f"synthetic {args.w}x{args.h}"
+    else:
+        from bench_replay import iter_replay_frames
+        try:
+            frames = list(iter_replay_frames(args.source, args.max_frames))
+        except (FileNotFoundError, RuntimeError) as e:
+            frames = []
+            print(f"[!] {e}")
+        source = args.source
+    if not frames:
+        print(f"[X] Tidak ada frame di: {args.source} (pakai --synthetic untuk frame sintetis)")
+        sys.exit(1)
+
+    target_latency = 1000.0 / args.target_fps if args.target_fps > 0 else args.target_latency
+    threads = [int(t) for t in args.threads.split(",") if t.strip()] if args.threads else default_threads()
+    det_sizes = [int(d) for d in args.det_sizes.split(",") if d.strip()]
+    modules = [m.strip() for m in args.modules.split(";") if m.strip()]
+
+    result = calibrate(frames, model_name=args.model, device=args.device, precision=args.precision,
+                       backend=args.backend, modules=modules, threads=threads, det_sizes=det_sizes,
+                       faces_per_frame=args.faces or None, min_det_score=args.min_det,
+                       min_face_size=args.min_face_size, warmup=args.warmup)
+    if not result['candidates']:
+        print("[X] Tidak ada kombinasi yang bisa diukur.")
+        sys.exit(1)
+    profile = choose_profile(result['candidates'], target_latency, min_recall=args.min_recall)
+    print_report(result, profile, target_latency)
+
+    from bench_replay import host_info
+    meta = {'source': source, 'frames': len(frames), 'target_latency_ms': target_latency,
+            'min_recall': args.min_recall, 'precision': args.precision, 'backend': args.backend}
+    out_dir = os.path.dirname(args.report)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump({'profile': profile, **result, 'meta': dict(meta, model=args.model, host=host_info(),
+                                                              timestamp=time.strftime("%Y-%m-%d %H:%M:%S"))},
+                  f, indent=2)
+    print(f"[OK] JSON: {args.report}")
+
+    save_profile(args.profile, profile_key(args.model, args.precision), profile, meta)
+    print(f"[OK] Profile disimpan: {args.profile} (dipakai main.py: AUTO_TUNE_PROFILE)")
+
+
+if __name__ == "__main__":
+    main()
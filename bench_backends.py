@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inference Backend Benchmark untuk Face Recognition System
+Ukur setiap backend (lihat inference_backend.py) untuk detection dan recognition
+pada gambar yang sama, lalu pilih backend tercepat per module untuk host ini:
+
+- detection   : waktu det_model.detect per frame (det_size yang sama)
+- recognition : waktu embedding per wajah (crop dari landmark detection ORT, sama
+                untuk semua backend)
+- Kecocokan vs ORT: detection recall (IoU >= 0.5) dan cosine embedding; backend
+  yang hasilnya menyimpang (--min-recall / --min-cosine) tidak boleh dipilih
+
+--save menyimpan pilihan ke models/.backend.json; build_face_app(backend="auto")
+memakai pilihan itu selama host sama.
+
+Usage:
+    python bench_backends.py --source "face_db/snapshots/*/*.jpg" --save
+    python bench_backends.py --source recordings/gate_pagi.mp4 --model buffalo_s --det 320
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from facegate_insightface import build_face_app, embed_faces
+from face_tracker import iou_matrix
+from bench_replay import iter_replay_frames, summarize, host_info
+from bench_quantized import cosine, summarize_cosine
+from inference_backend import BACKENDS, BACKEND_ORT, CHOICE_FILE, save_choice
+
+
+def probe_faces(faces) -> list:
+    """Salinan wajah tanpa embedding (crop & landmark sama untuk semua backend)"""
+    from insightface.app.common import Face
+    return [Face(bbox=f.bbox, kps=f.kps, det_score=f.det_score) for f in faces]
+
+
+def bench_backend(app, frames: List[np.ndarray], ref_faces: List[list],
+                  min_det_score: float = 0.6, warmup: int = 3) -> Dict:
+    """Latency detection & recognition satu backend + hasil untuk dibandingkan dengan ORT"""
+    for frame in frames[:warmup]:
+        app.det_model.detect(frame, max_num=0, metric='default')
+
+    det_times, detections = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        bboxes, _ = app.det_model.detect(frame, max_num=0, metric='default')
+        det_times.append(time.perf_counter() - start)
+        detections.append(bboxes[bboxes[:, 4] >= min_det_score, :4] if len(bboxes) else np.zeros((0, 4)))
+
+    rec_times, embeddings, num_faces = [], [], 0
+    for frame, faces in zip(frames, ref_faces):
+        probes = probe_faces(faces)
+        if not probes:
+            embeddings.append([])
+            continue
+        start = time.perf_counter()
+        embed_faces(app, [(frame, f) for f in probes])
+        rec_times.append(time.perf_counter() - start)
+        num_faces += len(probes)
+        embeddings.append([f.embedding for f in probes])
+
+    return {
+        'detection': summarize(det_times),
+        'recognition_ms_per_face': round(sum(rec_times) * 1000 / num_faces, 3) if num_faces else None,
+        '_detections': detections,
+        '_embeddings': embeddings,
+    }
+
+
+def agreement(result: Dict, ref: Dict, iou_threshold: float = 0.5) -> Dict:
+    """Detection recall & cosine embedding vs ORT"""
+    ref_total = found = 0
+    for boxes, ref_boxes in zip(result['_detections'], ref['_detections']):
+        ref_total += len(ref_boxes)
+        if len(ref_boxes) and len(boxes):
+            found += int((iou_matrix(np.asarray(ref_boxes, np.float32).reshape(-1, 4),
+                                     np.asarray(boxes, np.float32).reshape(-1, 4)).max(axis=1)
+                          >= iou_threshold).sum())
+    cos = [cosine(a, b) for embs, ref_embs in zip(result['_embeddings'], ref['_embeddings'])
+           for a, b in zip(embs, ref_embs)]
+    return {'detection_recall': round(found / ref_total, 4) if ref_total else None,
+            'cosine': summarize_cosine(cos)}
+
+
+def pick_fastest(results: Dict[str, Dict], min_recall: float, min_cosine: float) -> Dict[str, str]:
+    """Backend tercepat per module di antara backend yang hasilnya cocok dengan ORT"""
+    det_ok = {b: r for b, r in results.items()
+              if b == BACKEND_ORT or (r['agreement']['detection_recall'] or 0.0) >= min_recall}
+    rec_ok = {b: r for b, r in results.items() if r['recognition_ms_per_face'] is not None and
+              (b == BACKEND_ORT or r['agreement']['cosine']['count'] == 0 or
+               r['agreement']['cosine']['min'] >= min_cosine)}
+    return {
+        'detection': min(det_ok, key=lambda b: det_ok[b]['detection']['mean_ms']),
+        'recognition': min(rec_ok, key=lambda b: rec_ok[b]['recognition_ms_per_face']) if rec_ok else BACKEND_ORT,
+    }
+
+
+def print_report(results: Dict[str, Dict], chosen: Dict[str, str]):
+    print("\n" + "=" * 78)
+    print("  INFERENCE BACKEND BENCHMARK")
+    print("=" * 78)
+    print(f"{'backend':>8} {'detect ms':>10} {'p90':>8} {'rec ms/face':>12} {'det recall':>11} {'cosine min':>11}")
+    for backend, r in results.items():
+        if 'error' in r:
+            print(f"{backend:>8}  [X] {r['error']}")
+            continue
+        rec = r['recognition_ms_per_face']
+        recall = r['agreement']['detection_recall']
+        cos = r['agreement']['cosine']
+        cos_min = cos['min'] if cos['count'] else None
+
+        def fmt(v, digits):
+            return f"{v:.{digits}f}" if v is not None else "-"
+
+        print(f"{backend:>8} {r['detection']['mean_ms']:>10.2f} {r['detection']['p90_ms']:>8.2f} "
+              f"{fmt(rec, 2):>12} {fmt(recall, 4):>11} {fmt(cos_min, 4):>11}")
+    print("-" * 78)
+    print(f"Tercepat: detection={chosen['detection']} | recognition={chosen['recognition']}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pilih backend inference tercepat (ORT vs OpenCV DNN) untuk host ini.")
+    parser.add_argument("--source", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Video file, folder gambar, atau glob pattern (harus berisi wajah)")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--det", type=int, default=320, help="det_size (square, sama dengan DET_SIZE)")
+    parser.add_argument("--precision", type=str, default="fp32", choices=["fp32", "int8"])
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--max-frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-recall", type=float, default=0.98, help="Detection recall minimum vs ORT")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Cosine embedding minimum vs ORT")
+    parser.add_argument("--report", type=str, default="bench/backends.json", help="Path output JSON")
+    parser.add_argument("--save", action="store_true",
+                        help="Simpan pilihan ke models/.backend.json (dipakai backend=\"auto\")")
+    args = parser.parse_args()
+
+    frames = list(iter_replay_frames(args.source, args.max_frames))
+    if not frames:
+        print(f"[X] Tidak ada frame di: {args.source}")
+        sys.exit(1)
+
+    # Wajah referensi dari ORT: crop yang sama untuk recognition semua backend
+    apps = {BACKEND_ORT: build_face_app(model_name=args.model, det_size=args.det,
+                                        precision=args.precision, backend=BACKEND_ORT)}
+    ref_faces = [[f for f in apps[BACKEND_ORT].get(frame) if float(f.det_score) >= args.min_det]
+                 for frame in frames]
+    print(f"[*] {len(frames)} frame, {sum(len(f) for f in ref_faces)} wajah referensi")
+
+    results = {}
+    for backend in BACKENDS:
+        try:
+            app = apps.get(backend) or build_face_app(model_name=args.model, det_size=args.det,
+                                                      precision=args.precision, backend=backend)
+        except Exception as e:
+            results[backend] = {'error': f"gagal load: {e}"}
+            continue
+        print(f"[*] Benchmark backend: {backend}")
+        results[backend] = bench_backend(app, frames, ref_faces, min_det_score=args.min_det, warmup=args.warmup)
+
+    ref = results[BACKEND_ORT]
+    for r in results.values():
+        if 'error' not in r:
+            r['agreement'] = agreement(r, ref)
+    valid = {b: r for b, r in results.items() if 'error' not in r}
+    chosen = pick_fastest(valid, args.min_recall, args.min_cosine)
+    print_report(results, chosen)
+
+    for r in valid.values():
+        r.pop('_detections')
+        r.pop('_embeddings')
+    model_name = args.model if args.precision == "fp32" else f"{args.model}_int8"
+    report = {'results': results, 'chosen': chosen,
+              'meta': {'source': args.source, 'model': model_name, 'det_size': args.det,
+                       'frames': len(frames), 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                       'host': host_info()}}
+
+    out_dir = os.path.dirname(args.report)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] JSON: {args.report}")
+
+    if args.save:
+        # Folder models/ yang benar-benar dipakai build_face_app
+        models_dir = os.path.dirname(os.path.dirname(os.path.abspath(apps[BACKEND_ORT].det_model.model_file)))
+        choice_file = os.path.join(models_dir, CHOICE_FILE)
+        timings = {b: {'detect_ms': r['detection']['mean_ms'], 'rec_ms_per_face': r['recognition_ms_per_face']}
+                   for b, r in valid.items()}
+        save_choice(choice_file, model_name, chosen, timings)
+        print(f"[OK] Pilihan disimpan: {choice_file} (pakai MODEL_BACKEND = \"auto\")")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matching Microbenchmark untuk Face Recognition System
+Ukur kernel matching (`embs @ emb` + `argmax`), top-k, dan FaceDB.load/add
+pada gallery sintetis (512-d, L2 normalized) dari 1k sampai 100k baris (1M lewat
+--sizes), untuk dtype float32/float16/int8 dan beberapa jumlah BLAS thread.
+
+NumPy tidak memakai BLAS untuk float16/int8 (ratusan ms per batch sudah di 5k baris),
+jadi dtype tersebut di-skip untuk gallery > --slow-dtype-max kecuali diminta.
+
+Setiap jumlah thread dijalankan di subprocess terpisah (env OMP/OPENBLAS/MKL
+di-set sebelum numpy di-import), hasil digabung ke CSV + JSON.
+
+Usage:
+    python bench_matching.py
+    python bench_matching.py --sizes 1000,10000,100000 --threads 1,4 --out bench/matching
+    python bench_matching.py --sizes 1000000 --dtypes float32
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+
+EMB_DIM = 512
+DTYPES = ("float32", "float16", "int8")
+INT8_SCALE = 127.0
+SLOW_DTYPE_MAX_ROWS = 100000  # float16/int8 (tanpa BLAS) di atas ukuran ini di-skip default
+
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+CSV_COLUMNS = ("threads", "dtype", "gallery_size", "op", "batch", "k",
+               "repeats", "mean_ms", "p50_ms", "p99_ms", "per_query_us", "top1_agreement")
+
+
+# =========================
+# Synthetic Gallery
+# =========================
+
+def synthetic_gallery(n: int, dim: int = EMB_DIM, seed: int = 0, chunk: int = 65536) -> np.ndarray:
+    """Generate gallery (n, dim) float32 L2 normalized, dibuat per chunk agar peak memory rendah"""
+    rng = np.random.default_rng(seed)
+    embs = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, chunk):
+        end = min(n, start + chunk)
+        block = rng.standard_normal((end - start, dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        embs[start:end] = block
+    return embs
+
+
+def synthetic_queries(embs: np.ndarray, count: int, noise: float = 0.5, seed: int = 1) -> np.ndarray:
+    """Query = gallery row + noise (seperti wajah yang sama dengan kondisi berbeda)"""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(embs), size=count)
+    q = embs[idx] + noise * rng.standard_normal((count, embs.shape[1]), dtype=np.float32) / np.sqrt(embs.shape[1])
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return q.astype(np.float32)
+
+
+def prepare_gallery(embs: np.ndarray, dtype: str) -> np.ndarray:
+    """Convert gallery float32 ke dtype target"""
+    if dtype == "float32":
+        return embs
+    if dtype == "float16":
+        return embs.astype(np.float16)
+    if dtype == "int8":
+        return np.clip(np.rint(embs * INT8_SCALE), -127, 127).astype(np.int8)
+    raise ValueError(f"dtype tidak didukung: {dtype}")
+
+
+def prepare_query(q: np.ndarray, dtype: str) -> np.ndarray:
+    if dtype == "float32":
+        return q
+    if dtype == "float16":
+        return q.astype(np.float16)
+    # int8 gallery x int32 query -> akumulasi int32 (tidak overflow)
+    return np.clip(np.rint(q * INT8_SCALE), -127, 127).astype(np.int32)
+
+
+def search(gallery: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Similarity gallery vs query (q: (D,) atau (D, B))"""
+    return gallery @ q
+
+
+# =========================
+# Timing
+# =========================
+
+def time_op(fn, min_time: float = 0.2, max_repeats: int = 50, min_repeats: int = 3) -> List[float]:
+    """Jalankan fn berulang sampai min_time tercapai; return list durasi (detik)"""
+    fn()  # warm-up
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_repeats:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if len(samples) >= min_repeats and time.perf_counter() - start >= min_time:
+            break
+    return samples
+
+
+def make_row(threads, dtype, n, op, samples, batch=1, k=1, top1_agreement=None) -> Dict:
+    arr = np.asarray(samples) * 1000.0
+    mean_ms = float(arr.mean())
+    return {
+        'threads': threads,
+        'dtype': dtype,
+        'gallery_size': n,
+        'op': op,
+        'batch': batch,
+        'k': k,
+        'repeats': len(samples),
+        'mean_ms': round(mean_ms, 4),
+        'p50_ms': round(float(np.percentile(arr, 50)), 4),
+        'p99_ms': round(float(np.percentile(arr, 99)), 4),
+        'per_query_us': round(mean_ms * 1000.0 / batch, 3),
+        'top1_agreement': '' if top1_agreement is None else round(top1_agreement, 4),
+    }
+
+
+# =========================
+# Suite (dijalankan di worker)
+# =========================
+
+def bench_facedb_io(embs: np.ndarray, threads: str) -> List[Dict]:
+    """Ukur FaceDB.load dan FaceDB.add pada gallery di folder temporary"""
+    from facegate_insightface import FaceDB
+
+    rows = []
+    n = len(embs)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_facedb_")
+    try:
+        db = FaceDB(tmp_dir)
+        np.save(db.emb_path, embs)
+
+        samples = time_op(db.load, min_time=0.5, max_repeats=10 if n < 100000 else 2, min_repeats=1)
+        rows.append(make_row(threads, "float32", n, "facedb_load", samples))
+
+        new_emb = synthetic_queries(embs, 1, seed=7)[0]
+
+        def add_once():
+            # Reset file supaya setiap add bekerja pada gallery berukuran n
+            np.save(db.emb_path, embs)
+            db.add(new_emb)
+
+        # Kurangi waktu reset (np.save) dari hasil add
+        save_samples = time_op(lambda: np.save(db.emb_path, embs), min_time=0.2,
+                               max_repeats=10 if n < 100000 else 2, min_repeats=1)
+        add_samples = time_op(add_once, min_time=0.5, max_repeats=10 if n < 100000 else 2, min_repeats=1)
+        save_mean = float(np.mean(save_samples))
+        rows.append(make_row(threads, "float32", n, "facedb_add",
+                             [max(0.0, s - save_mean) for s in add_samples]))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return rows
+
+
+def dtypes_for_size(n: int, dtypes: List[str], slow_dtype_max: int = SLOW_DTYPE_MAX_ROWS) -> List[str]:
+    """dtype yang dijalankan untuk gallery n baris (float16/int8 dibatasi slow_dtype_max; 0 = tanpa batas)"""
+    if not slow_dtype_max or n <= slow_dtype_max:
+        return list(dtypes)
+    return [d for d in dtypes if d == "float32"]
+
+
+def run_suite(sizes: List[int], dtypes: List[str], batch: int, k: int,
+              threads: str, include_io: bool, seed: int = 0,
+              slow_dtype_max: int = SLOW_DTYPE_MAX_ROWS) -> List[Dict]:
+    rows = []
+    for n in sizes:
+        print(f"[*] threads={threads} gallery={n}", file=sys.stderr)
+        embs = synthetic_gallery(n, seed=seed)
+        queries = synthetic_queries(embs, batch, seed=seed + 1)
+        ref_top1 = np.argmax(embs @ queries.T, axis=0)
+
+        for dtype in dtypes_for_size(n, dtypes, slow_dtype_max):
+            gallery = prepare_gallery(embs, dtype)
+            q_single = prepare_query(queries[0], dtype)
+            q_batch = prepare_query(np.ascontiguousarray(queries.T), dtype)
+
+            # Single search: sims = embs @ emb; argmax
+            samples = time_op(lambda: int(np.argmax(search(gallery, q_single))))
+            rows.append(make_row(threads, dtype, n, "search_single", samples))
+
+            # Batched search: (N, D) @ (D, B) -> argmax per kolom
+            top1 = np.argmax(search(gallery, q_batch), axis=0)
+            agreement = float(np.mean(top1 == ref_top1))
+            samples = time_op(lambda: np.argmax(search(gallery, q_batch), axis=0))
+            rows.append(make_row(threads, dtype, n, "search_batch", samples,
+                                 batch=batch, top1_agreement=agreement))
+
+            # Top-k (single query): argpartition + sort k kandidat
+            def topk():
+                sims = search(gallery, q_single)
+                part = np.argpartition(-sims, k - 1)[:k]
+                return part[np.argsort(-sims[part])]
+            samples = time_op(topk)
+            rows.append(make_row(threads, dtype, n, "topk", samples, k=k))
+
+            del gallery
+
+        if include_io:
+            rows.extend(bench_facedb_io(embs, threads))
+        del embs
+    return rows
+
+
+# =========================
+# Orchestrator
+# =========================
+
+def estimate_bytes(n: int, dtypes: List[str] = DTYPES, batch: int = 32) -> int:
+    """
+    Perkiraan peak memory untuk satu ukuran gallery
+
+    float32 gallery + FaceDB.load (copy + stack), atau gallery + copy dtype terbesar:
+    int8 @ query int32 di-upcast NumPy ke int32 (N x D x 4) di samping copy int8.
+    Ditambah matrix similarity batch (N x batch).
+    """
+    base = n * EMB_DIM * 4
+    extra = 2 * base  # FaceDB.load
+    for dtype in dtypes:
+        if dtype == "float16":
+            extra = max(extra, n * EMB_DIM * 2)
+        elif dtype == "int8":
+            extra = max(extra, n * EMB_DIM * (1 + 4))
+    return base + extra + n * batch * 4
+
+
+def available_memory() -> int:
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        return 0
+
+
+def run_worker_subprocess(threads: int, args, include_io: bool) -> List[Dict]:
+    env = dict(os.environ)
+    for var in BLAS_ENV_VARS:
+        env[var] = str(threads)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker",
+           "--sizes", ",".join(str(s) for s in args.sizes),
+           "--dtypes", ",".join(args.dtypes),
+           "--batch", str(args.batch),
+           "--k", str(args.k),
+           "--seed", str(args.seed),
+           "--threads", str(threads),
+           "--slow-dtype-max", str(args.slow_dtype_max)]
+    if include_io:
+        cmd.append("--io")
+    out = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(out.stdout.decode('utf-8'))
+
+
+def write_outputs(rows: List[Dict], out_prefix: str, meta: Dict):
+    out_dir = os.path.dirname(out_prefix)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    csv_path = out_prefix + ".csv"
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(",".join(CSV_COLUMNS) + "\n")
+        for row in rows:
+            f.write(",".join(str(row[c]) for c in CSV_COLUMNS) + "\n")
+
+    json_path = out_prefix + ".json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': rows}, f, indent=2)
+
+    print(f"[OK] CSV:  {csv_path}")
+    print(f"[OK] JSON: {json_path}")
+
+
+def print_table(rows: List[Dict]):
+    print("\n" + "=" * 94)
+    print("  MATCHING MICROBENCHMARK")
+    print("=" * 94)
+    print(f"{'thr':>4} {'dtype':>8} {'gallery':>9} {'op':>14} {'batch':>6} {'mean ms':>10} "
+          f"{'p99 ms':>10} {'us/query':>10} {'top1 agr':>9}")
+    for r in rows:
+        print(f"{r['threads']:>4} {r['dtype']:>8} {r['gallery_size']:>9} {r['op']:>14} {r['batch']:>6} "
+              f"{r['mean_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['per_query_us']:>10.1f} "
+              f"{str(r['top1_agreement']):>9}")
+    print("=" * 94)
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark matching kernel dan FaceDB.")
+    parser.add_argument("--sizes", type=str, default="1000,10000,100000", help="Ukuran gallery (e.g. tambah 1000000)")
+    parser.add_argument("--dtypes", type=str, default=",".join(DTYPES), help="float32,float16,int8")
+    parser.add_argument("--slow-dtype-max", type=int, default=SLOW_DTYPE_MAX_ROWS,
+                        help="float16/int8 (tanpa BLAS) hanya untuk gallery <= N baris (0 = semua ukuran)")
+    parser.add_argument("--threads", type=str, default="", help="Jumlah BLAS thread (default: 1,2,4,..,cpu_count)")
+    parser.add_argument("--batch", type=int, default=32, help="Jumlah query untuk batched search")
+    parser.add_argument("--k", type=int, default=5, help="k untuk top-k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-io", action="store_true", help="Skip FaceDB.load/add")
+    parser.add_argument("--out", type=str, default="bench/matching", help="Prefix output (.csv dan .json)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--io", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.sizes = parse_int_list(args.sizes)
+    args.dtypes = [d.strip() for d in args.dtypes.split(",") if d.strip()]
+    for d in args.dtypes:
+        if d not in DTYPES:
+            parser.error(f"dtype tidak didukung: {d}")
+
+    if args.worker:
+        rows = run_suite(args.sizes, args.dtypes, args.batch, args.k,
+                         threads=args.threads, include_io=args.io, seed=args.seed,
+                         slow_dtype_max=args.slow_dtype_max)
+        sys.stdout.write(json.dumps(rows))
+        return
+
+    cpu_count = os.cpu_count() or 1
+    if args.threads:
+        thread_counts = parse_int_list(args.threads)
+    else:
+        thread_counts = sorted({t for t in (1, 2, 4, 8, 16) if t < cpu_count} | {cpu_count})
+
+    # Skip ukuran gallery yang tidak muat di RAM
+    avail = available_memory()
+    if avail:
+        def need(n):
+            return estimate_bytes(n, dtypes_for_size(n, args.dtypes, args.slow_dtype_max), args.batch)
+
+        fitting = [n for n in args.sizes if need(n) < avail * 0.5]
+        for n in args.sizes:
+            if n not in fitting:
+                print(f"[!] Skip gallery {n}: butuh ~{need(n) / 1e9:.1f} GB, "
+                      f"tersedia {avail / 1e9:.1f} GB")
+    for n in args.sizes:
+        skipped = set(args.dtypes) - set(dtypes_for_size(n, args.dtypes, args.slow_dtype_max))
+        if skipped:
+            print(f"[*] Gallery {n}: skip {','.join(sorted(skipped))} (> --slow-dtype-max {args.slow_dtype_max})")
+        args.sizes = fitting
+    if not args.sizes:
+        print("[X] Tidak ada ukuran gallery yang bisa dijalankan.")
+        sys.exit(1)
+
+    rows = []
+    for i, threads in enumerate(thread_counts):
+        # FaceDB.load/add tidak tergantung BLAS -> cukup sekali (thread config pertama)
+        rows.extend(run_worker_subprocess(threads, args, include_io=(i == 0 and not args.no_io)))
+
+    print_table(rows)
+
+    meta = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'cpu_count': cpu_count,
+        'numpy': np.__version__,
+        'sizes': args.sizes,
+        'dtypes': args.dtypes,
+        'slow_dtype_max': args.slow_dtype_max,
+        'threads': thread_counts,
+        'batch': args.batch,
+        'k': args.k,
+    }
+    try:
+        from bench_replay import host_info
+        meta['host'] = host_info()
+    except Exception:
+        pass
+    write_outputs(rows, args.out, meta)
+
+
+if __name__ == "__main__":
+    main()
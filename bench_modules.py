@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model Module Benchmark untuk Face Recognition System
+Bandingkan konfigurasi module InsightFace (lihat model_loader.py):
+startup time, RAM, dan latency per frame / per wajah.
+
+Setiap konfigurasi dijalankan di subprocess terpisah supaya RSS tidak
+tercampur dengan session dari konfigurasi sebelumnya.
+
+Usage:
+    python bench_modules.py --source recordings/gate_pagi.mp4
+    python bench_modules.py --source "face_db/snapshots/*/*.jpg" --configs "recognize;full"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+
+def rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def run_config(config: str, source: str, model: str, det_size: int, device: str,
+               max_frames: int, warmup: int) -> Dict:
+    """Ukur satu konfigurasi module (dipanggil di subprocess worker)"""
+    # Import library dulu (facegate_insightface ikut meng-import onnxruntime)
+    # supaya RAM yang diukur hanya model + session
+    from facegate_insightface import build_face_app
+    from bench_replay import iter_replay_frames
+
+    frames = list(iter_replay_frames(source, max_frames))
+    if not frames:
+        raise RuntimeError(f"Tidak ada frame di: {source}")
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    app = build_face_app(model_name=model, det_size=det_size, device=device, modules=config)
+    startup = time.perf_counter() - start
+    rss_after = rss_mb()
+
+    for frame in frames[:warmup]:
+        app.get(frame)
+
+    get_times, det_times, face_counts = [], [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        bboxes, _ = app.det_model.detect(frame, max_num=0, metric='default')
+        det_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        faces = app.get(frame)
+        get_times.append(time.perf_counter() - t0)
+        face_counts.append(len(faces))
+
+    total_faces = sum(face_counts)
+    per_face = [(g - d) for g, d, n in zip(get_times, det_times, face_counts) if n > 0]
+    per_face_ms = (sum(per_face) / total_faces * 1000) if total_faces else None
+
+    return {
+        'config': config,
+        'modules': sorted(app.models.keys()),
+        'startup_s': round(startup, 3),
+        'startup_kind': getattr(app, 'load_report', {}).get('kind', 'uncached'),
+        'model_rss_mb': round(rss_after - rss_before, 1),
+        'total_rss_mb': round(rss_after, 1),
+        'frames': len(frames),
+        'faces': total_faces,
+        'frame_ms': round(float(np.mean(get_times)) * 1000, 2),
+        'detect_ms': round(float(np.mean(det_times)) * 1000, 2),
+        'per_face_ms': round(per_face_ms, 2) if per_face_ms is not None else None,
+    }
+
+
+def run_config_subprocess(config: str, args) -> Dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", config,
+           "--source", args.source,
+           "--model", args.model,
+           "--det", str(args.det),
+           "--device", args.device,
+           "--max-frames", str(args.max_frames),
+           "--warmup", str(args.warmup)]
+    out = subprocess.run(cmd, stdout=subprocess.PIPE, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    # Baris terakhir stdout = JSON (baris lain: log loading model)
+    return json.loads(out.stdout.decode('utf-8').strip().splitlines()[-1])
+
+
+def print_table(rows: List[Dict]):
+    print("\n" + "=" * 95)
+    print("  MODEL MODULE BENCHMARK")
+    print("=" * 95)
+    print(f"{'config':>10} {'startup s':>10} {'cache':>8} {'model MB':>9} {'frame ms':>9} {'detect ms':>10} "
+          f"{'per-face ms':>12}  modules")
+    for r in rows:
+        per_face = f"{r['per_face_ms']:.2f}" if r['per_face_ms'] is not None else "-"
+        print(f"{r['config']:>10} {r['startup_s']:>10.2f} {r.get('startup_kind', '-'):>8} {r['model_rss_mb']:>9.0f} {r['frame_ms']:>9.2f} "
+              f"{r['detect_ms']:>10.2f} {per_face:>12}  {','.join(r['modules'])}")
+    print("=" * 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark konfigurasi module InsightFace.")
+    parser.add_argument("--source", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Video file, folder gambar, atau glob pattern (harus berisi wajah)")
+    parser.add_argument("--configs", type=str, default="recognize;enroll;full",
+                        help="Konfigurasi dipisah ';': preset atau CSV module (e.g., recognize;detection,genderage)")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--det", type=int, default=320, help="det_size (square)")
+    parser.add_argument("--device", type=str, default="cpu", choices=["cpu", "cuda"])
+    parser.add_argument("--max-frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--out", type=str, default="bench/modules.json", help="Path output JSON")
+    parser.add_argument("--worker", type=str, default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        row = run_config(args.worker, args.source, args.model, args.det, args.device,
+                         args.max_frames, args.warmup)
+        sys.stdout.write("\n" + json.dumps(row) + "\n")
+        return
+
+    configs = [c.strip() for c in args.configs.split(";") if c.strip()]
+
+    rows = []
+    for config in configs:
+        print(f"[*] Config: {config}")
+        rows.append(run_config_subprocess(config, args))
+
+    print_table(rows)
+
+    from bench_replay import host_info
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': {'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                            'source': args.source, 'model': args.model,
+                            'det_size': args.det, 'device': args.device,
+                            'host': host_info()},
+                   'results': rows}, f, indent=2)
+    print(f"[OK] JSON: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
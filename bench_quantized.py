@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+INT8 Validation Harness untuk Face Recognition System
+Bandingkan model INT8 (quantize_models.py) dengan FP32 pada gambar yang sama:
+
+- Detection recall / precision: wajah FP32 (det_score >= min_det) yang juga ditemukan
+  INT8 (IoU >= 0.5), dan sebaliknya
+- Embedding cosine agreement:
+    rec-only   : crop yang sama (landmark FP32), ArcFace FP32 vs INT8
+    end-to-end : detection + landmark + ArcFace INT8 vs semua FP32
+- Latency end-to-end (detection + embedding) per frame, FP32 vs INT8
+
+Exit code 1 jika recall atau cosine di bawah batas (--min-recall, --min-cosine),
+supaya bisa dipakai sebagai gate sebelum MODEL_PRECISION = "int8".
+
+Usage:
+    python bench_quantized.py --source recordings/gate_pagi.mp4
+    python bench_quantized.py --source "face_db/snapshots/*/*.jpg" --det 320 --report bench/quantized.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from facegate_insightface import build_face_app, detect_and_embed, embed_faces, l2_normalize
+from face_tracker import iou_matrix
+from bench_replay import iter_replay_frames, summarize, host_info
+
+
+def run_pipeline(app, frame: np.ndarray):
+    """Detection + embedding (path recognize_mode), return (faces, detik)"""
+    start = time.perf_counter()
+    faces = detect_and_embed(app, frame)
+    return faces, time.perf_counter() - start
+
+
+def rec_only_embedding(app, frame: np.ndarray, face) -> np.ndarray:
+    """Embedding dengan model recognition app, dari crop landmark face (bukan detection app)"""
+    from insightface.app.common import Face
+    probe = Face(bbox=face.bbox, kps=face.kps, det_score=face.det_score)
+    embed_faces(app, [(frame, probe)])
+    return probe.embedding
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.dot(l2_normalize(a), l2_normalize(b)))
+
+
+def summarize_cosine(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'min': 0.0, 'p5': 0.0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {'count': int(arr.size), 'mean': round(float(arr.mean()), 4),
+            'min': round(float(arr.min()), 4), 'p5': round(float(np.percentile(arr, 5)), 4)}
+
+
+def compare(app_fp32, app_int8, frames: List[np.ndarray],
+            min_det_score: float = 0.6, iou_threshold: float = 0.5, warmup: int = 3) -> Dict:
+    for frame in frames[:warmup]:
+        run_pipeline(app_fp32, frame)
+        run_pipeline(app_int8, frame)
+
+    ref_total = ref_found = int8_total = int8_matched = 0
+    ious, cos_rec, cos_e2e = [], [], []
+    t_fp32, t_int8 = [], []
+
+    for frame in frames:
+        faces32, dt32 = run_pipeline(app_fp32, frame)
+        faces8, dt8 = run_pipeline(app_int8, frame)
+        t_fp32.append(dt32)
+        t_int8.append(dt8)
+
+        ref = [f for f in faces32 if float(f.det_score) >= min_det_score]
+        cand = [f for f in faces8 if float(f.det_score) >= min_det_score]
+        ref_total += len(ref)
+        int8_total += len(cand)
+
+        iou = iou_matrix(np.array([f.bbox[:4] for f in ref], dtype=np.float32).reshape(-1, 4),
+                         np.array([f.bbox[:4] for f in cand], dtype=np.float32).reshape(-1, 4))
+        used = set()
+        for ri, face32 in enumerate(ref):
+            cos_rec.append(cosine(face32.embedding, rec_only_embedding(app_int8, frame, face32)))
+            if iou.shape[1] == 0:
+                continue
+            ci = int(np.argmax(iou[ri]))
+            if iou[ri, ci] < iou_threshold or ci in used:
+                continue
+            used.add(ci)
+            ref_found += 1
+            ious.append(float(iou[ri, ci]))
+            cos_e2e.append(cosine(face32.embedding, cand[ci].embedding))
+        int8_matched += len(used)
+
+    lat32, lat8 = summarize(t_fp32), summarize(t_int8)
+    return {
+        'frames': len(frames),
+        'detection': {
+            'fp32_faces': ref_total,
+            'int8_faces': int8_total,
+            'recall': round(ref_found / ref_total, 4) if ref_total else None,
+            'precision': round(int8_matched / int8_total, 4) if int8_total else None,
+            'mean_iou': round(float(np.mean(ious)), 4) if ious else None,
+        },
+        'cosine_rec_only': summarize_cosine(cos_rec),
+        'cosine_end_to_end': summarize_cosine(cos_e2e),
+        'latency_fp32': lat32,
+        'latency_int8': lat8,
+        'speedup': round(lat32['mean_ms'] / lat8['mean_ms'], 3) if lat8['mean_ms'] else None,
+    }
+
+
+def model_sizes(app) -> Dict[str, float]:
+    return {task: round(os.path.getsize(m.model_file) / 1e6, 1) for task, m in app.models.items()}
+
+
+def print_report(report: Dict):
+    det = report['detection']
+    rec, e2e = report['cosine_rec_only'], report['cosine_end_to_end']
+    lat32, lat8 = report['latency_fp32'], report['latency_int8']
+
+    def fmt(v):
+        return f"{v:.4f}" if v is not None else "-"
+
+    print("\n" + "=" * 60)
+    print("  INT8 vs FP32")
+    print("=" * 60)
+    print(f"Frames:              {report['frames']}")
+    print(f"Faces FP32 / INT8:   {det['fp32_faces']} / {det['int8_faces']}")
+    print(f"Detection Recall:    {fmt(det['recall'])} | Precision: {fmt(det['precision'])} | "
+          f"IoU: {fmt(det['mean_iou'])}")
+    print(f"Cosine rec-only:     mean {rec['mean']:.4f} | p5 {rec['p5']:.4f} | min {rec['min']:.4f}")
+    print(f"Cosine end-to-end:   mean {e2e['mean']:.4f} | p5 {e2e['p5']:.4f} | min {e2e['min']:.4f}")
+    print(f"Latency FP32:        {lat32['mean_ms']:.2f} ms (p90 {lat32['p90_ms']:.2f})")
+    print(f"Latency INT8:        {lat8['mean_ms']:.2f} ms (p90 {lat8['p90_ms']:.2f})")
+    print(f"Speedup:             {report['speedup']}x")
+    sizes32, sizes8 = report['model_mb']['fp32'], report['model_mb']['int8']
+    for task in sizes32:
+        print(f"  Model {task + ':':<13} {sizes32[task]:.1f} MB -> {sizes8.get(task, 0):.1f} MB")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validasi model INT8 vs FP32 (recall, cosine, latency).")
+    parser.add_argument("--source", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Video file, folder gambar, atau glob pattern (sebaiknya BEDA dari data kalibrasi)")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--det", type=int, default=320, help="det_size (square)")
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-recall", type=float, default=0.98, help="Batas minimum detection recall")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Batas minimum mean cosine end-to-end")
+    parser.add_argument("--report", type=str, default="bench/quantized.json", help="Path output JSON")
+    args = parser.parse_args()
+
+    frames = list(iter_replay_frames(args.source, args.max_frames))
+    if not frames:
+        print(f"[X] Tidak ada frame di: {args.source}")
+        sys.exit(1)
+
+    app_fp32 = build_face_app(model_name=args.model, det_size=args.det, precision="fp32")
+    app_int8 = build_face_app(model_name=args.model, det_size=args.det, precision="int8")
+
+    report = compare(app_fp32, app_int8, frames, min_det_score=args.min_det, warmup=args.warmup)
+    report['model_mb'] = {'fp32': model_sizes(app_fp32), 'int8': model_sizes(app_int8)}
+    report['meta'] = {'source': args.source, 'model': args.model, 'det_size': args.det,
+                      'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"), 'host': host_info()}
+    print_report(report)
+
+    out_dir = os.path.dirname(args.report)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] JSON: {args.report}")
+
+    problems = []
+    recall = report['detection']['recall']
+    if recall is not None and recall < args.min_recall:
+        problems.append(f"detection recall {recall:.4f} < {args.min_recall}")
+    if report['cosine_end_to_end']['count'] and report['cosine_end_to_end']['mean'] < args.min_cosine:
+        problems.append(f"cosine end-to-end {report['cosine_end_to_end']['mean']:.4f} < {args.min_cosine}")
+    if problems:
+        print("\n[X] INT8 belum layak dipakai:")
+        for p in problems:
+            print(f"    - {p}")
+        sys.exit(1)
+    print("\n[OK] INT8 lolos validasi.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Replay Benchmark untuk Face Recognition System
+Replay video / image sequence yang sudah direkam melalui path per-frame
+recognize_mode (detect_and_embed -> recognize_faces -> draw_results), tanpa kamera
+dan tanpa cv2.imshow, secepat mungkin.
+
+Komponen per-frame bisa diaktifkan seperti di produksi: --detect-width, --roi,
+--quality-gate, --cascade. Yang TIDAK di-replay: AdaptiveScheduler, FaceTracker,
+MotionGate/standby (keputusan berbasis waktu nyata); frame skipping didekati dengan
+--every. Angka stage = biaya per frame yang diproses, bukan FPS kamera.
+
+Output: report JSON (throughput, percentile per stage, hasil recognition) yang
+bisa dibandingkan dengan baseline. Exit code 1 jika ada regresi melebihi toleransi,
+exit code 2 jika baseline direkam dengan konfigurasi/host berbeda (meta tidak cocok).
+
+Usage:
+    python bench_replay.py --source recordings/pickup.mp4 --save-baseline bench/baseline.json
+    python bench_replay.py --source recordings/pickup.mp4 --baseline bench/baseline.json --tolerance 0.10
+    python bench_replay.py --source recordings/frames/ --report bench/latest.json
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import platform
+import argparse
+from typing import Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from facegate_insightface import (
+    build_face_app,
+    detect_and_embed,
+    FaceDB,
+    recognize_faces,
+    draw_results,
+)
+from face_quality import FaceQualityGate
+from roi_detector import RoiDetector, supports_dynamic_input
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Stage yang dibandingkan dengan baseline (stage lain hanya dilaporkan)
+COMPARED_STAGES = ("detect", "match", "lookup", "render", "total")
+
+# Meta yang harus sama supaya angka report sebanding dengan baseline
+COMPARED_META = ("source", "model", "device", "det_size", "every", "cascade",
+                 "detect_width", "roi", "quality_gate", "gallery_size")
+COMPARED_HOST = ("platform", "cpu_count", "onnxruntime")
+
+
+# =========================
+# Frame Source
+# =========================
+
+def list_image_files(source: str) -> List[str]:
+    """List image file dari folder atau glob pattern, urut nama (deterministic)"""
+    if os.path.isdir(source):
+        files = [os.path.join(source, f) for f in os.listdir(source)]
+    else:
+        files = glob.glob(source)
+    return sorted(f for f in files if f.lower().endswith(IMAGE_EXTS))
+
+
+def iter_replay_frames(source: str, max_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Yield frame BGR dari video file, folder gambar, atau glob pattern (urutan deterministic)
+
+    Args:
+        source: Path video / folder / glob (e.g., "recordings/*.jpg")
+        max_frames: Batas jumlah frame (None = semua)
+    """
+    count = 0
+    if os.path.isfile(source) and not source.lower().endswith(IMAGE_EXTS):
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise RuntimeError(f"Video tidak bisa dibuka: {source}")
+        try:
+            while max_frames is None or count < max_frames:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                count += 1
+                yield frame
+        finally:
+            cap.release()
+        return
+
+    files = [source] if os.path.isfile(source) else list_image_files(source)
+    if not files:
+        raise FileNotFoundError(f"Tidak ada frame di: {source}")
+    for path in files:
+        if max_frames is not None and count >= max_frames:
+            break
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"[!] Skip file yang tidak bisa dibaca: {path}")
+            continue
+        count += 1
+        yield frame
+
+
+# =========================
+# Stats
+# =========================
+
+def summarize(samples_s: List[float]) -> Dict[str, float]:
+    """Ringkasan percentile (dalam ms) dari list durasi (detik)"""
+    if not samples_s:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p90_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    arr = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    return {
+        'count': int(arr.size),
+        'mean_ms': round(float(arr.mean()), 3),
+        'p50_ms': round(float(np.percentile(arr, 50)), 3),
+        'p90_ms': round(float(np.percentile(arr, 90)), 3),
+        'p99_ms': round(float(np.percentile(arr, 99)), 3),
+        'max_ms': round(float(arr.max()), 3),
+    }
+
+
+# =========================
+# Replay
+# =========================
+
+def run_replay(app,
+               embs: np.ndarray,
+               student_db,
+               source: str,
+               threshold: float = 0.35,
+               min_det_score: float = 0.6,
+               every: int = 1,
+               warmup: int = 5,
+               max_frames: Optional[int] = None,
+               render: bool = True,
+               log_results: bool = False,
+               detect_fn=None,
+               cascade=None,
+               detect_width: Optional[int] = None,
+               roi_detection: bool = False,
+               quality_gate: bool = False) -> Dict:
+    """
+    Replay frame dari `source` melalui detection, matching, lookup, dan render
+
+    Args:
+        app: FaceAnalysis dari build_face_app
+        embs: Gallery embeddings (FaceDB.load)
+        student_db: StudentDatabase
+        source: Video / folder / glob
+        every: Proses setiap N frame (1 = semua frame, 3 = recognize_mode tanpa scheduler)
+        warmup: Jumlah frame awal yang diproses tapi tidak dihitung
+        render: Ikut ukur draw_results (tanpa imshow)
+        log_results: Tulis hasil ke recognition.log (default off agar log tidak tercemar)
+        detect_fn: Override detection (default: detect_and_embed dengan komponen di bawah)
+        cascade: ModelCascade yang galeri-nya sudah di-load (report berisi escalation rate
+                 & latency yang dihemat)
+        detect_width: Detection pada frame yang di-downscale ke lebar ini (DETECT_WIDTH)
+        roi_detection: RoiDetector seperti ROI_DETECTION (jadwal full sweep memakai waktu replay)
+        quality_gate: FaceQualityGate seperti QUALITY_GATE (report berisi jumlah skip)
+
+    Returns:
+        Report dict
+    """
+    roi_detector = face_quality = None
+    if detect_fn is None:
+        if roi_detection and hasattr(app, "det_model") and supports_dynamic_input(app.det_model):
+            roi_detector = RoiDetector()
+        if quality_gate and hasattr(app, "det_model"):
+            face_quality = FaceQualityGate(min_det_score=min_det_score)
+        quality_skipped = {}
+
+        def detect_fn(frame):
+            faces = detect_and_embed(app, frame, detect_width=detect_width, roi_detector=roi_detector,
+                                     quality_gate=face_quality, cascade=cascade)
+            if face_quality is not None:
+                for reason, count in face_quality.last_skipped.items():
+                    quality_skipped[reason] = quality_skipped.get(reason, 0) + count
+            return faces
+
+    stages = {name: [] for name in ("decode", "detect", "match", "lookup", "render", "total")}
+    counts = {'frames': 0, 'processed': 0, 'faces': 0, 'recognized': 0, 'unknown': 0, 'no_db_entry': 0}
+    signature = hashlib.sha1()
+    last_result = None
+
+    frames = iter_replay_frames(source, max_frames=max_frames)
+    frame_idx = 0
+    run_start = None
+
+    while True:
+        decode_start = time.perf_counter()
+        try:
+            frame = next(frames)
+        except StopIteration:
+            break
+        decode_time = time.perf_counter() - decode_start
+
+        frame_idx += 1
+        measured = frame_idx > warmup
+        if measured and run_start is None:
+            run_start = time.perf_counter()
+
+        frame_start = time.perf_counter()
+        stage_times = {}
+        processed = (frame_idx % every == 0)
+
+        if processed:
+            detect_start = time.perf_counter()
+            faces = detect_fn(frame)
+            detect_time = time.perf_counter() - detect_start
+
+            results = recognize_faces(faces, embs, student_db,
+                                      threshold=threshold,
+                                      min_det_score=min_det_score,
+                                      log_results=log_results,
+                                      stage_times=stage_times)
+            last_result = results if results else None
+
+        if render:
+            render_start = time.perf_counter()
+            disp = frame.copy()
+            draw_results(disp, last_result)
+            render_time = time.perf_counter() - render_start
+
+        total_time = time.perf_counter() - frame_start
+
+        if not measured:
+            continue
+
+        counts['frames'] += 1
+        stages['decode'].append(decode_time)
+        stages['total'].append(total_time)
+        if render:
+            stages['render'].append(render_time)
+
+        if processed:
+            counts['processed'] += 1
+            counts['faces'] += len(faces) if faces else 0
+            stages['detect'].append(detect_time)
+            stages['match'].append(stage_times.get('match', 0.0))
+            stages['lookup'].append(stage_times.get('lookup', 0.0))
+
+            # Signature hasil recognition (untuk cek determinism vs baseline)
+            texts = [item[1] for item in results]
+            signature.update(f"{frame_idx}:{'|'.join(texts)};".encode('utf-8'))
+            for item in results:
+                text = item[1]
+                if item[2]:
+                    counts['recognized'] += 1
+                elif text.startswith("Index:"):
+                    counts['no_db_entry'] += 1
+                else:
+                    counts['unknown'] += 1
+
+    wall = (time.perf_counter() - run_start) if run_start is not None else 0.0
+    busy = sum(stages['total'])
+
+    report = {
+        'frames': counts['frames'],
+        'processed_frames': counts['processed'],
+        'wall_seconds': round(wall, 4),
+        # Throughput pipeline (tanpa decode) dan end-to-end (termasuk decode)
+        'throughput_fps': round(counts['frames'] / busy, 2) if busy > 0 else 0.0,
+        'end_to_end_fps': round(counts['frames'] / wall, 2) if wall > 0 else 0.0,
+        'stages': {name: summarize(values) for name, values in stages.items()},
+        'recognitions': {
+            'faces_detected': counts['faces'],
+            'recognized': counts['recognized'],
+            'unknown': counts['unknown'],
+            'no_db_entry': counts['no_db_entry'],
+            'signature': signature.hexdigest(),
+        },
+    }
+    if cascade is not None:
+        report['cascade'] = cascade.get_stats()
+    if roi_detector is not None:
+        report['roi'] = {'roi_runs': roi_detector.roi_runs, 'full_runs': roi_detector.full_runs,
+                         'roi_ratio': round(roi_detector.roi_ratio, 3)}
+    if face_quality is not None:
+        report['quality_skipped'] = quality_skipped
+    return report
+
+
+def host_info() -> Dict:
+    """Info host + versi library untuk konteks report"""
+    info = {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+    try:
+        import onnxruntime
+        info['onnxruntime'] = onnxruntime.__version__
+    except ImportError:
+        pass
+    return info
+
+
+# =========================
+# Baseline Comparison
+# =========================
+
+def meta_mismatches(current: Dict, baseline: Dict) -> List[str]:
+    """
+    Field meta (konfigurasi + host) yang berbeda dari baseline
+
+    Field yang tidak ada di salah satu report (baseline versi lama) dilewati.
+    """
+    problems = []
+    cur_meta, base_meta = current.get('meta', {}), baseline.get('meta', {})
+    pairs = [(key, cur_meta, base_meta) for key in COMPARED_META]
+    pairs += [(f"host.{key}", cur_meta.get('host', {}), base_meta.get('host', {})) for key in COMPARED_HOST]
+    for name, cur, base in pairs:
+        key = name.split(".")[-1]
+        if key in cur and key in base and cur[key] != base[key]:
+            problems.append(f"{name}: {cur[key]!r} vs baseline {base[key]!r}")
+    return problems
+
+
+def compare_reports(current: Dict, baseline: Dict, tolerance: float = 0.10,
+                    min_stage_ms: float = 0.05) -> List[str]:
+    """
+    Bandingkan report dengan baseline
+
+    Args:
+        tolerance: Toleransi relatif (0.10 = 10%)
+        min_stage_ms: Stage dengan baseline mean di bawah ini diabaikan (noise)
+
+    Returns:
+        List pesan regresi (kosong = lolos)
+    """
+    problems = []
+
+    base_fps = baseline.get('throughput_fps', 0.0)
+    cur_fps = current.get('throughput_fps', 0.0)
+    if base_fps > 0 and cur_fps < base_fps * (1.0 - tolerance):
+        problems.append(f"throughput_fps turun: {cur_fps:.2f} vs baseline {base_fps:.2f} "
+                        f"({(cur_fps / base_fps - 1) * 100:+.1f}%)")
+
+    for stage in COMPARED_STAGES:
+        base = baseline.get('stages', {}).get(stage)
+        cur = current.get('stages', {}).get(stage)
+        if not base or not cur or base.get('mean_ms', 0.0) < min_stage_ms:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            if base[key] > 0 and cur[key] > base[key] * (1.0 + tolerance):
+                problems.append(f"{stage}.{key} naik: {cur[key]:.3f} vs baseline {base[key]:.3f} "
+                                f"({(cur[key] / base[key] - 1) * 100:+.1f}%)")
+
+    base_sig = baseline.get('recognitions', {}).get('signature')
+    cur_sig = current.get('recognitions', {}).get('signature')
+    if base_sig and cur_sig and base_sig != cur_sig:
+        problems.append("hasil recognition berbeda dari baseline (signature mismatch)")
+
+    return problems
+
+
+def print_report(report: Dict):
+    print("\n" + "=" * 70)
+    print("  REPLAY BENCHMARK")
+    print("=" * 70)
+    print(f"Frames:          {report['frames']} (processed: {report['processed_frames']})")
+    print(f"Throughput:      {report['throughput_fps']:.2f} FPS (pipeline)")
+    print(f"End-to-end:      {report['end_to_end_fps']:.2f} FPS (termasuk decode)")
+    print("-" * 70)
+    print(f"{'Stage':<10}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, st in report['stages'].items():
+        if st['count'] == 0:
+            continue
+        print(f"{name:<10}{st['mean_ms']:>10.2f}{st['p50_ms']:>10.2f}{st['p90_ms']:>10.2f}"
+              f"{st['p99_ms']:>10.2f}{st['max_ms']:>10.2f}")
+    rec = report['recognitions']
+    print("-" * 70)
+    print(f"Faces detected:  {rec['faces_detected']}")
+    print(f"Recognized:      {rec['recognized']} | Unknown: {rec['unknown']} | No DB entry: {rec['no_db_entry']}")
+    print(f"Signature:       {rec['signature']}")
+    if 'cascade' in report:
+        cas = report['cascade']
+        print(f"Cascade:         {cas['fast_model']} | escalated {cas['escalated']}/{cas['faces']} "
+              f"({cas['escalation_rate'] * 100:.0f}%) | saved {cas['saved_ms']:.0f} ms "
+              f"(fast {cas['fast_ms_per_face']:.1f} / full {cas['full_ms_per_face']:.1f} ms per wajah)")
+    print("=" * 70)
+
+
+# =========================
+# Main
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark untuk recognize pipeline.")
+    parser.add_argument("--source", type=str, required=True, help="Video file, folder gambar, atau glob pattern")
+    parser.add_argument("--db", type=str, default="face_db", help="DB folder")
+    parser.add_argument("--students", type=str, default="students.db", help="SQLite student database")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--device", type=str, default="cpu", choices=["cpu", "cuda"])
+    parser.add_argument("--det", type=int, default=640, help="det_size (square)")
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--thr", type=float, default=0.35)
+    parser.add_argument("--every", type=int, default=1, help="Proses setiap N frame (recognize_mode: 3)")
+    parser.add_argument("--warmup", type=int, default=5, help="Frame warm-up yang tidak dihitung")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--no-render", action="store_true", help="Jangan ukur stage render")
+    parser.add_argument("--report", type=str, default="", help="Simpan report JSON ke path ini")
+    parser.add_argument("--baseline", type=str, default="", help="Bandingkan dengan baseline JSON ini")
+    parser.add_argument("--save-baseline", type=str, default="", help="Simpan report sebagai baseline baru")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Toleransi regresi relatif (0.10 = 10%%)")
+    parser.add_argument("--allow-meta-mismatch", action="store_true",
+                        help="Tetap bandingkan walau baseline dari konfigurasi/host berbeda (hanya warning)")
+    parser.add_argument("--cascade", type=str, default="",
+                        help="Pack kecil untuk model cascade (e.g. buffalo_s); report berisi escalation rate")
+    parser.add_argument("--detect-width", type=int, default=0, help="Detection pada frame selebar ini (DETECT_WIDTH)")
+    parser.add_argument("--roi", action="store_true", help="ROI re-detection seperti ROI_DETECTION")
+    parser.add_argument("--quality-gate", action="store_true", help="Quality gate seperti QUALITY_GATE")
+    args = parser.parse_args()
+
+    from student_database import StudentDatabase
+
+    db = FaceDB(args.db)
+    embs = db.load()
+    if len(embs) == 0:
+        print(f"[!] DB kosong ({args.db}). Benchmark tetap jalan, semua wajah akan 'Unknown'.")
+        embs = np.zeros((1, 512), dtype=np.float32)
+    student_db = StudentDatabase(args.students)
+
+    app = build_face_app(model_name=args.model, det_size=args.det, device=args.device)
+
+    cascade = None
+    if args.cascade:
+        from model_cascade import ModelCascade
+        fast_app = build_face_app(model_name=args.cascade, det_size=args.det, device=args.device)
+        cascade = ModelCascade(fast_app, app, db, fast_model=args.cascade, threshold=args.thr)
+        if not cascade.load_galleries():
+            sys.exit(1)
+
+    report = run_replay(app, embs, student_db, args.source,
+                        threshold=args.thr,
+                        min_det_score=args.min_det,
+                        every=max(1, args.every),
+                        warmup=args.warmup,
+                        max_frames=args.max_frames,
+                        render=not args.no_render,
+                        cascade=cascade,
+                        detect_width=args.detect_width or None,
+                        roi_detection=args.roi,
+                        quality_gate=args.quality_gate)
+    report['meta'] = {
+        'source': args.source,
+        'model': args.model,
+        'device': args.device,
+        'det_size': args.det,
+        'every': args.every,
+        'cascade': args.cascade or None,
+        'detect_width': args.detect_width or None,
+        'roi': args.roi,
+        'quality_gate': args.quality_gate,
+        'gallery_size': int(len(embs)),
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'host': host_info(),
+    }
+
+    print_report(report)
+
+    for path in (args.report, args.save_baseline):
+        if path:
+            out_dir = os.path.dirname(path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"[OK] Report disimpan: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        mismatches = meta_mismatches(report, baseline)
+        if mismatches:
+            mark = "[!]" if args.allow_meta_mismatch else "[X]"
+            print(f"\n{mark} Baseline tidak sebanding (konfigurasi/host berbeda):")
+            for m in mismatches:
+                print(f"    - {m}")
+            if not args.allow_meta_mismatch:
+                print("    Rekam baseline baru dengan --save-baseline, atau --allow-meta-mismatch.")
+                sys.exit(2)
+        problems = compare_reports(report, baseline, tolerance=args.tolerance)
+        if problems:
+            print(f"\n[X] REGRESSION (toleransi {args.tolerance * 100:.0f}%):")
+            for p in problems:
+                print(f"    - {p}")
+            sys.exit(1)
+        print(f"\n[OK] Tidak ada regresi vs baseline (toleransi {args.tolerance * 100:.0f}%).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Threaded Camera Grabber untuk Face Recognition System
+Capture thread terus membaca kamera dan hanya menyimpan frame terbaru, sehingga
+buffer driver tidak menumpuk saat inference lambat dan recognizer selalu
+memproses gambar paling fresh.
+
+Frame di-hand-off sebagai reference (tanpa copy): cap.read() mengalokasikan
+array baru setiap frame, jadi consumer memiliki frame tersebut sepenuhnya.
+
+Kamera yang tersendat (USB hiccup, FPS diturunkan saat standby) bukan akhir stream:
+read() terus menunggu selama capture thread sehat; stream baru dianggap selesai
+setelah max_failures read gagal berturut-turut (file habis / kamera dicabut).
+
+cv2.VideoCapture tidak thread-safe: set() dari thread lain (misal StandbyController)
+diantrikan dan dijalankan capture thread di antara dua read.
+"""
+
+import time
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class LatestFrameGrabber:
+    """
+    Wrapper cv2.VideoCapture (atau frame source lain dengan read/release)
+    dengan capture thread "latest-frame-wins"
+
+    Interface read()/set()/get()/isOpened()/release() sama dengan cv2.VideoCapture,
+    jadi bisa langsung dipakai di recognize_mode/enroll_mode.
+    """
+
+    def __init__(self, cap, read_timeout: float = 2.0, max_failures: int = 10):
+        """
+        Args:
+            cap: cv2.VideoCapture yang sudah dibuka
+            read_timeout: Interval read() menunggu frame baru sebelum dicatat sebagai stall
+                          (detik); read() tetap menunggu selama capture thread sehat
+            max_failures: cap.read() gagal berturut-turut sebelum stream dianggap selesai
+        """
+        self.cap = cap
+        self.read_timeout = read_timeout
+        self.max_failures = max_failures
+
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_id = 0
+        self._consumed_id = 0
+        self._ok = True
+        self._running = True
+        self._pending_props = []  # (prop_id, value) dari set(), dijalankan capture thread
+
+        # Stats
+        self.grabbed = 0        # Total frame dibaca dari kamera
+        self.dropped = 0        # Frame yang ditimpa sebelum sempat diproses
+        self.stalls = 0         # read() menunggu > read_timeout tanpa frame baru
+        self.read_failures = 0  # cap.read() gagal (transient, sebelum max_failures)
+        self.last_timestamp = 0.0  # Waktu grab (time.time()) frame terakhir yang di-read
+
+        self._frame_ts = 0.0
+        self._stall_frame_id = -1
+        self._thread = threading.Thread(target=self._run, name="LatestFrameGrabber", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            with self._cond:
+                props, self._pending_props = self._pending_props, []
+            for prop_id, value in props:
+                self.cap.set(prop_id, value)
+
+            ok, frame = self.cap.read()
+            ts = time.time()
+
+            if not ok:
+                failures += 1
+                self.read_failures += 1
+                if failures >= self.max_failures:
+                    with self._cond:
+                        self._ok = False
+                        self._cond.notify_all()
+                    break
+                time.sleep(0.01 * failures)  # Read gagal sesaat (USB hiccup, ganti resolusi)
+                continue
+            failures = 0
+
+            with self._cond:
+                # Frame sebelumnya belum diambil consumer -> di-drop
+                if self._frame_id > self._consumed_id:
+                    self.dropped += 1
+
+                self._frame = frame
+                self._frame_ts = ts
+                self._frame_id += 1
+                self.grabbed += 1
+                self._cond.notify_all()
+
+    def read_with_timestamp(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Ambil frame terbaru yang belum pernah di-read (blocking sampai ada)
+
+        Args:
+            timeout: Batas waktu menunggu (0 = non-blocking poll). None = tunggu sampai ada
+                     frame atau capture thread berhenti (stall > read_timeout dihitung di stalls)
+
+        Returns:
+            (ok, frame, grab_timestamp); ok=False karena timeout bisa dibedakan dari akhir
+            stream lewat isOpened()
+        """
+        def ready():
+            return self._frame_id > self._consumed_id or not self._ok or not self._running
+
+        with self._cond:
+            if timeout is None:
+                while not self._cond.wait_for(ready, timeout=self.read_timeout):
+                    # Kamera tersendat, bukan akhir stream
+                    if self.stalls == 0 or self._frame_id != self._stall_frame_id:
+                        print(f"[!] Kamera tidak mengirim frame > {self.read_timeout:g} s, menunggu...")
+                    self._stall_frame_id = self._frame_id
+                    self.stalls += 1
+            else:
+                self._cond.wait_for(ready, timeout=timeout)
+
+            if self._frame_id == self._consumed_id:
+                return False, None, 0.0
+
+            self._consumed_id = self._frame_id
+            frame = self._frame
+            self._frame = None  # Hand-off: grabber tidak menyimpan reference lagi
+            self.last_timestamp = self._frame_ts
+            return True, frame, self._frame_ts
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Sama seperti cv2.VideoCapture.read(), tapi selalu frame terbaru"""
+        ok, frame, _ = self.read_with_timestamp()
+        return ok, frame
+
+    def frame_age(self) -> float:
+        """Umur (detik) frame terakhir yang di-read, diukur dari waktu grab"""
+        if self.last_timestamp == 0.0:
+            return 0.0
+        return time.time() - self.last_timestamp
+
+    def isOpened(self) -> bool:
+        return self._ok and self.cap.isOpened()
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """Antrikan perubahan property; dijalankan capture thread sebelum read berikutnya"""
+        with self._cond:
+            if not self._running or not self._ok:
+                return False
+            self._pending_props.append((prop_id, value))
+        return True
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+    def release(self):
+        """Stop capture thread lalu release kamera"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=2.0)
+        self.cap.release()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared-Memory Event Ring untuk Face Recognition System
+Publish recognition event sebagai record biner fixed-size ke ring buffer
+di `multiprocessing.shared_memory`, supaya dashboard / gate controller di
+proses lain bisa consume event tanpa tail text log.
+
+Layout segment:
+    [header 64 byte][slot 0][slot 1]...[slot capacity-1]
+
+Setiap slot punya sequence number sendiri (seqlock-style):
+- Writer (single writer) set seq slot = 0, tulis payload, lalu set seq slot = n,
+  kemudian update write_seq di header. Writer tidak pernah menunggu reader.
+- Reader baca seq slot sebelum dan sesudah copy payload; record hanya valid jika
+  keduanya sama dengan seq yang diharapkan. Jika reader tertinggal lebih dari
+  `capacity` event, event lama dihitung sebagai `lost`.
+
+Usage (reader di proses lain):
+    python event_ring.py --name facegate_events
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+
+# Header: magic, version, record_size, capacity, write_seq
+_HEADER_FMT = "<IHHIxxxxQ"
+_HEADER_SIZE = 64
+_MAGIC = 0x46474556  # "FGEV"
+_VERSION = 1
+_WRITE_SEQ_OFFSET = struct.calcsize("<IHHIxxxx")
+
+# Record: seq, timestamp, similarity, embedding_index, camera_index, parent_id,
+#         status, bbox (x1, y1, x2, y2), nis, name
+_RECORD_FMT = "<QdfiiiB3x4f16s48s"
+_RECORD_SIZE = 128
+_SEQ_FMT = "<Q"
+
+assert struct.calcsize(_HEADER_FMT) <= _HEADER_SIZE
+assert struct.calcsize(_RECORD_FMT) <= _RECORD_SIZE
+
+STATUS_UNKNOWN = 0
+STATUS_RECOGNIZED = 1
+STATUS_NO_DB_ENTRY = 2
+
+DEFAULT_RING_NAME = "facegate_events"
+
+
+@dataclass
+class RecognitionEvent:
+    """Satu recognition event (hasil decode record biner)"""
+    seq: int
+    timestamp: float
+    similarity: float
+    embedding_index: int
+    camera_index: int
+    parent_id: int
+    status: int
+    bbox: Tuple[float, float, float, float]
+    nis: str
+    name: str
+
+    @property
+    def recognized(self) -> bool:
+        return self.status == STATUS_RECOGNIZED
+
+
+def _encode_str(value: Optional[str], size: int) -> bytes:
+    """Encode UTF-8 dan potong ke `size` byte tanpa memotong karakter multi-byte"""
+    if not value:
+        return b""
+    data = value.encode('utf-8')[:size]
+    return data.decode('utf-8', errors='ignore').encode('utf-8')
+
+
+class RecognitionEventWriter:
+    """Writer (single producer) untuk ring buffer recognition event"""
+
+    def __init__(self, name: str = DEFAULT_RING_NAME, capacity: int = 1024):
+        """
+        Args:
+            name: Nama shared memory segment
+            capacity: Jumlah slot di ring buffer
+        """
+        self.name = name
+        self.capacity = capacity
+        size = _HEADER_SIZE + capacity * _RECORD_SIZE
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Sisa segment dari proses sebelumnya yang crash -> buat ulang
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.buf = self.shm.buf
+        self.buf[:size] = bytes(size)
+        struct.pack_into(_HEADER_FMT, self.buf, 0, _MAGIC, _VERSION, _RECORD_SIZE, capacity, 0)
+        self.seq = 0
+
+    def publish(self,
+                similarity: float,
+                status: int,
+                embedding_index: int = -1,
+                camera_index: int = 0,
+                parent: Optional[dict] = None,
+                bbox=None,
+                timestamp: Optional[float] = None) -> int:
+        """
+        Tulis satu event ke ring buffer
+
+        Args:
+            similarity: Best cosine similarity
+            status: STATUS_RECOGNIZED / STATUS_UNKNOWN / STATUS_NO_DB_ENTRY
+            embedding_index: Index embedding terbaik (-1 jika tidak ada)
+            camera_index: Index kamera
+            parent: Dict dari StudentDatabase.get_parent_by_index (optional)
+            bbox: Bounding box wajah (x1, y1, x2, y2)
+            timestamp: Waktu event (default: time.time())
+
+        Returns:
+            Sequence number event
+        """
+        self.seq += 1
+        seq = self.seq
+        offset = _HEADER_SIZE + ((seq - 1) % self.capacity) * _RECORD_SIZE
+
+        if bbox is None:
+            bbox = (0.0, 0.0, 0.0, 0.0)
+        parent_id = int(parent['parent_id']) if parent else -1
+        nis = _encode_str(parent['nis'], 16) if parent else b""
+        name = _encode_str(parent['nama_ortu'], 48) if parent else b""
+
+        # Tandai slot sedang ditulis, tulis payload, lalu publish seq
+        struct.pack_into(_SEQ_FMT, self.buf, offset, 0)
+        struct.pack_into(_RECORD_FMT, self.buf, offset,
+                         0,
+                         time.time() if timestamp is None else timestamp,
+                         float(similarity),
+                         int(embedding_index),
+                         int(camera_index),
+                         parent_id,
+                         int(status),
+                         float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]),
+                         nis,
+                         name)
+        struct.pack_into(_SEQ_FMT, self.buf, offset, seq)
+        struct.pack_into(_SEQ_FMT, self.buf, _WRITE_SEQ_OFFSET, seq)
+        return seq
+
+    def close(self):
+        """Tutup dan hapus segment"""
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RecognitionEventReader:
+    """Reader untuk ring buffer recognition event (bisa banyak reader sekaligus)"""
+
+    def __init__(self, name: str = DEFAULT_RING_NAME, from_start: bool = False):
+        """
+        Args:
+            name: Nama shared memory segment (harus sudah dibuat oleh writer)
+            from_start: Jika True, mulai dari event tertua yang masih ada di ring
+        """
+        self.shm = shared_memory.SharedMemory(name=name)
+        if os.name != 'nt':
+            # Reader tidak memiliki segment: jangan biarkan resource_tracker meng-unlink saat exit
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+
+        self.buf = self.shm.buf
+        magic, version, record_size, capacity, write_seq = struct.unpack_from(_HEADER_FMT, self.buf, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD_SIZE:
+            self.shm.close()
+            raise ValueError(f"Shared memory '{name}' bukan event ring yang valid")
+
+        self.capacity = capacity
+        self.last_seq = max(0, write_seq - capacity) if from_start else write_seq
+        self.lost = 0
+
+    def _write_seq(self) -> int:
+        return struct.unpack_from(_SEQ_FMT, self.buf, _WRITE_SEQ_OFFSET)[0]
+
+    def read_new(self, max_events: Optional[int] = None) -> List[RecognitionEvent]:
+        """Return semua event baru sejak read terakhir (non-blocking)"""
+        events = []
+        write_seq = self._write_seq()
+
+        # Tertinggal lebih dari satu putaran ring -> lompat ke event tertua yang masih ada
+        if write_seq - self.last_seq > self.capacity:
+            self.lost += write_seq - self.last_seq - self.capacity
+            self.last_seq = write_seq - self.capacity
+
+        while self.last_seq < write_seq:
+            if max_events is not None and len(events) >= max_events:
+                break
+
+            expected = self.last_seq + 1
+            offset = _HEADER_SIZE + ((expected - 1) % self.capacity) * _RECORD_SIZE
+            record = bytes(self.buf[offset:offset + _RECORD_SIZE])
+            seq_after = struct.unpack_from(_SEQ_FMT, self.buf, offset)[0]
+            values = struct.unpack_from(_RECORD_FMT, record, 0)
+
+            self.last_seq = expected
+            if values[0] != expected or seq_after != expected:
+                # Slot sudah ditimpa writer saat dibaca
+                self.lost += 1
+                continue
+
+            (seq, timestamp, similarity, embedding_index, camera_index, parent_id,
+             status, x1, y1, x2, y2, nis, name) = values
+            events.append(RecognitionEvent(
+                seq=seq,
+                timestamp=timestamp,
+                similarity=similarity,
+                embedding_index=embedding_index,
+                camera_index=camera_index,
+                parent_id=parent_id,
+                status=status,
+                bbox=(x1, y1, x2, y2),
+                nis=nis.rstrip(b"\x00").decode('utf-8', errors='replace'),
+                name=name.rstrip(b"\x00").decode('utf-8', errors='replace'),
+            ))
+
+        return events
+
+    def wait(self, timeout: Optional[float] = None, poll_interval: float = 0.0005) -> List[RecognitionEvent]:
+        """Poll sampai ada event baru atau timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            events = self.read_new()
+            if events:
+                return events
+            if deadline is not None and time.time() >= deadline:
+                return []
+            time.sleep(poll_interval)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tampilkan recognition event dari shared-memory ring buffer.")
+    parser.add_argument("--name", type=str, default=DEFAULT_RING_NAME, help="Nama shared memory segment")
+    parser.add_argument("--from-start", action="store_true", help="Mulai dari event tertua di ring")
+    args = parser.parse_args()
+
+    try:
+        reader = RecognitionEventReader(args.name, from_start=args.from_start)
+    except FileNotFoundError:
+        print(f"[X] Event ring '{args.name}' tidak ditemukan.")
+        print("    Jalankan recognize mode dengan --events terlebih dahulu.")
+        sys.exit(1)
+
+    print(f"[*] Listening event ring '{args.name}' (capacity {reader.capacity}). Ctrl+C untuk keluar.\n")
+    try:
+        while True:
+            for ev in reader.wait(timeout=1.0):
+                latency_us = (time.time() - ev.timestamp) * 1e6
+                status = {STATUS_RECOGNIZED: "RECOGNIZED",
+                          STATUS_NO_DB_ENTRY: "NO_DB_ENTRY"}.get(ev.status, "UNKNOWN")
+                label = f"{ev.name} (NIS {ev.nis})" if ev.recognized else "-"
+                print(f"#{ev.seq} | {status} | {label} | sim={ev.similarity:.3f} | "
+                      f"cam={ev.camera_index} | latency={latency_us:.0f}us")
+            if reader.lost:
+                print(f"[!] {reader.lost} event terlewat (reader terlalu lambat)")
+                reader.lost = 0
+    except KeyboardInterrupt:
+        print("\n[*] Bye!")
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Face Quality Gate untuk Face Recognition System
+Sebelum ArcFace dijalankan, wajah yang hampir pasti tidak akan match di-skip:
+terlalu kecil, detection score rendah, sebagian di luar frame, menoleh jauh
+(yaw), atau blur. Wajah seperti ini hanya menghasilkan "Unknown" di log.
+
+Fitur murah dihitung vectorized dari bbox, det_score, dan 5 landmark SCRFD
+(mata kiri, mata kanan, hidung, mulut kiri, mulut kanan); sharpness
+(variance Laplacian pada crop grayscale 64x64) hanya dihitung untuk wajah yang
+lolos cek murah.
+
+Estimasi yaw: landmark diputar supaya garis mata horizontal (koreksi roll),
+lalu offset hidung dari sumbu tengah wajah dibagi setengah jarak mata:
+    yaw ~= asin(offset / (jarak_mata / 2))
+Estimasi kasar (+-10 derajat), cukup untuk membuang wajah menyamping.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+REASON_SCORE = "score"
+REASON_SIZE = "size"
+REASON_PARTIAL = "partial"
+REASON_YAW = "yaw"
+REASON_BLUR = "blur"
+
+
+def estimate_yaw(kps: np.ndarray) -> np.ndarray:
+    """Yaw (derajat, absolut) dari landmark (N, 5, 2)"""
+    kps = np.asarray(kps, dtype=np.float32).reshape(-1, 5, 2)
+    eye_l, eye_r, nose = kps[:, 0], kps[:, 1], kps[:, 2]
+    mouth_mid = (kps[:, 3] + kps[:, 4]) / 2
+
+    # Koreksi roll: putar semua titik supaya garis mata horizontal
+    d = eye_r - eye_l
+    angle = np.arctan2(d[:, 1], d[:, 0])
+    cos, sin = np.cos(-angle), np.sin(-angle)
+
+    def rot_x(p):
+        return p[:, 0] * cos - p[:, 1] * sin
+
+    eye_mid_x = (rot_x(eye_l) + rot_x(eye_r)) / 2
+    center_x = (eye_mid_x + rot_x(mouth_mid)) / 2
+    half_eye = np.maximum(np.hypot(d[:, 0], d[:, 1]) / 2, 1e-3)
+    ratio = np.clip((rot_x(nose) - center_x) / half_eye, -1.0, 1.0)
+    return np.degrees(np.abs(np.arcsin(ratio)))
+
+
+def sharpness(img: np.ndarray, bbox: np.ndarray, size: int = 64) -> float:
+    """Variance Laplacian crop wajah (di-resize ke size x size supaya tidak bergantung ukuran wajah)"""
+    h, w = img.shape[:2]
+    x1, y1 = max(0, int(bbox[0])), max(0, int(bbox[1]))
+    x2, y2 = min(w, int(bbox[2])), min(h, int(bbox[3]))
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return 0.0
+    crop = cv2.resize(img[y1:y2, x1:x2], (size, size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+class FaceQualityGate:
+    """Skip recognition untuk wajah berkualitas rendah sebelum embedding"""
+
+    def __init__(self,
+                 min_det_score: float = 0.6,
+                 min_face_size: int = 40,
+                 max_yaw: float = 50.0,
+                 min_sharpness: float = 25.0,
+                 max_outside: float = 0.25):
+        """
+        Args:
+            min_det_score: Detection score minimum (sama dengan recognize_mode)
+            min_face_size: Sisi pendek bbox minimum (pixel, koordinat frame asli)
+            max_yaw: Yaw maksimum (derajat)
+            min_sharpness: Variance Laplacian minimum pada crop 64x64 (blur)
+            max_outside: Fraksi area bbox maksimum di luar frame (wajah terpotong)
+        """
+        self.min_det_score = min_det_score
+        self.min_face_size = min_face_size
+        self.max_yaw = max_yaw
+        self.min_sharpness = min_sharpness
+        self.max_outside = max_outside
+
+        # Waktu embedding per wajah (EMA) -> estimasi waktu yang dihemat
+        self.embed_ms_per_face: Optional[float] = None
+
+        # Hasil assess terakhir (untuk PerformanceMonitor)
+        self.last_checked = 0
+        self.last_skipped: Dict[str, int] = {}
+        self.last_saved_ms = 0.0
+
+        # Stats
+        self.checked = 0
+        self.skipped: Dict[str, int] = {}
+        self.saved_ms = 0.0
+
+    def assess(self, img: np.ndarray, faces) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """
+        Returns:
+            (mask lolos (N,), alasan skip per wajah -- None jika lolos)
+        """
+        n = len(faces)
+        reasons: List[Optional[str]] = [None] * n
+        if n == 0:
+            self._record({}, 0)
+            return np.zeros(0, dtype=bool), reasons
+
+        h, w = img.shape[:2]
+        bboxes = np.array([f.bbox[:4] for f in faces], dtype=np.float32)
+        scores = np.array([float(f.det_score) for f in faces], dtype=np.float32)
+        bw = bboxes[:, 2] - bboxes[:, 0]
+        bh = bboxes[:, 3] - bboxes[:, 1]
+
+        inside_w = np.clip(np.minimum(bboxes[:, 2], w) - np.maximum(bboxes[:, 0], 0), 0, None)
+        inside_h = np.clip(np.minimum(bboxes[:, 3], h) - np.maximum(bboxes[:, 1], 0), 0, None)
+        outside = 1.0 - inside_w * inside_h / np.maximum(bw * bh, 1e-6)
+
+        has_kps = all(f.kps is not None for f in faces)
+        yaw = estimate_yaw(np.stack([f.kps for f in faces])) if has_kps else np.zeros(n, dtype=np.float32)
+
+        # Cek murah (vectorized), urutan = prioritas alasan
+        checks = (
+            (REASON_SCORE, scores < self.min_det_score),
+            (REASON_SIZE, np.minimum(bw, bh) < self.min_face_size),
+            (REASON_PARTIAL, outside > self.max_outside),
+            (REASON_YAW, yaw > self.max_yaw),
+        )
+        for reason, failed in checks:
+            for i in np.flatnonzero(failed):
+                if reasons[i] is None:
+                    reasons[i] = reason
+
+        # Sharpness hanya untuk yang lolos cek murah
+        if self.min_sharpness > 0:
+            for i in range(n):
+                if reasons[i] is None and sharpness(img, bboxes[i]) < self.min_sharpness:
+                    reasons[i] = REASON_BLUR
+
+        skipped: Dict[str, int] = {}
+        for reason in reasons:
+            if reason is not None:
+                skipped[reason] = skipped.get(reason, 0) + 1
+        self._record(skipped, n)
+        return np.array([r is None for r in reasons], dtype=bool), reasons
+
+    def filter(self, img: np.ndarray, faces) -> list:
+        """Wajah yang lolos quality gate (urutan dipertahankan)"""
+        mask, _ = self.assess(img, faces)
+        return [f for f, ok in zip(faces, mask) if ok]
+
+    def _record(self, skipped: Dict[str, int], checked: int):
+        num_skipped = sum(skipped.values())
+        self.last_checked = checked
+        self.last_skipped = skipped
+        self.last_saved_ms = num_skipped * (self.embed_ms_per_face or 0.0)
+        self.checked += checked
+        self.saved_ms += self.last_saved_ms
+        for reason, count in skipped.items():
+            self.skipped[reason] = self.skipped.get(reason, 0) + count
+
+    def record_embed(self, seconds: float, num_faces: int, alpha: float = 0.2):
+        """Update EMA waktu embedding per wajah (dipanggil setelah embed_faces)"""
+        if num_faces <= 0:
+            return
+        per_face = seconds * 1000.0 / num_faces
+        if self.embed_ms_per_face is None:
+            self.embed_ms_per_face = per_face
+        else:
+            self.embed_ms_per_face += alpha * (per_face - self.embed_ms_per_face)
+
+    @property
+    def skip_ratio(self) -> float:
+        return sum(self.skipped.values()) / self.checked if self.checked else 0.0
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Face Tracker untuk Face Recognition System
+Multi-object tracker ringan (IoU association + Kalman constant-velocity) di atas
+face.bbox, sehingga identity dibawa per track:
+
+- Embedding + matching hanya untuk track baru, track dengan confidence rendah,
+  dan re-verification periodik (bukan setiap wajah di setiap detection)
+- Frame tanpa detection menampilkan box hasil prediksi Kalman (interpolasi),
+  bukan box lama di posisi lama
+
+Hanya bergantung pada numpy (tanpa scipy/filterpy).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU antar box (x1, y1, x2, y2): a (N, 4), b (M, 4) -> (N, M)"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class KalmanBox:
+    """
+    Kalman filter constant-velocity untuk satu box
+    State: [cx, cy, w, h, vx, vy, vw, vh] (velocity dalam pixel/detik)
+    """
+
+    def __init__(self, bbox: np.ndarray, pos_std: float = 0.05, vel_std: float = 0.5, meas_std: float = 0.05):
+        """
+        Args:
+            bbox: Box awal (x1, y1, x2, y2)
+            pos_std, vel_std, meas_std: Noise relatif terhadap ukuran box
+        """
+        self.pos_std = pos_std
+        self.vel_std = vel_std
+        self.meas_std = meas_std
+
+        z = self._to_z(bbox)
+        self.x = np.concatenate([z, np.zeros(4)])
+        size = max(z[2], z[3], 1.0)
+        self.P = np.diag(np.concatenate([np.full(4, (meas_std * size) ** 2),
+                                         np.full(4, (vel_std * size) ** 2)]))
+        self.H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+    @staticmethod
+    def _to_z(bbox: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = [float(v) for v in bbox[:4]]
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    @staticmethod
+    def _to_bbox(state: np.ndarray) -> np.ndarray:
+        cx, cy, w, h = state[:4]
+        w, h = max(w, 1.0), max(h, 1.0)
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+    def _F(self, dt: float) -> np.ndarray:
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        return F
+
+    def predict(self, dt: float):
+        F = self._F(dt)
+        size = max(self.x[2], self.x[3], 1.0)
+        q_pos = (self.pos_std * size) ** 2 * max(dt, 1e-3)
+        q_vel = (self.vel_std * size) ** 2 * max(dt, 1e-3)
+        Q = np.diag(np.concatenate([np.full(4, q_pos), np.full(4, q_vel)]))
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+    def update(self, bbox: np.ndarray):
+        z = self._to_z(bbox)
+        size = max(z[2], z[3], 1.0)
+        R = np.eye(4) * (self.meas_std * size) ** 2
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+
+    def bbox(self) -> np.ndarray:
+        return self._to_bbox(self.x)
+
+    def bbox_at(self, dt: float) -> np.ndarray:
+        """Box hasil ekstrapolasi dt detik ke depan (tanpa mengubah state)"""
+        return self._to_bbox(self._F(dt) @ self.x)
+
+
+@dataclass
+class TrackedFace:
+    """Box yang digambar untuk satu track (interface sama dengan face untuk draw_results)"""
+    bbox: np.ndarray
+    det_score: float
+    track_id: int
+
+
+class Track:
+    """Satu wajah yang di-track beserta identity-nya"""
+
+    def __init__(self, track_id: int, face, now: float):
+        self.track_id = track_id
+        self.kf = KalmanBox(face.bbox)
+        self.det_score = float(face.det_score)
+        self.last_predict = now   # Waktu state Kalman terakhir di-predict
+        self.last_seen = now      # Waktu terakhir ter-asosiasi dengan detection
+        self.hits = 1
+        self.misses = 0           # Detection berturut-turut tanpa asosiasi
+
+        # Identity (diisi setelah recognition)
+        self.text: Optional[str] = None
+        self.recognized = False
+        self.similarity: Optional[float] = None
+        self.verified_at: Optional[float] = None
+
+    def predict(self, now: float):
+        self.kf.predict(now - self.last_predict)
+        self.last_predict = now
+
+    def update(self, face, now: float):
+        self.kf.update(face.bbox)
+        self.det_score = float(face.det_score)
+        self.last_seen = now
+        self.hits += 1
+        self.misses = 0
+
+    def set_identity(self, text: str, recognized: bool, similarity: float, now: float):
+        self.text = text
+        self.recognized = recognized
+        self.similarity = similarity
+        self.verified_at = now
+
+
+class FaceTracker:
+    """
+    IoU + Kalman tracker
+
+    Alur per detection:
+        pairs = tracker.update(faces)          # [(track, face)]
+        todo = [t for t, f in pairs if tracker.needs_recognition(t)]
+        ... embed + match hanya untuk todo ...
+        track.set_identity(...)
+    Frame tanpa detection:
+        results = tracker.results()           # box interpolasi
+    """
+
+    def __init__(self,
+                 threshold: float = 0.35,
+                 iou_threshold: float = 0.3,
+                 max_age: float = 1.0,
+                 reverify_interval: float = 2.0,
+                 confident_margin: float = 0.05,
+                 max_extrapolation: float = 0.5):
+        """
+        Args:
+            threshold: Similarity threshold recognition (sama dengan recognize_mode)
+            iou_threshold: IoU minimum untuk asosiasi detection -> track
+            max_age: Track dihapus jika tidak ter-update selama N detik
+            reverify_interval: Re-verification identity setiap N detik
+            confident_margin: Track dengan similarity di [threshold - margin, threshold + margin)
+                              dianggap ragu-ragu dan di-embed ulang setiap detection
+            max_extrapolation: Batas ekstrapolasi box (detik) pada frame tanpa detection
+        """
+        self.threshold = threshold
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.reverify_interval = reverify_interval
+        self.confident_margin = confident_margin
+        self.max_extrapolation = max_extrapolation
+
+        self.tracks: List[Track] = []
+        self._next_id = 1
+
+        # Info Smart Mode dari detection terakhir (untuk display)
+        self.mode_text: Optional[str] = None
+        self.num_faces = 0
+
+        # Stats
+        self.total_tracks = 0
+        self.recognitions = 0   # Track yang di-embed + match
+        self.reused = 0         # Wajah yang memakai identity track (tanpa embedding)
+
+    def update(self, faces, now: Optional[float] = None) -> List[Tuple[Track, object]]:
+        """
+        Asosiasikan detection ke track (greedy by IoU), buat track baru untuk sisanya
+
+        Returns:
+            List of (track, face) untuk semua face
+        """
+        now = time.perf_counter() if now is None else now
+
+        # Buang track yang sudah lama tidak terlihat
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+        for track in self.tracks:
+            track.predict(now)
+            track.misses += 1  # Di-reset ke 0 jika ter-asosiasi di bawah
+
+        pairs = []
+        det_boxes = np.array([f.bbox[:4] for f in faces], dtype=np.float32).reshape(-1, 4)
+        trk_boxes = np.array([t.kf.bbox() for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        ious = iou_matrix(trk_boxes, det_boxes)
+
+        matched_tracks, matched_faces = set(), set()
+        if ious.size:
+            for flat in np.argsort(-ious, axis=None):
+                ti, fi = np.unravel_index(flat, ious.shape)
+                if ious[ti, fi] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or fi in matched_faces:
+                    continue
+                matched_tracks.add(ti)
+                matched_faces.add(fi)
+                self.tracks[ti].update(faces[fi], now)
+                pairs.append((self.tracks[ti], faces[fi]))
+
+        for fi, face in enumerate(faces):
+            if fi in matched_faces:
+                continue
+            track = Track(self._next_id, face, now)
+            self._next_id += 1
+            self.total_tracks += 1
+            self.tracks.append(track)
+            pairs.append((track, face))
+
+        # Track tanpa detection kali ini (misses > 0): tidak digambar, dihapus setelah max_age
+        return pairs
+
+    def needs_recognition(self, track: Track, now: Optional[float] = None) -> bool:
+        """
+        True untuk track baru, track ragu-ragu (similarity dekat threshold), atau sudah
+        waktunya re-verification. Track Unknown yang jelas (jauh di bawah threshold) ikut
+        interval re-verification, jadi tidak di-embed dan di-log setiap detection.
+        """
+        now = time.perf_counter() if now is None else now
+        if track.text is None or track.similarity is None:
+            return True
+        if self.threshold - self.confident_margin <= track.similarity < self.threshold + self.confident_margin:
+            return True
+        return now - track.verified_at >= self.reverify_interval
+
+    def results(self, now: Optional[float] = None) -> Optional[list]:
+        """
+        Hasil untuk draw_results: track yang sudah punya identity, box diinterpolasi ke `now`
+
+        Returns:
+            List of (TrackedFace, text, recognized) -- item pertama berisi juga (mode_text, num_faces);
+            None jika tidak ada track ber-identity
+        """
+        now = time.perf_counter() if now is None else now
+        results = []
+        for track in self.tracks:
+            if track.text is None or track.misses > 0:
+                continue
+            dt = min(max(now - track.last_predict, 0.0), self.max_extrapolation)
+            results.append((TrackedFace(track.kf.bbox_at(dt), track.det_score, track.track_id),
+                            track.text, track.recognized))
+        if not results:
+            return None
+        if self.mode_text:
+            first = results[0]
+            results[0] = (first[0], first[1], first[2], self.mode_text, self.num_faces)
+        return results
+
+    def reset(self):
+        self.tracks = []
@@ -4,17 +4,55 @@ import json
 import time
 import argparse
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 # InsightFace
 from insightface.app import FaceAnalysis
+from insightface.app.common import Face
+from insightface.utils import face_align
 
 # Logger
 from logger import get_logger
 
+# Threaded capture
+from camera_grabber import LatestFrameGrabber
+
+# Adaptive frame skipping
+from frame_scheduler import AdaptiveScheduler, FixedIntervalScheduler
+
+# Face tracking
+from face_tracker import FaceTracker
+
+# Selective module loading
+from model_loader import build_selected_face_app
+
+# Motion gate + standby
+from motion_gate import MotionGate, StandbyController
+
+# ROI re-detection
+from roi_detector import RoiDetector, supports_dynamic_input
+
+# Batched alignment + ArcFace
+from batch_embedder import BatchEmbedder
+
+# Pre-embedding face quality gate
+from face_quality import FaceQualityGate
+
+# Low-memory mode (arena off, mmap gallery, memory breakdown)
+from low_memory import (LOW_MEMORY_MODULES, trim_heap, rss_mb, load_gallery_mmap, mark_normalized,
+                        clear_normalized, component_memory)
+
+# Shared-memory recognition events
+from event_ring import (
+    RecognitionEventWriter,
+    STATUS_RECOGNIZED,
+    STATUS_UNKNOWN,
+    STATUS_NO_DB_ENTRY,
+)
+
 # Performance Monitor
 try:
     from performance_monitor import PerformanceMonitor
@@ -54,20 +92,41 @@ class FaceDB:
     db_dir: str
     emb_path: str
 
-    def __init__(self, db_dir: str = "face_db"):
+    def __init__(self, db_dir: str = "face_db", mmap: bool = False):
+        """
+        Args:
+            db_dir: Folder gallery
+            mmap: load() mengembalikan memmap read-only (low-memory mode), bukan salinan di heap
+        """
         self.db_dir = db_dir
+        self.mmap = mmap
         ensure_dir(db_dir)
         self.emb_path = os.path.join(db_dir, "embeddings.npy")
 
-    def load(self) -> np.ndarray:
+    def gallery_path(self, model_name: Optional[str] = None) -> str:
+        """
+        Path gallery: embeddings.npy untuk model utama (index = embedding_index di
+        students.db), embeddings_<model>.npy untuk model lain (misal tier cepat
+        ModelCascade) dengan urutan baris yang sama
+        """
+        if model_name is None:
+            return self.emb_path
+        return os.path.join(self.db_dir, f"embeddings_{model_name}.npy")
+
+    def load(self, model_name: Optional[str] = None) -> np.ndarray:
         """Load embeddings only (no labels)"""
-        if os.path.exists(self.emb_path):
+        emb_path = self.gallery_path(model_name)
+        if os.path.exists(emb_path):
             try:
-                embs = np.load(self.emb_path).astype(np.float32)
+                if self.mmap:
+                    embs = load_gallery_mmap(emb_path)
+                    if embs is not None and len(embs) > 0:
+                        return embs
+                embs = np.load(emb_path).astype(np.float32)
                 
                 # Check if load failed
                 if embs is None or len(embs) == 0:
-                    print(f"Warning: No embeddings in {self.emb_path}")
+                    print(f"Warning: No embeddings in {emb_path}")
                     return np.zeros((0, 512), dtype=np.float32)
                 
                 # Normalize for cosine search
@@ -79,14 +138,21 @@ class FaceDB:
         else:
             return np.zeros((0, 512), dtype=np.float32)
 
-    def add(self, emb: np.ndarray) -> int:
-        """
-        Add embedding and return its index
-        
-        Returns:
-            index: Index of the added embedding
-        """
-        embs = self.load()
+    def gallery_size(self, model_name: Optional[str] = None) -> int:
+        """Jumlah embedding di gallery (tanpa normalisasi / load penuh)"""
+        emb_path = self.gallery_path(model_name)
+        if not os.path.exists(emb_path):
+            return 0
+        try:
+            return int(np.load(emb_path, mmap_mode='r').shape[0])
+        except Exception:
+            return 0
+
+    def in_sync(self, model_name: str) -> bool:
+        """Gallery model_name punya baris untuk setiap embedding_index gallery utama"""
+        return self.gallery_size(model_name) == self.gallery_size()
+
+    def _append(self, emb_path: str, embs: np.ndarray, emb: np.ndarray) -> int:
         emb = l2_normalize(emb.astype(np.float32))
         
         # Append new embedding
@@ -100,8 +166,45 @@ class FaceDB:
             new_embs = np.vstack([embs, emb.reshape(1, -1)])
             index = len(embs)  # New index
         
-        # Save
-        np.save(self.emb_path, new_embs)
+        # Save (file baru lalu rename: memmap gallery yang masih dibuka tetap valid di POSIX)
+        tmp_path = f"{emb_path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, new_embs)
+        clear_normalized(emb_path)  # Crash di antara replace dan mark -> tanpa marker, bukan marker basi
+        os.replace(tmp_path, emb_path)
+        mark_normalized(emb_path)
+        
+        return index
+
+    def _load_for_write(self, model_name: Optional[str] = None) -> np.ndarray:
+        """load() sebagai salinan di heap: di Windows os.replace gagal selama file masih di-memmap"""
+        embs = self.load(model_name)
+        if isinstance(embs, np.memmap):
+            embs = np.array(embs)  # Salinan; memmap dilepas saat reference terakhir hilang
+        return embs
+
+    def add(self, emb: np.ndarray, extra: Optional[Dict[str, np.ndarray]] = None) -> int:
+        """
+        Add embedding and return its index
+        
+        Args:
+            emb: Embedding model utama
+            extra: Embedding orang yang sama dari model lain {model_name: emb}; disimpan
+                   di index yang sama (gallery yang sudah tidak sinkron dilewati)
+        
+        Returns:
+            index: Index of the added embedding
+        """
+        embs = self._load_for_write()
+        synced = {name: e for name, e in (extra or {}).items()
+                  if self.gallery_size(name) == len(embs)}
+        for name in (extra or {}):
+            if name not in synced:
+                print(f"[!] Gallery {name} tidak sinkron ({self.gallery_size(name)} vs {len(embs)}), "
+                      f"dilewati. Rebuild: python model_cascade.py --fast-model {name} --rebuild")
+        
+        index = self._append(self.emb_path, embs, emb)
+        for name, e in synced.items():
+            self._append(self.gallery_path(name), self._load_for_write(name), e)
         
         return index
 
@@ -111,7 +214,19 @@ class FaceDB:
 # InsightFace App
 # =========================
 
-def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: str = "cpu", model_root: str = None) -> FaceAnalysis:
+def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: str = "cpu", model_root: str = None,
+                   modules="recognize",
+                   intra_op_threads: int = 0,
+                   inter_op_threads: int = 0,
+                   execution_mode: str = "sequential",
+                   graph_opt_level: str = "all",
+                   model_cache: bool = True,
+                   precision: str = "fp32",
+                   backend="ort",
+                   ort_spinning: bool = True,
+                   low_memory: bool = False,
+                   verbose: bool = True,
+                   progress=None) -> FaceAnalysis:
     """
     Load InsightFace model dari folder lokal project.
     
@@ -121,6 +236,24 @@ def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: s
         device: "cpu" atau "cuda"
         model_root: path ke folder root. Jika None, akan gunakan direktori script
                    (InsightFace akan otomatis menambahkan subfolder 'models')
+        modules: module yang di-load (lihat model_loader.py): preset "recognize"
+                 (detection + recognition, default), "enroll", "full", atau list/CSV nama module
+        intra_op_threads: ORT thread per operator (0 = default ORT)
+        inter_op_threads: ORT thread antar operator, untuk execution_mode "parallel" (0 = default ORT)
+        execution_mode: "sequential" atau "parallel"
+        graph_opt_level: "disable", "basic", "extended", atau "all"
+        model_cache: simpan graph hasil optimasi ORT di models/.ort_cache; start berikutnya
+                     load langsung tanpa optimasi ulang (lihat ort_session.py)
+        precision: "fp32" (default) atau "int8" -> load models/<model_name>_int8
+                   (hasil quantize_models.py)
+        backend: "ort" (default), "opencv" (OpenCV DNN), "auto" (hasil bench_backends.py --save
+                 untuk host ini), atau dict per module {"detection": ..., "recognition": ...}
+                 (lihat inference_backend.py)
+        ort_spinning: False = thread ORT tidak busy-wait antar run (lihat thread_budget.py)
+        low_memory: hanya detection + recognition, arena ORT off, heap di-trim setelah
+                    load (lihat low_memory.py)
+        verbose: False = tanpa log per model (load di background, lihat model_preload.py)
+        progress: callback(stage: str) sebelum setiap model di-load
     
     Returns:
         FaceAnalysis app yang sudah di-prepare
@@ -137,6 +270,11 @@ def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: s
             # Running from Python script
             model_root = os.path.dirname(os.path.abspath(__file__))
     
+    if precision not in ("fp32", "int8"):
+        raise ValueError(f"precision tidak dikenal: {precision}. Pilihan: fp32, int8")
+    if precision == "int8":
+        model_name = f"{model_name}_int8"  # Dibuat oleh quantize_models.py
+    
     # InsightFace akan cari di: model_root/models/model_name
     expected_model_path = os.path.join(model_root, "models", model_name)
     
@@ -154,9 +292,11 @@ def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: s
             f"Pastikan folder 'models/{model_name}' ada dan berisi file .onnx\n"
             f"Model root: {model_root}\n"
             f"Coba copy folder 'models' ke: {model_root}"
+            + ("\nModel INT8 dibuat dengan: python quantize_models.py" if precision == "int8" else "")
         )
     
-    print(f"Loading model dari: {expected_model_path}")
+    if verbose:
+        print(f"Loading model dari: {expected_model_path}")
     
     # Setup providers
     providers = None
@@ -166,11 +306,39 @@ def build_face_app(model_name: str = "buffalo_l", det_size: int = 640, device: s
     else:
         providers = ["CPUExecutionProvider"]
 
-    # Load model dari folder lokal
-    # root parameter akan membuat InsightFace cari di <root>/models/<name>
-    app = FaceAnalysis(name=model_name, root=model_root, providers=providers)
-    app.prepare(ctx_id=0 if device.lower() == "cuda" else -1,
-                det_size=(det_size, det_size))
+    session_options = {"intra_op_threads": intra_op_threads,
+                       "inter_op_threads": inter_op_threads,
+                       "execution_mode": execution_mode,
+                       "graph_opt_level": graph_opt_level,
+                       "allow_spinning": ort_spinning,
+                       "low_memory": low_memory}
+    cache_dir = os.path.join(model_root, "models", ".ort_cache") if model_cache else None
+
+    from inference_backend import resolve_backends, CHOICE_FILE
+    backends = resolve_backends(backend, model_name, os.path.join(model_root, "models", CHOICE_FILE))
+    if device.lower() == "cuda" and "opencv" in backends.values():
+        print("[!] Backend opencv hanya CPU; device cuda memakai ort untuk semua module")
+        backends = {task: "ort" for task in backends}
+    if "opencv" in backends.values():
+        print("[*] Backend: " + ", ".join(f"{task}={name}" for task, name in backends.items()))
+
+    if low_memory and modules != LOW_MEMORY_MODULES:
+        print(f"[!] Low-memory mode: module {modules} -> {LOW_MEMORY_MODULES} (detection + recognition)")
+        modules = LOW_MEMORY_MODULES
+
+    # Load hanya module terpilih (session ONNX module lain tidak pernah dibuat)
+    app = build_selected_face_app(expected_model_path, modules=modules, providers=providers,
+                                  session_options=session_options, cache_dir=cache_dir,
+                                  backends=backends, verbose=verbose, progress=progress)
+    app.backends = backends
+    # ctx_id=0 juga untuk CPU: providers sudah eksplisit, sedangkan ctx_id=-1 membuat setiap
+    # model memanggil session.set_providers (session dibuat & dioptimasi ulang)
+    app.prepare(ctx_id=0, det_size=(det_size, det_size))
+    if low_memory:
+        # Graph protobuf & buffer optimasi sudah di-free, tapi masih dipegang allocator
+        trim_heap()
+        total = sum(app.load_report.get('memory_mb', {}).values())
+        print(f"[*] Low-memory mode: arena ORT off | model {total:.0f} MB | RSS {rss_mb():.0f} MB")
     return app
 
 def pick_largest_face(faces) -> Optional[object]:
@@ -188,12 +356,20 @@ def pick_largest_face(faces) -> Optional[object]:
 # Camera Loop
 # =========================
 
-def open_camera(cam_index: int, width: int, height: int) -> cv2.VideoCapture:
+def open_camera(cam_index: int, width: int, height: int, threaded: bool = False):
+    """
+    Buka kamera.
+    
+    Args:
+        threaded: True = bungkus dengan LatestFrameGrabber (capture thread, selalu frame terbaru)
+    """
     cap = cv2.VideoCapture(cam_index)
     if not cap.isOpened():
         raise RuntimeError(f"Camera {cam_index} cannot be opened.")
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if threaded:
+        return LatestFrameGrabber(cap)
     return cap
 
 def draw_box_and_text(img, face, text: str):
@@ -233,6 +409,366 @@ def draw_box_and_text(img, face, text: str):
     cv2.putText(img, text, (x1, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2, cv2.LINE_AA)
 
 
+# =========================
+# Recognition Helpers
+# =========================
+
+def select_faces_smart(faces) -> Tuple[list, str]:
+    """
+    SMART MODE: pilih wajah yang akan di-recognize (adaptive)
+    - 1 face: Process 1 (fastest)
+    - 2-3 faces: Process all (useful for parent+child)
+    - 4+ faces: Process top 3 only (performance balance)
+    
+    Returns:
+        (faces_to_process, mode_text)
+    """
+    num_faces = len(faces)
+    
+    if num_faces == 1:
+        # Single face: Process immediately (fastest path)
+        return faces, "FAST"
+    elif num_faces <= 3:
+        # 2-3 faces: Process all (parent+child scenario)
+        return faces, "ALL"
+    
+    # 4+ faces: Process top 3 largest (performance balance)
+    # Sort by face area (largest first)
+    faces_sorted = sorted(faces, 
+                          key=lambda f: (f.bbox[2]-f.bbox[0])*(f.bbox[3]-f.bbox[1]), 
+                          reverse=True)
+    return faces_sorted[:3], "TOP3"
+
+
+def recognize_faces(faces,
+                    embs: np.ndarray,
+                    student_db,
+                    threshold: float = 0.35,
+                    min_det_score: float = 0.6,
+                    cam_index: int = 0,
+                    event_writer=None,
+                    log_results: bool = True,
+                    stage_times: Optional[dict] = None,
+                    similarities: Optional[list] = None) -> list:
+    """
+    Matching + lookup untuk hasil app.get (path yang sama dipakai recognize_mode dan benchmark).
+    
+    Args:
+        faces: Hasil app.get(frame)
+        embs: Gallery embeddings (N, 512), sudah L2 normalized
+        student_db: StudentDatabase untuk lookup embedding index -> parent
+        threshold: Cosine similarity threshold untuk 'known'
+        min_det_score: Minimum detection score
+        cam_index: Index kamera (untuk log & event)
+        event_writer: RecognitionEventWriter (optional)
+        log_results: Tulis hasil ke recognition.log
+        stage_times: Dict optional; waktu 'match' dan 'lookup' (detik) akan diakumulasi di sini
+        similarities: List optional; best similarity setiap hasil di-append (urutan sama dengan hasil)
+    
+    Returns:
+        List of (face, text, recognized) -- item pertama berisi juga (mode_text, num_faces)
+    """
+    recognized_faces = []
+    
+    if not faces:
+        return recognized_faces
+    
+    num_faces = len(faces)
+    faces_to_process, mode_text = select_faces_smart(faces)
+    
+    # Process selected faces
+    for face in faces_to_process:
+        if float(face.det_score) < min_det_score:
+            continue
+        if face.embedding is None:
+            continue  # Di-skip FaceQualityGate (tidak di-embed)
+        
+        match_start = time.perf_counter()
+        cascade_match = getattr(face, "match", None)
+        if cascade_match is not None:
+            # ModelCascade: sudah di-match ke gallery tier yang menghasilkan embedding
+            best_idx, best_sim = cascade_match
+        else:
+            emb = face.normed_embedding.astype(np.float32)
+            emb = l2_normalize(emb)
+
+            # cosine similarity: embs already normalized
+            sims = embs @ emb  # (N,)
+            best_idx = int(np.argmax(sims))
+            best_sim = float(sims[best_idx])
+        if stage_times is not None:
+            stage_times['match'] = stage_times.get('match', 0.0) + time.perf_counter() - match_start
+        if similarities is not None:
+            similarities.append(best_sim)
+
+        if best_sim >= threshold:
+            # Lookup database by embedding index
+            lookup_start = time.perf_counter()
+            parent = student_db.get_parent_by_index(best_idx)
+            if stage_times is not None:
+                stage_times['lookup'] = stage_times.get('lookup', 0.0) + time.perf_counter() - lookup_start
+            
+            if parent:
+                # Format: "Ortu: [Nama] | Anak: [Nama] ([Kelas])"
+                name = f"Ortu: {parent['nama_ortu']} | Anak: {parent['nama_anak']} ({parent['kelas']})"
+                recognized_faces.append((face, f"{name} | sim={best_sim:.2f}", True))
+                if log_results:
+                    logger.log_recognition(parent['nama_ortu'], best_sim, cam_index, threshold)
+                if event_writer is not None:
+                    event_writer.publish(best_sim, STATUS_RECOGNIZED, best_idx, cam_index,
+                                         parent=parent, bbox=face.bbox)
+            else:
+                # Index found but no database entry (data mismatch)
+                name = f"Index:{best_idx} (No DB entry)"
+                recognized_faces.append((face, f"{name} | sim={best_sim:.2f}", False))
+                if log_results:
+                    logger.log_recognition(None, best_sim, cam_index, threshold)
+                if event_writer is not None:
+                    event_writer.publish(best_sim, STATUS_NO_DB_ENTRY, best_idx, cam_index,
+                                         bbox=face.bbox)
+        else:
+            recognized_faces.append((face, f"Unknown | sim={best_sim:.2f}", False))
+            if log_results:
+                logger.log_recognition(None, best_sim, cam_index, threshold)
+            if event_writer is not None:
+                event_writer.publish(best_sim, STATUS_UNKNOWN, best_idx, cam_index,
+                                     bbox=face.bbox)
+    
+    # Store mode info for display
+    if recognized_faces:
+        # Add mode info to first face for display
+        face_info = recognized_faces[0]
+        recognized_faces[0] = (face_info[0], face_info[1], face_info[2], mode_text, num_faces)
+    
+    return recognized_faces
+
+
+def detect_faces(app, img: np.ndarray, max_num: int = 0, detect_width: Optional[int] = None,
+                 roi_detector: Optional[RoiDetector] = None) -> list:
+    """
+    Detection (+ landmark/attribute) tanpa recognition; embedding diisi oleh embed_faces.
+    Sama seperti FaceAnalysis.get tapi ArcFace tidak dijalankan per wajah.
+    
+    detect_width: jika frame lebih lebar, detection dijalankan pada salinan yang
+    di-downscale ke lebar ini; bbox & kps dikembalikan ke koordinat frame asli,
+    sehingga alignment/embedding (embed_faces) tetap memakai crop resolusi penuh.
+    
+    roi_detector: detection hanya di sekitar wajah sebelumnya (full sweep sesuai
+    jadwal RoiDetector); mode & waktu detection tersimpan di roi_detector.last_mode/last_time.
+    
+    App tanpa det_model (misal FakeFaceAnalysis) -> fallback ke app.get (embedding sudah terisi).
+    """
+    if not hasattr(app, "det_model"):
+        return app.get(img, max_num=max_num)
+    
+    scale = 1.0
+    if detect_width and img.shape[1] > detect_width:
+        scale = detect_width / img.shape[1]
+    
+    det_start = time.perf_counter()
+    rois = roi_detector.plan(img.shape, det_start) if roi_detector is not None else None
+    if rois is not None:
+        # ROI crop diambil dari frame asli; input_size crop sudah memperhitungkan scale
+        max_input = max(app.det_model.input_size or (640, 640))
+        bboxes, kpss = roi_detector.detect_rois(app.det_model, img, rois, scale=scale, max_input=max_input)
+        if max_num > 0 and bboxes.shape[0] > max_num:
+            order = np.argsort(-bboxes[:, 4])[:max_num]
+            bboxes = bboxes[order]
+            kpss = kpss[order] if kpss is not None else None
+    else:
+        det_img = img
+        if scale != 1.0:
+            det_img = cv2.resize(img, (detect_width, max(1, int(round(img.shape[0] * scale)))),
+                                 interpolation=cv2.INTER_AREA)
+        bboxes, kpss = app.det_model.detect(det_img, max_num=max_num, metric='default')
+        if scale != 1.0:
+            bboxes[:, 0:4] /= scale
+            if kpss is not None:
+                kpss = kpss / scale
+    if roi_detector is not None:
+        roi_detector.record(RoiDetector.MODE_FULL if rois is None else RoiDetector.MODE_ROI,
+                            bboxes, time.perf_counter() - det_start)
+    faces = []
+    for i in range(bboxes.shape[0]):
+        face = Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None,
+                    det_score=bboxes[i, 4])
+        for taskname, model in app.models.items():
+            if taskname in ('detection', 'recognition'):
+                continue
+            model.get(img, face)
+        faces.append(face)
+    return faces
+
+
+def embed_faces(app, items: List[Tuple[np.ndarray, object]]) -> None:
+    """
+    Batch recognition: satu forward ArcFace untuk semua crop (boleh dari frame/kamera berbeda).
+    
+    Memakai BatchEmbedder (buffer crop/input/output dipakai ulang + IOBinding) yang
+    di-cache per model recognition; tidak thread-safe, panggil dari satu thread per app.
+    
+    Args:
+        items: List of (img, face); face.embedding diisi in-place.
+               Face yang embedding-nya sudah ada (hasil fallback app.get) di-skip.
+    """
+    embed_with_model(getattr(app, "models", {}).get('recognition'), items)
+
+
+def embed_with_model(rec_model, items: List[Tuple[np.ndarray, object]]) -> None:
+    """embed_faces untuk model recognition tertentu (misal tier cepat ModelCascade)"""
+    pending = [(img, face) for img, face in items if face.embedding is None]
+    if rec_model is None or not pending:
+        return
+    
+    if hasattr(rec_model, "session"):
+        embedder = getattr(rec_model, "batch_embedder", None)
+        if embedder is None:
+            embedder = rec_model.batch_embedder = BatchEmbedder(rec_model)
+        embedder.embed_faces(pending)
+        return
+    
+    crops = [face_align.norm_crop(img, landmark=face.kps, image_size=rec_model.input_size[0])
+             for img, face in pending]
+    feats = rec_model.get_feat(crops)
+    for (_, face), feat in zip(pending, feats):
+        face.embedding = feat.flatten()
+
+
+def embed_gated(app, img: np.ndarray, faces: list,
+                quality_gate: Optional[FaceQualityGate] = None,
+                cascade=None) -> None:
+    """
+    embed_faces untuk wajah satu frame setelah FaceQualityGate: wajah yang gagal
+    tidak di-embed (face.embedding tetap None, di-skip recognize_faces)
+    
+    cascade: ModelCascade (lihat model_cascade.py); embedding + matching dua tier,
+    hasil matching di face.match
+    """
+    if quality_gate is not None:
+        kept = quality_gate.filter(img, faces)
+        kept_ids = {id(face) for face in kept}
+        for face in faces:
+            if id(face) not in kept_ids:
+                # Fallback app.get sudah mengisi embedding: buang supaya tidak di-match
+                face.embedding = None
+        faces = kept
+    embed_start = time.perf_counter()
+    if cascade is not None:
+        cascade.process(img, faces)
+    else:
+        embed_faces(app, [(img, face) for face in faces])
+    if quality_gate is not None:
+        quality_gate.record_embed(time.perf_counter() - embed_start, len(faces))
+
+
+def detect_and_embed(app, img: np.ndarray, max_num: int = 0, detect_width: Optional[int] = None,
+                     roi_detector: Optional[RoiDetector] = None,
+                     quality_gate: Optional[FaceQualityGate] = None,
+                     cascade=None) -> list:
+    """
+    Pengganti app.get untuk pipeline recognize: detect_faces + satu batch ArcFace
+    untuk semua wajah di frame (face.embedding / normed_embedding sama dengan app.get)
+    
+    quality_gate: wajah yang gagal quality gate tetap dikembalikan, tapi tanpa embedding
+    cascade: ModelCascade; embedding tier cepat dulu, model utama hanya untuk match ragu-ragu
+    """
+    faces = detect_faces(app, img, max_num=max_num, detect_width=detect_width, roi_detector=roi_detector)
+    embed_gated(app, img, faces, quality_gate, cascade)
+    return faces
+
+
+def recognize_tracked(app, frame: np.ndarray, faces, tracker: FaceTracker,
+                      embs: np.ndarray,
+                      student_db,
+                      threshold: float = 0.35,
+                      min_det_score: float = 0.6,
+                      cam_index: int = 0,
+                      event_writer=None,
+                      quality_gate: Optional[FaceQualityGate] = None,
+                      cascade=None) -> Optional[list]:
+    """
+    Recognition dengan tracking: embedding + matching hanya untuk track baru,
+    low-confidence, atau yang perlu re-verification; track lain memakai identity lama.
+    
+    Args:
+        faces: Hasil detect_faces(app, frame) (embedding belum diisi)
+        tracker: FaceTracker (state dibawa antar frame)
+        quality_gate: FaceQualityGate; track yang wajahnya gagal tidak di-embed di frame ini
+                      (dicoba lagi di detection berikutnya, identity lama tetap dipakai)
+        cascade: ModelCascade untuk embedding + matching track yang perlu recognition
+    
+    Returns:
+        Hasil untuk draw_results (lihat FaceTracker.results)
+    """
+    now = time.perf_counter()
+    pairs = tracker.update(faces, now)
+    
+    # Smart Mode tetap berlaku: hanya wajah terpilih yang di-recognize
+    selected, mode_text = select_faces_smart(faces) if faces else ([], None)
+    selected_ids = {id(f) for f in selected if float(f.det_score) >= min_det_score}
+    tracker.mode_text = mode_text
+    tracker.num_faces = len(faces)
+    
+    todo = []
+    for track, face in pairs:
+        if id(face) not in selected_ids:
+            continue
+        if tracker.needs_recognition(track, now):
+            todo.append((track, face))
+        else:
+            tracker.reused += 1
+    
+    # Satu batch ArcFace untuk semua track yang perlu recognition (dan lolos quality gate)
+    embed_gated(app, frame, [face for _, face in todo], quality_gate, cascade)
+    for track, face in todo:
+        sims = []
+        results = recognize_faces([face], embs, student_db,
+                                  threshold=threshold,
+                                  min_det_score=min_det_score,
+                                  cam_index=cam_index,
+                                  event_writer=event_writer,
+                                  similarities=sims)
+        if results:
+            track.set_identity(results[0][1], results[0][2], sims[0], now)
+            tracker.recognitions += 1
+    
+    return tracker.results(now)
+
+
+def draw_results(disp, results) -> None:
+    """Draw semua hasil recognize_faces + Smart Mode indicator ke frame"""
+    if results is not None and len(results) > 0:
+        # Extract mode info if available (from first face)
+        mode_text = None
+        total_detected = None
+        
+        for idx, face_data in enumerate(results):
+            # Handle both old format (3 items) and new format (5 items)
+            if len(face_data) == 5:
+                face, text, _, mode, total = face_data
+                if idx == 0:  # Only get mode from first face
+                    mode_text = mode
+                    total_detected = total
+            else:
+                face, text, _ = face_data
+            
+            draw_box_and_text(disp, face, text)
+        
+        # Add Smart Mode indicator
+        if mode_text and total_detected:
+            mode_display = f"Mode: {mode_text} ({len(results)}/{total_detected})"
+            cv2.putText(disp, mode_display, (disp.shape[1] - 250, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
+        else:
+            # Fallback: just show count
+            face_count_text = f"Faces: {len(results)}"
+            cv2.putText(disp, face_count_text, (disp.shape[1] - 150, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2, cv2.LINE_AA)
+    else:
+        cv2.putText(disp, "No face / low confidence", (20, 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+
+
 # =========================
 # Modes
 # =========================
@@ -245,9 +781,13 @@ def enroll_mode(app: FaceAnalysis,
                 height: int = 720,
                 samples: int = 10,
                 min_det_score: float = 0.6,
-                save_snapshots: bool = True):
+                save_snapshots: bool = True,
+                threaded_capture: bool = True,
+                cascade=None):
     """
     Ambil beberapa sample embedding lalu rata-ratakan -> satu embedding per orang (lebih stabil).
+    cascade: ModelCascade; embedding tier cepat ikut disimpan di index yang sama
+    (gallery embeddings_<fast_model>.npy tetap sinkron).
     Tekan:
       - 'c' capture sample
       - 'q' quit
@@ -256,8 +796,9 @@ def enroll_mode(app: FaceAnalysis,
     if save_snapshots:
         ensure_dir(snap_dir)
 
-    cap = open_camera(cam_index, width, height)
+    cap = open_camera(cam_index, width, height, threaded=threaded_capture)
     collected = []
+    collected_fast = []
 
     print("\n[ENROLL]")
     print("Arahkan wajah ke kamera. Tekan 'c' untuk capture sample.")
@@ -289,6 +830,8 @@ def enroll_mode(app: FaceAnalysis,
 
             emb = face.normed_embedding  # biasanya sudah L2 normalized
             collected.append(emb.astype(np.float32))
+            if cascade is not None:
+                collected_fast.append(l2_normalize(cascade.embed_fast(frame, face).astype(np.float32)))
 
             if save_snapshots:
                 fn = os.path.join(snap_dir, f"{now_str()}_{len(collected)}.jpg")
@@ -316,8 +859,12 @@ def enroll_mode(app: FaceAnalysis,
     avg_emb = l2_normalize(avg_emb)
 
 
+    extra = None
+    if collected_fast:
+        extra = {cascade.fast_model: l2_normalize(np.mean(np.stack(collected_fast, axis=0), axis=0))}
+
     # Add to FaceDB and get index
-    index = db.add(avg_emb)
+    index = db.add(avg_emb, extra=extra)
     logger.log_enrollment(name, len(collected), success=True, camera_index=cam_index)
     print(f"\n✅ Enroll selesai. '{name}' ditambahkan ke database ({db.db_dir}).")
     print(f"   Embedding index: {index}")
@@ -333,16 +880,87 @@ def recognize_mode(app: FaceAnalysis,
                    height: int = 720,
                    threshold: float = 0.35,
                    min_det_score: float = 0.6,
-                   show_performance: bool = True):
+                   show_performance: bool = True,
+                   event_writer=None,
+                   capture=None,
+                   student_db=None,
+                   display: bool = True,
+                   max_frames: Optional[int] = None,
+                   threaded_capture: bool = True,
+                   pipelined: bool = False,
+                   inference_pool=None,
+                   target_latency_ms: Optional[float] = None,
+                   frame_scheduler=None,
+                   tracking: bool = False,
+                   motion_gating: bool = False,
+                   standby_after: Optional[float] = None,
+                   detect_width: Optional[int] = None,
+                   roi_detection: bool = False,
+                   full_sweep_interval: float = 1.0,
+                   quality_gate: bool = False,
+                   cascade=None):
     """
     Real-time recognition:
     - ambil embedding wajah terbesar
     - hitung cosine similarity ke semua embedding di DB
     - jika sim >= threshold => dikenal
     - lookup database untuk get student info
+    - jika event_writer diberikan (RecognitionEventWriter), setiap hasil juga
+      di-publish ke shared-memory ring buffer untuk consumer di proses lain
     Catatan:
     - threshold perlu dikalibrasi (0.3 - 0.5 tergantung model & kondisi).
+    
+    Untuk load test / headless:
+    - capture: frame source dengan interface cv2.VideoCapture (read/release),
+      misal SyntheticCamera. Default: open_camera(cam_index, width, height)
+    - student_db: StudentDatabase instance (default: "students.db")
+    - display: False = tanpa cv2.imshow/waitKey (dan tanpa overlay)
+    - max_frames: berhenti setelah N frame (None = sampai 'q' / frame habis)
+    - threaded_capture: capture thread latest-frame (LatestFrameGrabber) supaya
+      frame yang diproses selalu yang terbaru; frame yang di-drop tercatat di stats
+    - pipelined: jalankan capture/detect/match/render sebagai stage terpisah
+      (lihat pipeline.py); detection frame N+1 overlap dengan matching & drawing frame N
+    - inference_pool: InferencePool yang sudah di-start (lihat inference_pool.py);
+      setiap frame dikirim ke worker process (jika ada slot kosong) dan hasil terbaru
+      dipakai, menggantikan app.get di proses ini
+    - target_latency_ms: target latency wajah muncul -> hasil tampil; AdaptiveScheduler
+      memilih kapan app.get dijalankan dari target ini, inference time terukur, dan ada/tidaknya
+      wajah (lihat frame_scheduler.py). None = detection setiap 3 frame
+    - frame_scheduler: scheduler custom, e.g. FixedIntervalScheduler(every=1) (override
+      target_latency_ms)
+    - tracking: FaceTracker (IoU + Kalman) membawa identity per track; embedding hanya
+      untuk track baru / low-confidence / re-verification, dan box di frame tanpa
+      detection diinterpolasi (lihat face_tracker.py)
+    - motion_gating: MotionGate pada frame grayscale kecil; detection di-skip jika tidak ada
+      motion dan tidak ada wajah (lihat motion_gate.py)
+    - standby_after: detik tanpa motion/wajah sebelum kamera masuk standby (resolusi & FPS
+      rendah); bangun dan langsung detection pada frame motion pertama. None = tanpa standby
+    - detect_width: detection pada salinan frame yang di-downscale ke lebar ini, alignment &
+      embedding dari frame asli (capture resolusi tinggi tanpa detection lebih lambat).
+      None = detection pada frame penuh
+    - roi_detection: setelah wajah ditemukan, detection hanya pada crop di sekitar wajah
+      sebelumnya (input_size kecil); full-frame sweep setiap full_sweep_interval detik untuk
+      wajah baru (lihat roi_detector.py)
+    - quality_gate: wajah kecil, blur, menyamping (yaw), terpotong, atau det_score rendah
+      tidak di-embed sama sekali (lihat face_quality.py); jumlah skip & estimasi waktu
+      yang dihemat masuk performance stats
+    - cascade: ModelCascade (lihat model_cascade.py); embedding pack kecil dulu, recognizer
+      model utama hanya jika similarity/margin di band ragu-ragu. Escalation rate & latency
+      yang dihemat masuk performance stats. Nonaktif otomatis jika gallery tidak sinkron
+    
+    Returns:
+        Dict performance stats (jika PerformanceMonitor tersedia)
     """
+    if pipelined:
+        from pipeline import run_pipelined_recognition
+        return run_pipelined_recognition(app, db,
+                                         cam_index=cam_index, width=width, height=height,
+                                         threshold=threshold, min_det_score=min_det_score,
+                                         show_performance=show_performance,
+                                         event_writer=event_writer, capture=capture,
+                                         student_db=student_db, display=display,
+                                         max_frames=max_frames)
+    
     embs = db.load()
     
     # Check if database is empty or invalid
@@ -351,10 +969,12 @@ def recognize_mode(app: FaceAnalysis,
         return
     
     # Load student database
-    from student_database import StudentDatabase
-    student_db = StudentDatabase("students.db")
+    if student_db is None:
+        from student_database import StudentDatabase
+        student_db = StudentDatabase("students.db")
 
-    cap = open_camera(cam_index, width, height)
+    cap = capture if capture is not None else open_camera(cam_index, width, height,
+                                                          threaded=threaded_capture)
     print("\n[RECOGNIZE]")
     print("Tekan 'q' untuk keluar.")
     if show_performance and PERF_MONITOR_AVAILABLE:
@@ -364,7 +984,10 @@ def recognize_mode(app: FaceAnalysis,
 
     # Initialize performance monitor
     perf_monitor = PerformanceMonitor() if PERF_MONITOR_AVAILABLE else None
-    show_perf_overlay = show_performance and PERF_MONITOR_AVAILABLE
+    if perf_monitor:
+        for component, mb in component_memory(app, embs, inference_pool).items():
+            perf_monitor.record_memory(component, mb)
+    show_perf_overlay = show_performance and PERF_MONITOR_AVAILABLE and display
     
     # Initialize performance logger
     perf_logger = None
@@ -377,131 +1000,159 @@ def recognize_mode(app: FaceAnalysis,
     
     frame_count = 0
     last_result = None  # Cache last recognition result
+    scheduler = frame_scheduler
+    if scheduler is None:
+        scheduler = (AdaptiveScheduler(target_latency_ms=target_latency_ms) if target_latency_ms is not None
+                     else FixedIntervalScheduler(every=3))
+    tracker = FaceTracker(threshold=threshold) if tracking else None
+    motion_gate = MotionGate() if motion_gating and inference_pool is None else None
+    standby = (StandbyController(cap, quiet_period=standby_after, active_size=(width, height))
+               if motion_gate is not None and standby_after else None)
+    roi_detector = None
+    if roi_detection and inference_pool is None and hasattr(app, "det_model"):
+        if supports_dynamic_input(app.det_model):
+            roi_detector = RoiDetector(full_sweep_interval=full_sweep_interval)
+        else:
+            print("[!] ROI detection nonaktif: model detection tidak mendukung input dinamis")
+    face_quality = None
+    if quality_gate and inference_pool is None:
+        if hasattr(app, "det_model"):
+            face_quality = FaceQualityGate(min_det_score=min_det_score)
+        else:
+            print("[!] Quality gate nonaktif: app tanpa det_model (embedding sudah dari app.get)")
+    if cascade is not None:
+        if inference_pool is not None or not hasattr(app, "det_model") or not cascade.load_galleries():
+            cascade = None
+        else:
+            print(f"[*] Cascade: {cascade.fast_model} ({cascade.fast_ms:.1f} ms/wajah) -> model utama "
+                  f"({cascade.full_ms:.1f} ms/wajah) jika ragu-ragu")
+    if detect_width and inference_pool is None:
+        print(f"[*] Detection pada frame lebar {detect_width}px, align & embed dari frame asli")
     
-    while True:
+    while max_frames is None or frame_count < max_frames:
         # Start frame timing
         if perf_monitor:
             perf_monitor.start_frame()
         
+        if standby is not None:
+            standby.throttle()  # Standby: loop di-throttle ke standby_fps
+        
         ok, frame = cap.read()
         if not ok:
             print("Gagal baca frame.")
             break
+        grab_time = cap.last_timestamp if isinstance(cap, LatestFrameGrabber) else time.time()
+
+        if perf_monitor and isinstance(cap, LatestFrameGrabber):
+            perf_monitor.record_capture(cap.dropped, cap.frame_age())
 
         frame_count += 1
         disp = frame.copy()
         
-        # Process every 3rd frame for better performance
+        # Motion gate: detection hanya jika ada motion atau wajah masih di scene
+        woke = False
+        scene_active = True
+        if motion_gate is not None:
+            gate_start = time.perf_counter()
+            motion = motion_gate.update(frame)
+            if perf_monitor:
+                perf_monitor.record_stage_time("motion", time.perf_counter() - gate_start)
+            scene_active = motion or last_result is not None or (tracker is not None and bool(tracker.tracks))
+            
+            if standby is not None:
+                if scene_active:
+                    standby.mark_activity()
+                if standby.standby and motion:
+                    # Wake: detection langsung di frame ini, capture dikembalikan setelahnya
+                    woke = True
+                elif standby.check_enter():
+                    motion_gate.reset()
+                    print("[*] Standby: tidak ada aktivitas, capture diturunkan")
+                    logger.log_system("Recognize standby (no motion)")
+            
+            if perf_monitor:
+                perf_monitor.record_motion(motion, standby is not None and standby.standby)
+        
+        run_detection = False
+        if inference_pool is None:
+            run_detection = woke or (scene_active and scheduler.should_run())
+        
+        if inference_pool is not None:
+            # Worker process: submit non-blocking (di-drop jika semua slot sibuk),
+            # lalu pakai hasil terbaru yang sudah selesai
+            inference_pool.submit(frame)
+            pool_result = inference_pool.poll_latest()
+            if pool_result is not None:
+                if perf_monitor:
+                    perf_monitor.record_inference_time(pool_result.inference_time)
+                    perf_monitor.record_stage_time("pool_latency", pool_result.latency)
+                recognized_faces = recognize_faces(pool_result.faces, embs, student_db,
+                                                   threshold=threshold,
+                                                   min_det_score=min_det_score,
+                                                   cam_index=cam_index,
+                                                   event_writer=event_writer)
+                last_result = recognized_faces if recognized_faces else None
+        
+        # Adaptive frame skipping (latency budget + scene activity)
         # Display cached result on skipped frames
-        if frame_count % 3 == 0:
+        elif run_detection:
             # Time inference
             inference_start = time.time()
             
-            faces = app.get(frame)
+            if tracker is not None:
+                # Detection saja; embedding hanya untuk track yang perlu (di recognize_tracked)
+                faces = detect_faces(app, frame, detect_width=detect_width, roi_detector=roi_detector)
+                last_result = recognize_tracked(app, frame, faces, tracker, embs, student_db,
+                                                threshold=threshold,
+                                                min_det_score=min_det_score,
+                                                cam_index=cam_index,
+                                                event_writer=event_writer,
+                                                quality_gate=face_quality,
+                                                cascade=cascade)
+            else:
+                # Satu batch ArcFace untuk semua wajah (embedding dari crop resolusi penuh)
+                faces = detect_and_embed(app, frame, detect_width=detect_width, roi_detector=roi_detector,
+                                         quality_gate=face_quality, cascade=cascade)
             
+            inference_time = time.time() - inference_start
+            scheduler.record(inference_time, len(faces))
             if perf_monitor:
-                inference_time = time.time() - inference_start
                 perf_monitor.record_inference_time(inference_time)
-
-
-            # Process faces with SMART MODE (adaptive)
-            recognized_faces = []
-            
-            if faces and len(faces) > 0:
-                # SMART MODE LOGIC:
-                # - 1 face: Process 1 (fastest)
-                # - 2-3 faces: Process all (useful for parent+child)
-                # - 4+ faces: Process top 3 only (performance balance)
-                
-                num_faces = len(faces)
-                
-                if num_faces == 1:
-                    # Single face: Process immediately (fastest path)
-                    faces_to_process = faces
-                    mode_text = "FAST"
-                elif num_faces <= 3:
-                    # 2-3 faces: Process all (parent+child scenario)
-                    faces_to_process = faces
-                    mode_text = "ALL"
-                else:
-                    # 4+ faces: Process top 3 largest (performance balance)
-                    # Sort by face area (largest first)
-                    faces_sorted = sorted(faces, 
-                                        key=lambda f: (f.bbox[2]-f.bbox[0])*(f.bbox[3]-f.bbox[1]), 
-                                        reverse=True)
-                    faces_to_process = faces_sorted[:3]
-                    mode_text = "TOP3"
+                if woke:
+                    perf_monitor.record_wake(time.time() - grab_time)
+                if roi_detector is not None:
+                    perf_monitor.record_detection_region(roi_detector.last_mode, roi_detector.last_time)
+                if face_quality is not None:
+                    perf_monitor.record_quality(face_quality.last_checked, face_quality.last_skipped,
+                                                face_quality.last_saved_ms)
+                if cascade is not None:
+                    perf_monitor.record_cascade(cascade.last_faces, cascade.last_escalated,
+                                                cascade.last_saved_ms)
+
+            if tracker is None:
+                # Process faces with SMART MODE (adaptive)
+                recognized_faces = recognize_faces(faces, embs, student_db,
+                                                   threshold=threshold,
+                                                   min_det_score=min_det_score,
+                                                   cam_index=cam_index,
+                                                   event_writer=event_writer)
                 
-                # Process selected faces
-                for face in faces_to_process:
-                    if float(face.det_score) >= min_det_score:
-                        emb = face.normed_embedding.astype(np.float32)
-                        emb = l2_normalize(emb)
-
-                        # cosine similarity: embs already normalized
-                        sims = embs @ emb  # (N,)
-                        best_idx = int(np.argmax(sims))
-                        best_sim = float(sims[best_idx])
-
-                        if best_sim >= threshold:
-                            # Lookup database by embedding index
-                            parent = student_db.get_parent_by_index(best_idx)
-                            
-                            if parent:
-                                # Format: "Ortu: [Nama] | Anak: [Nama] ([Kelas])"
-                                name = f"Ortu: {parent['nama_ortu']} | Anak: {parent['nama_anak']} ({parent['kelas']})"
-                                recognized_faces.append((face, f"{name} | sim={best_sim:.2f}", True))
-                                logger.log_recognition(parent['nama_ortu'], best_sim, cam_index, threshold)
-                            else:
-                                # Index found but no database entry (data mismatch)
-                                name = f"Index:{best_idx} (No DB entry)"
-                                recognized_faces.append((face, f"{name} | sim={best_sim:.2f}", False))
-                                logger.log_recognition(None, best_sim, cam_index, threshold)
-                        else:
-                            recognized_faces.append((face, f"Unknown | sim={best_sim:.2f}", False))
-                            logger.log_recognition(None, best_sim, cam_index, threshold)
-                
-                # Store mode info for display
-                if recognized_faces:
-                    # Add mode info to first face for display
-                    face_info = recognized_faces[0]
-                    recognized_faces[0] = (face_info[0], face_info[1], face_info[2], mode_text, num_faces)
-            
-            # Cache results for all faces
-            last_result = recognized_faces if recognized_faces else None
+                # Cache results for all faces
+                last_result = recognized_faces if recognized_faces else None
+        
+        elif tracker is not None:
+            # Frame tanpa detection: box diinterpolasi dari Kalman state
+            last_result = tracker.results()
         
+        if woke:
+            standby.wake()
+            motion_gate.reset()  # Resolusi berubah -> background dipelajari ulang
+        
+        if perf_monitor and inference_pool is None:
+            perf_monitor.record_schedule(run_detection, scheduler.interval_ms, scheduler.mode)
         
         # Draw all recognized faces (even on skipped frames for smooth display)
-        if last_result is not None and len(last_result) > 0:
-            # Extract mode info if available (from first face)
-            mode_text = None
-            total_detected = None
-            
-            for idx, face_data in enumerate(last_result):
-                # Handle both old format (3 items) and new format (5 items)
-                if len(face_data) == 5:
-                    face, text, _, mode, total = face_data
-                    if idx == 0:  # Only get mode from first face
-                        mode_text = mode
-                        total_detected = total
-                else:
-                    face, text, _ = face_data
-                
-                draw_box_and_text(disp, face, text)
-            
-            # Add Smart Mode indicator
-            if mode_text and total_detected:
-                mode_display = f"Mode: {mode_text} ({len(last_result)}/{total_detected})"
-                cv2.putText(disp, mode_display, (disp.shape[1] - 250, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
-            else:
-                # Fallback: just show count
-                face_count_text = f"Faces: {len(last_result)}"
-                cv2.putText(disp, face_count_text, (disp.shape[1] - 150, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2, cv2.LINE_AA)
-        else:
-            cv2.putText(disp, "No face / low confidence", (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+        draw_results(disp, last_result)
         
         # Draw performance overlay
         if show_perf_overlay and perf_monitor:
@@ -512,7 +1163,8 @@ def recognize_mode(app: FaceAnalysis,
             cv2.putText(disp, stats_text, (10, disp.shape[0] - 15),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
 
-        cv2.imshow("Recognize - press q to quit", disp)
+        if display:
+            cv2.imshow("Recognize - press q to quit", disp)
         
         # End frame timing
         if perf_monitor:
@@ -525,6 +1177,9 @@ def recognize_mode(app: FaceAnalysis,
                 except Exception as e:
                     pass  # Silent fail for logging
         
+        if not display:
+            continue
+        
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
             break
@@ -533,12 +1188,43 @@ def recognize_mode(app: FaceAnalysis,
             show_perf_overlay = not show_perf_overlay
 
     cap.release()
-    cv2.destroyAllWindows()
+    if display:
+        cv2.destroyAllWindows()
+    
+    if standby is not None:
+        print(f"\n[*] Standby: {standby.standby_entries}x | {standby.total_standby_seconds():.1f} s total")
+    
+    if roi_detector is not None:
+        print(f"\n[*] ROI detection: roi={roi_detector.roi_runs} | full={roi_detector.full_runs} | "
+              f"ratio={roi_detector.roi_ratio * 100:.0f}%")
+    
+    if face_quality is not None and face_quality.checked:
+        print(f"\n[*] Quality gate: skipped {face_quality.skip_ratio * 100:.0f}% "
+              f"{dict(face_quality.skipped)} | saved ~{face_quality.saved_ms:.0f} ms")
+    
+    if cascade is not None and cascade.faces:
+        print(f"\n[*] Cascade: escalated {cascade.escalated}/{cascade.faces} "
+              f"({cascade.escalation_rate * 100:.0f}%) | saved ~{cascade.saved_ms:.0f} ms")
+    
+    if tracker is not None:
+        print(f"\n[*] Tracker: recognitions={tracker.recognitions} | reused={tracker.reused} | "
+              f"tracks={tracker.total_tracks}")
     
     # Print final stats
     if perf_monitor:
+        # Buffer embedding baru dialokasikan saat wajah pertama di-embed
+        for component, mb in component_memory(app, embs, inference_pool).items():
+            perf_monitor.record_memory(component, mb)
         print("\n[*] Performance Summary:")
         perf_monitor.print_stats()
+        stats = perf_monitor.get_stats()
+        if tracker is not None:
+            stats['tracker'] = {'recognitions': tracker.recognitions,
+                                'reused': tracker.reused,
+                                'tracks': tracker.total_tracks}
+        if cascade is not None:
+            stats['cascade'] = cascade.get_stats()
+        return stats
 
 
 # =========================
@@ -559,21 +1245,100 @@ def main():
     parser.add_argument("--min_det", type=float, default=0.6, help="Minimum detection score")
     parser.add_argument("--samples", type=int, default=10, help="Enroll samples")
     parser.add_argument("--thr", type=float, default=0.35, help="Cosine similarity threshold for 'known'")
+    parser.add_argument("--events", type=str, default="",
+                        help="Publish recognition events ke shared-memory ring dengan nama ini (e.g., facegate_events)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Recognize dengan pipeline multi-stage (capture/detect/match/render paralel)")
+    parser.add_argument("--modules", type=str, default="recognize",
+                        help="Module InsightFace: recognize (det+rec), enroll, full, atau CSV nama module")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Recognize dengan N inference worker process (0 = inference di proses ini)")
+    parser.add_argument("--precision", type=str, default="fp32", choices=["fp32", "int8"],
+                        help="int8 = model hasil quantize_models.py (models/<model>_int8)")
+    parser.add_argument("--intra-threads", type=int, default=0, help="ORT intra-op threads (0 = default ORT)")
+    parser.add_argument("--inter-threads", type=int, default=0, help="ORT inter-op threads (0 = default ORT)")
+    parser.add_argument("--exec-mode", type=str, default="sequential", choices=["sequential", "parallel"],
+                        help="ORT execution mode")
+    parser.add_argument("--graph-opt", type=str, default="all", choices=["disable", "basic", "extended", "all"],
+                        help="ORT graph optimization level")
+    parser.add_argument("--no-model-cache", action="store_true",
+                        help="Jangan pakai optimized model cache (models/.ort_cache)")
+    parser.add_argument("--detect-width", type=int, default=0,
+                        help="Detection pada frame yang di-downscale ke lebar ini; embedding tetap dari frame --w x --h (0 = nonaktif)")
+    parser.add_argument("--quality-gate", action="store_true",
+                        help="Wajah kecil/blur/menyamping tidak di-embed (lihat face_quality.py)")
+    parser.add_argument("--backend", type=str, default="ort", choices=["ort", "opencv", "auto"],
+                        help="Backend detection & recognition (auto = hasil bench_backends.py --save)")
+    parser.add_argument("--thread-budget", type=str, default="default",
+                        help="Thread ORT/BLAS/OpenCV: auto, default, atau e.g. ort=3,blas=1,opencv=1,cpus=0-3 (lihat thread_budget.py)")
+    parser.add_argument("--cascade", type=str, default="",
+                        help="Pack kecil untuk tier cepat model cascade, e.g. buffalo_s (lihat model_cascade.py)")
+    parser.add_argument("--tracking", action="store_true",
+                        help="Face tracking: embedding sekali per track (lihat face_tracker.py)")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="Detection hanya saat ada motion (lihat motion_gate.py)")
+    parser.add_argument("--standby-after", type=float, default=0,
+                        help="Dengan --motion-gate: detik tanpa aktivitas sebelum kamera standby (0 = tanpa standby)")
+    parser.add_argument("--roi", action="store_true",
+                        help="Re-detection hanya di sekitar wajah sebelumnya (lihat roi_detector.py)")
+    parser.add_argument("--target-latency", type=float, default=0,
+                        help="Adaptive frame skipping dengan target latency ini (ms); 0 = detection setiap 3 frame")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Board 1-2 GB: arena ORT off, detection + recognition saja, gallery mmap (lihat low_memory.py)")
     args = parser.parse_args()
 
-    db = FaceDB(args.db)
-    app = build_face_app(model_name=args.model, det_size=args.det, device=args.device)
+    db = FaceDB(args.db, mmap=args.low_memory)
+    app_kwargs = {"model_name": args.model, "det_size": args.det, "device": args.device,
+                  "modules": args.modules,
+                  "intra_op_threads": args.intra_threads, "inter_op_threads": args.inter_threads,
+                  "execution_mode": args.exec_mode, "graph_opt_level": args.graph_opt,
+                  "model_cache": not args.no_model_cache, "precision": args.precision,
+                  "backend": args.backend, "low_memory": args.low_memory}
+    from thread_budget import apply_budget
+    thread_budget = apply_budget(args.thread_budget, app_kwargs,
+                                 workers=args.workers if args.mode == "recognize" else 0)
+    if args.mode == "recognize" and args.workers > 0:
+        app = None  # Model di-load di setiap worker
+    else:
+        app = build_face_app(**app_kwargs)
+
+    cascade = None
+    if args.cascade and app is not None:
+        from model_cascade import ModelCascade
+        fast_app = build_face_app(**dict(app_kwargs, model_name=args.cascade, modules="recognize"))
+        cascade = ModelCascade(fast_app, app, db, fast_model=args.cascade, threshold=args.thr)
 
     if args.mode == "enroll":
         if not args.name.strip():
             raise ValueError("Mode enroll but --name is empty. Example: --name \"Raihan\"")
         enroll_mode(app, db, name=args.name.strip(),
                     cam_index=args.cam, width=args.w, height=args.h,
-                    samples=args.samples, min_det_score=args.min_det)
+                    samples=args.samples, min_det_score=args.min_det, cascade=cascade)
     else:
-        recognize_mode(app, db,
-                       cam_index=args.cam, width=args.w, height=args.h,
-                       threshold=args.thr, min_det_score=args.min_det)
+        event_writer = RecognitionEventWriter(args.events) if args.events else None
+        pool = None
+        try:
+            if args.workers > 0:
+                from inference_pool import InferencePool
+                # Kamera bisa memberi resolusi lebih besar dari yang diminta -> slot minimal 1080p
+                pool = InferencePool(num_workers=args.workers,
+                                     frame_shape=(max(args.h, 1080), max(args.w, 1920), 3),
+                                     app_kwargs=app_kwargs, thread_budget=thread_budget).start()
+            recognize_mode(app, db,
+                           cam_index=args.cam, width=args.w, height=args.h,
+                           threshold=args.thr, min_det_score=args.min_det,
+                           event_writer=event_writer, pipelined=args.pipelined,
+                           inference_pool=pool, detect_width=args.detect_width or None,
+                           quality_gate=args.quality_gate, cascade=cascade,
+                           target_latency_ms=args.target_latency or None,
+                           tracking=args.tracking, motion_gating=args.motion_gate,
+                           standby_after=args.standby_after or None, roi_detection=args.roi)
+        finally:
+            if pool is not None:
+                print(f"[*] Inference pool: {pool.get_stats()}")
+                pool.close()
+            if event_writer is not None:
+                event_writer.close()
 
 
 if __name__ == "__main__":
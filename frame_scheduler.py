@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive Frame Scheduler untuk Face Recognition System
+Menggantikan aturan tetap "inference setiap 3 frame" dengan keputusan berbasis
+latency budget:
+
+    interval = max(target_latency - inference_time, duty_floor)
+
+- target_latency: batas waktu wajah baru muncul -> hasil recognition tampil
+- inference_time: EMA waktu app.get yang terukur
+- duty_floor: jeda minimum supaya inference tidak memakai > max_duty waktu CPU
+  (sisa untuk capture & display)
+
+Scene activity: jika beberapa kali berturut-turut tidak ada wajah, scheduler
+masuk mode idle dengan target latency lebih longgar (hemat CPU saat gate sepi),
+dan kembali ke mode active begitu ada wajah.
+
+Di PC cepat (inference 15 ms) detection ~7x/detik alih-alih 10x/detik (30 FPS / 3);
+di Raspberry Pi (inference 400 ms) detection berjalan back-to-back dengan
+jeda duty_floor supaya display tetap responsif.
+
+AdaptiveScheduler opt-in (target_latency_ms di recognize_mode / TARGET_LATENCY_MS di
+main.py). Tanpa itu recognize_mode memakai FixedIntervalScheduler (setiap 3 frame,
+perilaku lama); FixedIntervalScheduler(every=1) = detection di setiap frame (load test).
+"""
+
+import time
+from typing import Optional
+
+
+class AdaptiveScheduler:
+    """Putuskan kapan detection dijalankan berdasarkan target latency & scene activity"""
+
+    MODE_ACTIVE = "active"
+    MODE_IDLE = "idle"
+
+    def __init__(self,
+                 target_latency_ms: float = 150.0,
+                 idle_latency_ms: float = 500.0,
+                 max_duty: float = 0.85,
+                 idle_after: int = 5,
+                 ema_alpha: float = 0.2):
+        """
+        Args:
+            target_latency_ms: Target latency saat ada wajah (mode active)
+            idle_latency_ms: Target latency saat tidak ada wajah (mode idle)
+            max_duty: Fraksi waktu maksimum yang boleh dipakai inference (0-1)
+            idle_after: Jumlah detection berturut-turut tanpa wajah sebelum masuk mode idle
+            ema_alpha: Bobot sample baru untuk EMA inference time
+        """
+        self.target_latency = target_latency_ms / 1000.0
+        self.idle_latency = idle_latency_ms / 1000.0
+        self.max_duty = min(max(max_duty, 0.05), 1.0)
+        self.idle_after = idle_after
+        self.ema_alpha = ema_alpha
+
+        self.inference_ema: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.empty_streak = 0
+        self.mode = self.MODE_ACTIVE
+        self.last_decision = False
+
+        # Stats
+        self.runs = 0
+        self.skips = 0
+
+    def interval(self) -> float:
+        """Jeda (detik) antar awal detection untuk mode saat ini"""
+        infer = self.inference_ema or 0.0
+        target = self.target_latency if self.mode == self.MODE_ACTIVE else self.idle_latency
+        duty_floor = infer * (1.0 / self.max_duty - 1.0)
+        return max(target - infer, duty_floor, 0.0)
+
+    def should_run(self, now: Optional[float] = None) -> bool:
+        """Panggil sekali per frame; True = jalankan detection pada frame ini"""
+        now = time.perf_counter() if now is None else now
+        self.last_decision = self.last_run is None or now - self.last_run >= self.interval()
+        if self.last_decision:
+            self.last_run = now
+            self.runs += 1
+        else:
+            self.skips += 1
+        return self.last_decision
+
+    def record(self, inference_time: float, num_faces: int):
+        """Update EMA inference time dan scene activity setelah detection"""
+        if self.inference_ema is None:
+            self.inference_ema = inference_time
+        else:
+            self.inference_ema += self.ema_alpha * (inference_time - self.inference_ema)
+
+        if num_faces > 0:
+            self.empty_streak = 0
+            self.mode = self.MODE_ACTIVE
+        else:
+            self.empty_streak += 1
+            if self.empty_streak >= self.idle_after:
+                self.mode = self.MODE_IDLE
+
+    @property
+    def interval_ms(self) -> float:
+        return self.interval() * 1000.0
+
+    @property
+    def run_ratio(self) -> float:
+        total = self.runs + self.skips
+        return self.runs / total if total else 0.0
+
+
+class FixedIntervalScheduler:
+    """Detection setiap N frame (interface sama dengan AdaptiveScheduler)"""
+
+    MODE_FIXED = "fixed"
+
+    def __init__(self, every: int = 3):
+        """
+        Args:
+            every: Jalankan detection setiap N frame (1 = setiap frame)
+        """
+        self.every = max(1, int(every))
+        self.mode = self.MODE_FIXED
+        self.interval_ms = 0.0  # Interval dalam frame, bukan waktu
+        self.last_decision = False
+        self.frame_count = 0
+
+        # Stats
+        self.runs = 0
+        self.skips = 0
+
+    def should_run(self, now: Optional[float] = None) -> bool:
+        """Panggil sekali per frame; True = jalankan detection pada frame ini"""
+        self.frame_count += 1
+        self.last_decision = self.frame_count % self.every == 0
+        if self.last_decision:
+            self.runs += 1
+        else:
+            self.skips += 1
+        return self.last_decision
+
+    def record(self, inference_time: float, num_faces: int):
+        """Tidak dipakai (interval tetap)"""
+
+    @property
+    def run_ratio(self) -> float:
+        total = self.runs + self.skips
+        return self.runs / total if total else 0.0
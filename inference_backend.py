@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inference Backend untuk Face Recognition System
+Semua model berjalan lewat wrapper InsightFace di atas ONNX Runtime. cv2 sudah
+dependency, dan OpenCV DNN bisa lebih cepat untuk detector SCRFD di beberapa CPU
+ARM. Backend dipilih per module (detection / recognition):
+
+    ort     - onnxruntime.InferenceSession (default; SessionOptions + model cache)
+    opencv  - cv2.dnn.Net di belakang adapter OpenCVSession
+    auto    - pilihan tersimpan bench_backends.py untuk host & model ini (fallback: ort)
+
+OpenCVSession meniru bagian InferenceSession yang dipakai wrapper InsightFace
+(get_inputs, get_outputs, run), sehingga SCRFD/ArcFaceONNX, BatchEmbedder, dan
+RoiDetector tidak perlu tahu backend mana yang dipakai. Shape input/output diambil
+dari graph ONNX setelah shape inference (sama dengan yang dilaporkan ORT).
+
+Usage:
+    build_face_app(..., backend="opencv")
+    build_face_app(..., backend={"detection": "opencv", "recognition": "ort"})
+    python bench_backends.py --save        # ukur, lalu backend="auto" memakai hasilnya
+"""
+
+import os
+import json
+import time
+import platform
+from typing import Dict, List, Optional, Union
+
+import cv2
+import numpy as np
+
+BACKEND_ORT = "ort"
+BACKEND_OPENCV = "opencv"
+BACKENDS = (BACKEND_ORT, BACKEND_OPENCV)
+BACKEND_TASKS = ("detection", "recognition")
+
+CHOICE_FILE = ".backend.json"  # Di folder models/, ditulis bench_backends.py --save
+
+
+class _NodeArg:
+    """Pengganti onnxruntime.NodeArg (name + shape)"""
+
+    def __init__(self, name: str, shape: list):
+        self.name = name
+        self.shape = shape
+        self.type = "tensor(float)"
+
+
+def _dims(value_info) -> list:
+    """Dimensi seperti ORT: int (statis), str (simbolik), None (tidak diketahui)"""
+    dims = []
+    for d in value_info.type.tensor_type.shape.dim:
+        if d.HasField("dim_value") and d.dim_value > 0:
+            dims.append(int(d.dim_value))
+        elif d.HasField("dim_param"):
+            dims.append(d.dim_param)
+        else:
+            dims.append(None)
+    return dims
+
+
+class OpenCVSession:
+    """cv2.dnn.Net dengan interface InferenceSession yang dipakai wrapper InsightFace"""
+
+    def __init__(self, onnx_file: str, num_threads: int = 0):
+        """
+        Args:
+            onnx_file: Path model .onnx
+            num_threads: cv2.setNumThreads (0 = default OpenCV; berlaku global untuk proses)
+        """
+        import onnx
+
+        model = onnx.load(onnx_file)
+        try:
+            # Output tanpa shape di graph ditolak importer OpenCV -> lengkapi dulu
+            model = onnx.shape_inference.infer_shapes(model)
+        except Exception:
+            pass
+        initializers = {init.name for init in model.graph.initializer}
+        self._inputs = [_NodeArg(i.name, _dims(i)) for i in model.graph.input if i.name not in initializers]
+        self._outputs = [_NodeArg(o.name, _dims(o)) for o in model.graph.output]
+
+        self.net = cv2.dnn.readNetFromONNX(np.frombuffer(model.SerializeToString(), dtype=np.uint8))
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        if num_threads > 0:
+            cv2.setNumThreads(num_threads)
+        self.model_file = onnx_file
+
+    def get_inputs(self) -> List[_NodeArg]:
+        return self._inputs
+
+    def get_outputs(self) -> List[_NodeArg]:
+        return self._outputs
+
+    def get_providers(self) -> List[str]:
+        return ["OpenCVDNN"]
+
+    def set_providers(self, providers=None, provider_options=None):
+        """No-op (dipanggil SCRFD/ArcFace.prepare jika ctx_id < 0)"""
+
+    def run(self, output_names: Optional[List[str]], input_feed: Dict[str, np.ndarray], run_options=None):
+        names = output_names or [o.name for o in self._outputs]
+        for name, blob in input_feed.items():
+            self.net.setInput(np.ascontiguousarray(blob, dtype=np.float32), name)
+        outs = self.net.forward(names)
+
+        # OpenCV kadang membuang dimensi batch 1 -> samakan rank dengan graph (SCRFD cek rank 3)
+        ranks = {o.name: len(o.shape) for o in self._outputs}
+        results = []
+        for name, out in zip(names, outs):
+            rank = ranks.get(name, out.ndim)
+            if rank > out.ndim:
+                out = out.reshape((1,) * (rank - out.ndim) + out.shape)
+            results.append(out)
+        return results
+
+
+def load_opencv_model(onnx_file: str, num_threads: int = 0):
+    """
+    Model InsightFace (SCRFD / ArcFaceONNX / ...) di atas OpenCV DNN
+
+    Returns:
+        (model atau None, state "opencv")
+    """
+    from ort_session import route_model
+    return route_model(onnx_file, OpenCVSession(onnx_file, num_threads=num_threads)), BACKEND_OPENCV
+
+
+def host_fingerprint() -> Dict:
+    """Identitas host untuk pilihan backend tersimpan (pilihan host lain tidak dipakai)"""
+    return {'machine': platform.machine(), 'system': platform.system(),
+            'processor': platform.processor(), 'cpu_count': os.cpu_count(),
+            'opencv': cv2.__version__}
+
+
+def _read_choices(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_choice(path: str, model_name: str, backends: Dict[str, str], timings: Optional[Dict] = None):
+    """Simpan backend tercepat per module untuk model_name di host ini"""
+    choices = _read_choices(path)
+    choices[model_name] = {'backends': backends, 'host': host_fingerprint(), 'timings_ms': timings or {},
+                           'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(choices, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_choice(path: str, model_name: str) -> Optional[Dict[str, str]]:
+    """Backend tersimpan untuk model_name; None jika belum di-bench atau dari host lain"""
+    entry = _read_choices(path).get(model_name)
+    if not entry or entry.get('host') != host_fingerprint():
+        return None
+    return entry.get('backends')
+
+
+def resolve_backends(backend: Union[str, Dict[str, str], None],
+                     model_name: str = "",
+                     choice_file: Optional[str] = None) -> Dict[str, str]:
+    """
+    Backend per module dari parameter build_face_app
+
+    Args:
+        backend: "ort", "opencv", "auto", atau dict {"detection": ..., "recognition": ...}
+        model_name: Nama model pack (key pilihan tersimpan untuk "auto")
+        choice_file: Path models/.backend.json
+
+    Returns:
+        {"detection": "ort"|"opencv", "recognition": "ort"|"opencv"}; module lain selalu ORT
+    """
+    if backend is None:
+        backend = BACKEND_ORT
+    if backend == "auto":
+        chosen = load_choice(choice_file, model_name) if choice_file else None
+        if chosen is None:
+            print(f"[!] Belum ada pilihan backend untuk {model_name} di host ini "
+                  f"(jalankan: python bench_backends.py --model {model_name} --save), pakai ort")
+            chosen = {}
+        backend = chosen
+    if isinstance(backend, str):
+        backend = {task: backend for task in BACKEND_TASKS}
+
+    resolved = {task: backend.get(task, BACKEND_ORT) for task in BACKEND_TASKS}
+    unknown = [b for b in resolved.values() if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Backend tidak dikenal: {unknown}. Pilihan: {list(BACKENDS)} atau auto")
+    return resolved
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inference Worker Pool untuk Face Recognition System
+Beberapa proses worker, masing-masing memiliki model sendiri (build_face_app),
+sehingga pre/post-processing tidak berebut GIL dan throughput bisa naik sesuai
+jumlah core.
+
+- Frame dikirim lewat slot `multiprocessing.shared_memory` yang dialokasikan sekali
+  (tidak ada pickling frame; parent hanya copy pixel ke slot, worker membaca langsung)
+- Task dan hasil yang lewat queue hanya record kecil: (task_id, slot, shape) dan
+  numpy structured array per wajah (bbox, kps, det_score, embedding)
+- Jika semua slot sedang dipakai, frame baru di-drop (latest-wins, tidak antri)
+- Error per frame di worker (frame rusak, error ORT) dikirim balik sebagai "task_error":
+  slot dibebaskan dan error dihitung; worker yang mati membuat submit/poll_latest raise
+
+Usage:
+    pool = InferencePool(num_workers=3, frame_shape=(480, 640, 3),
+                         app_kwargs={"model_name": "buffalo_l", "det_size": 320})
+    pool.start()
+    pool.submit(frame)
+    result = pool.poll_latest()   # PoolResult atau None
+    pool.close()
+"""
+
+import os
+import time
+import queue
+import multiprocessing as mp
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def face_record_dtype(emb_dim: int = 512) -> np.dtype:
+    """Layout record compact per wajah (~2 KB untuk embedding 512-d)"""
+    return np.dtype([
+        ('bbox', np.float32, (4,)),
+        ('kps', np.float32, (5, 2)),
+        ('det_score', np.float32),
+        ('has_embedding', np.uint8),
+        ('embedding', np.float32, (emb_dim,)),
+    ])
+
+
+def pack_faces(faces, emb_dim: int = 512) -> np.ndarray:
+    """List of face (hasil app.get) -> structured array"""
+    records = np.zeros(len(faces), dtype=face_record_dtype(emb_dim))
+    for i, face in enumerate(faces):
+        records[i]['bbox'] = face.bbox[:4]
+        if face.kps is not None:
+            records[i]['kps'] = face.kps[:5]
+        records[i]['det_score'] = face.det_score
+        if face.embedding is not None:
+            records[i]['has_embedding'] = 1
+            records[i]['embedding'] = face.embedding
+    return records
+
+
+def unpack_faces(records: np.ndarray) -> list:
+    """Structured array -> list of insightface Face (kompatibel dengan recognize_faces/draw_results)"""
+    from insightface.app.common import Face
+
+    faces = []
+    for rec in records:
+        faces.append(Face(bbox=rec['bbox'].copy(),
+                          kps=rec['kps'].copy(),
+                          det_score=np.float32(rec['det_score']),
+                          embedding=rec['embedding'].copy() if rec['has_embedding'] else None))
+    return faces
+
+
+@dataclass
+class PoolResult:
+    """Hasil inference satu frame"""
+    task_id: int
+    worker_id: int
+    faces: list
+    inference_time: float   # Waktu app.get di worker (detik)
+    latency: float          # submit -> hasil diterima parent (detik)
+
+
+def _worker_main(worker_id: int,
+                 shm_name: str,
+                 slot_bytes: int,
+                 task_q,
+                 result_q,
+                 app_factory: Optional[Callable],
+                 app_kwargs: Dict,
+                 emb_dim: int,
+                 thread_budget=None,
+                 num_workers: int = 1):
+    """Entry point proses worker: build model sekali, lalu proses task sampai menerima None"""
+    from facegate_insightface import detect_and_embed
+    try:
+        if thread_budget is not None:
+            # Potongan core worker ini (affinity + ORT threads), sebelum session dibuat
+            budget = thread_budget.for_worker(worker_id, num_workers)
+            budget.apply()
+            if app_factory is None:
+                app_kwargs = dict(app_kwargs, **budget.app_kwargs())
+        if app_factory is None:
+            from facegate_insightface import build_face_app
+            app = build_face_app(**app_kwargs)
+        else:
+            app = app_factory(**app_kwargs)
+    except Exception as e:
+        result_q.put(("error", worker_id, f"{type(e).__name__}: {e}"))
+        return
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    result_q.put(("ready", worker_id, os.getpid()))
+
+    try:
+        while True:
+            task = task_q.get()
+            if task is None:
+                break
+            task_id, slot, shape = task
+
+            frame = None
+            try:
+                # View langsung ke slot shared memory (tanpa copy)
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                start = time.perf_counter()
+                faces = detect_and_embed(app, frame)
+                elapsed = time.perf_counter() - start
+                records = pack_faces(faces, emb_dim)
+            except Exception as e:
+                del frame
+                result_q.put(("task_error", worker_id, task_id, slot, f"{type(e).__name__}: {e}"))
+                continue
+            del frame  # Lepas view sebelum slot dipakai ulang
+
+            result_q.put(("result", worker_id, task_id, slot, records, elapsed))
+    finally:
+        shm.close()
+
+
+class InferencePool:
+    """Pool proses inference dengan frame slot di shared memory"""
+
+    def __init__(self,
+                 num_workers: int = 2,
+                 frame_shape: Tuple[int, int, int] = (720, 1280, 3),
+                 num_slots: Optional[int] = None,
+                 app_factory: Optional[Callable] = None,
+                 app_kwargs: Optional[Dict] = None,
+                 emb_dim: int = 512,
+                 start_timeout: float = 120.0,
+                 thread_budget=None):
+        """
+        Args:
+            num_workers: Jumlah proses worker (masing-masing 1 model)
+            frame_shape: Ukuran frame maksimum (H, W, C) per slot
+            num_slots: Jumlah slot shared memory (default: 2 x num_workers)
+            app_factory: Callable (picklable, level modul) pembuat app di worker.
+                         None = build_face_app(**app_kwargs)
+            app_kwargs: Argumen untuk app_factory / build_face_app
+            emb_dim: Dimensi embedding
+            start_timeout: Batas waktu menunggu semua worker selesai load model (detik)
+            thread_budget: ThreadBudget (thread_budget.py); setiap worker memakai
+                           for_worker(id, num_workers) supaya worker tidak berebut core
+        """
+        self.num_workers = num_workers
+        self.frame_shape = tuple(frame_shape)
+        self.num_slots = num_slots or 2 * num_workers
+        self.app_factory = app_factory
+        self.app_kwargs = app_kwargs or {}
+        self.emb_dim = emb_dim
+        self.start_timeout = start_timeout
+        self.thread_budget = thread_budget
+
+        self.slot_bytes = int(np.prod(self.frame_shape))
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._free_slots: List[int] = []
+        self._pending: Dict[int, float] = {}  # task_id -> waktu submit
+
+        # spawn: sama di Windows/Linux, dan aman dengan thread (capture thread) di parent
+        self._ctx = mp.get_context("spawn")
+        self._task_q = None
+        self._result_q = None
+        self._procs = []
+
+        self._next_task_id = 0
+        self._latest_task_id = 0
+
+        # Stats
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0        # Frame di-drop karena semua slot terpakai
+        self.stale = 0          # Hasil yang datang setelah hasil frame lebih baru
+        self.task_errors = 0    # Frame yang gagal di worker (slot sudah dibebaskan)
+        self.last_error: Optional[str] = None
+        self.per_worker: Dict[int, int] = {}
+
+    def start(self):
+        """Alokasikan slot, spawn worker, dan tunggu semua model selesai di-load"""
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.num_slots)
+        self._free_slots = list(range(self.num_slots))
+        self._task_q = self._ctx.Queue()
+        self._result_q = self._ctx.Queue()
+
+        print(f"[*] Starting inference pool: {self.num_workers} worker, "
+              f"{self.num_slots} slot x {self.slot_bytes / 1024 / 1024:.1f} MB")
+        for worker_id in range(self.num_workers):
+            p = self._ctx.Process(target=_worker_main,
+                                  args=(worker_id, self.shm.name, self.slot_bytes,
+                                        self._task_q, self._result_q,
+                                        self.app_factory, self.app_kwargs, self.emb_dim,
+                                        self.thread_budget, self.num_workers),
+                                  name=f"inference-worker-{worker_id}",
+                                  daemon=True)
+            p.start()
+            self._procs.append(p)
+
+        ready = 0
+        deadline = time.time() + self.start_timeout
+        while ready < self.num_workers:
+            try:
+                msg = self._result_q.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                self.close()
+                raise RuntimeError(f"Inference pool: hanya {ready}/{self.num_workers} worker siap "
+                                   f"dalam {self.start_timeout:.0f}s")
+            if msg[0] == "error":
+                self.close()
+                raise RuntimeError(f"Inference worker {msg[1]} gagal load model: {msg[2]}")
+            if msg[0] == "ready":
+                ready += 1
+                self.per_worker[msg[1]] = 0
+        print(f"[OK] Inference pool ready ({ready} worker)")
+        return self
+
+    def submit(self, frame: np.ndarray) -> Optional[int]:
+        """
+        Kirim frame ke worker (non-blocking)
+
+        Returns:
+            task_id, atau None jika semua slot terpakai (frame di-drop)
+        """
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} {frame.dtype} tidak muat di slot {self.frame_shape} uint8")
+        self._check_workers()
+
+        if not self._free_slots:
+            self.dropped += 1
+            return None
+
+        slot = self._free_slots.pop()
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+
+        self._next_task_id += 1
+        task_id = self._next_task_id
+        self._pending[task_id] = time.perf_counter()
+        self._task_q.put((task_id, slot, frame.shape))
+        self.submitted += 1
+        return task_id
+
+    def _check_workers(self):
+        """Raise jika ada worker yang mati (crash / di-kill): slot & task-nya tidak akan kembali"""
+        dead = [(i, p.exitcode) for i, p in enumerate(self._procs) if not p.is_alive()]
+        if dead:
+            raise RuntimeError("Inference worker mati: " +
+                               ", ".join(f"worker {i} (exitcode {code})" for i, code in dead))
+
+    def _receive(self, timeout: Optional[float]) -> Optional[PoolResult]:
+        while True:
+            try:
+                msg = self._result_q.get(timeout=timeout) if timeout else self._result_q.get_nowait()
+            except queue.Empty:
+                return None
+            if msg[0] == "task_error":
+                # Frame gagal di worker: slot kembali, task tidak ditunggu lagi
+                _, worker_id, task_id, slot, error = msg
+                self._free_slots.append(slot)
+                self._pending.pop(task_id, None)
+                self.task_errors += 1
+                if error != self.last_error:
+                    print(f"[!] Inference worker {worker_id}: frame gagal diproses ({error})")
+                self.last_error = error
+                continue
+            if msg[0] == "result":
+                break
+
+        _, worker_id, task_id, slot, records, elapsed = msg
+        self._free_slots.append(slot)
+        submitted_at = self._pending.pop(task_id, time.perf_counter())
+        self.completed += 1
+        self.per_worker[worker_id] = self.per_worker.get(worker_id, 0) + 1
+        return PoolResult(task_id=task_id,
+                          worker_id=worker_id,
+                          faces=unpack_faces(records),
+                          inference_time=elapsed,
+                          latency=time.perf_counter() - submitted_at)
+
+    def poll_latest(self, timeout: Optional[float] = None) -> Optional[PoolResult]:
+        """
+        Ambil semua hasil yang sudah selesai dan return yang paling baru (non-blocking default)
+
+        Hasil frame yang lebih tua dari hasil terakhir yang dikembalikan dianggap stale
+        (worker bisa selesai tidak berurutan) dan di-skip.
+
+        Raises:
+            RuntimeError: jika ada worker yang mati
+        """
+        self._check_workers()
+        latest = None
+        result = self._receive(timeout)
+        while result is not None:
+            if result.task_id > self._latest_task_id:
+                if latest is not None:
+                    self.stale += 1
+                latest = result
+                self._latest_task_id = result.task_id
+            else:
+                self.stale += 1
+            result = self._receive(None)
+        return latest
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def get_stats(self) -> Dict:
+        return {
+            'workers': self.num_workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'stale': self.stale,
+            'task_errors': self.task_errors,
+            'per_worker': dict(self.per_worker),
+        }
+
+    def close(self):
+        """Stop worker lalu bebaskan shared memory"""
+        if self._task_q is not None:
+            for _ in self._procs:
+                self._task_q.put(None)
+            # Drain hasil yang tersisa supaya worker tidak tertahan saat flush queue
+            deadline = time.time() + 5.0
+            while any(p.is_alive() for p in self._procs) and time.time() < deadline:
+                try:
+                    self._result_q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for p in self._procs:
+            p.join(timeout=5.0)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live Dashboard untuk Face Recognition System
+Follow performance.log dan recognition.log secara incremental (seperti `tail -f`)
+dan tampilkan FPS, p99 latency, dan recognition rate secara real-time.
+
+frame_ms / inference_ms di performance.log adalah rata-rata 30 frame, jadi p99
+dihitung dari kolom max_* (waktu terlama per baris log). Log lama tanpa kolom
+tersebut ditampilkan sebagai "p99 avg" (p99 dari rata-rata, spike tersamarkan).
+
+Usage:
+    python live_dashboard.py
+    python live_dashboard.py --rate 2 --window 300
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from typing import List, Optional
+
+
+class LogFollower:
+    """
+    Follow file log secara incremental dengan offset polling.
+
+    Hanya membaca byte baru sejak poll terakhir (tidak reparse seluruh file).
+    Handle file yang di-truncate/di-recreate (misal PerformanceLogger menulis
+    ulang header setiap recognize session dimulai).
+    """
+
+    def __init__(self, path: str, from_start: bool = False):
+        """
+        Args:
+            path: Path ke file log
+            from_start: Jika True, baca dari awal file. Default: mulai dari akhir file
+        """
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self._partial = b""
+
+        if not from_start and os.path.exists(path):
+            st = os.stat(path)
+            self.offset = st.st_size
+            self.inode = st.st_ino
+
+    def poll(self) -> List[str]:
+        """Return list baris lengkap yang baru ditulis sejak poll terakhir"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+
+        # File di-recreate atau di-truncate -> mulai dari awal
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode = st.st_ino
+            self.offset = 0
+            self._partial = b""
+
+        if st.st_size == self.offset:
+            return []
+
+        # Binary mode: offset = posisi byte (konsisten dengan st_size)
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        # Baris terakhir mungkin belum selesai ditulis
+        self._partial = lines.pop()
+        decoded = [line.decode('utf-8', errors='replace').rstrip("\r") for line in lines]
+        return [line for line in decoded if line.strip()]
+
+
+class RollingWindow:
+    """
+    Rolling aggregate dengan memory tetap (fixed-size ring).
+
+    Mean di-update O(1) per sample; percentile dihitung saat redraw
+    dari window (ukuran tetap, tidak tumbuh seiring panjang stream).
+    """
+
+    def __init__(self, size: int = 300):
+        self.samples = deque(maxlen=size)
+        self.total = 0.0
+        self.count = 0  # Total sample sejak start (bukan hanya window)
+
+    def add(self, value: float):
+        if len(self.samples) == self.samples.maxlen:
+            self.total -= self.samples[0]
+        self.samples.append(value)
+        self.total += value
+        self.count += 1
+
+    def mean(self) -> float:
+        if not self.samples:
+            return 0.0
+        return self.total / len(self.samples)
+
+    def last(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+class LiveDashboard:
+    """Dashboard terminal untuk performance dan recognition stream"""
+
+    def __init__(self,
+                 perf_log: str = "logs/performance.log",
+                 recog_log: str = "logs/recognition.log",
+                 window: int = 300,
+                 from_start: bool = False):
+        self.perf_follower = LogFollower(perf_log, from_start=from_start)
+        self.recog_follower = LogFollower(recog_log, from_start=from_start)
+        self.perf_log = perf_log
+        self.recog_log = recog_log
+
+        # Performance aggregates
+        self.fps = RollingWindow(window)
+        self.frame_ms = RollingWindow(window)
+        self.inference_ms = RollingWindow(window)
+        self.frame_max_ms = RollingWindow(window)      # Waktu terlama per baris log
+        self.inference_max_ms = RollingWindow(window)
+        self.cpu = RollingWindow(window)
+        self.memory_mb = RollingWindow(window)
+
+        # Recognition aggregates (1 = recognized, 0 = unknown)
+        self.outcomes = RollingWindow(window)
+        self.similarity = RollingWindow(window)
+        self.event_times = deque(maxlen=window)
+        self.total_recognized = 0
+        self.total_unknown = 0
+        self.last_name: Optional[str] = None
+
+        self.start_time = time.time()
+
+    def _ingest_perf(self, line: str):
+        values = line.strip().split(',')
+        # Skip header / baris rusak
+        if len(values) < 7 or values[0] == "timestamp":
+            return
+        try:
+            self.fps.add(float(values[1]))
+            self.frame_ms.add(float(values[2]))
+            self.inference_ms.add(float(values[3]))
+            self.cpu.add(float(values[4]))
+            self.memory_mb.add(float(values[5]))
+            if len(values) >= 9:
+                self.frame_max_ms.add(float(values[7]))
+                self.inference_max_ms.add(float(values[8]))
+        except ValueError:
+            pass
+
+    def _ingest_recognition(self, line: str):
+        if "RECOGNIZE" not in line:
+            return
+
+        if "| RECOGNIZED |" in line:
+            self.outcomes.add(1.0)
+            self.total_recognized += 1
+            if "Name:" in line:
+                self.last_name = line.split("Name:")[1].split("|")[0].strip()
+        elif "| UNKNOWN |" in line:
+            self.outcomes.add(0.0)
+            self.total_unknown += 1
+        else:
+            return
+
+        if "Similarity:" in line:
+            try:
+                self.similarity.add(float(line.split("Similarity:")[1].split("|")[0]))
+            except ValueError:
+                pass
+
+        self.event_times.append(time.time())
+
+    def poll(self):
+        """Ingest semua baris baru dari kedua stream"""
+        for line in self.perf_follower.poll():
+            self._ingest_perf(line)
+        for line in self.recog_follower.poll():
+            self._ingest_recognition(line)
+
+    def events_per_minute(self, horizon: float = 60.0) -> float:
+        now = time.time()
+        recent = [t for t in self.event_times if now - t <= horizon]
+        return len(recent) * (60.0 / horizon)
+
+    @staticmethod
+    def _tail(peaks: "RollingWindow", averages: "RollingWindow") -> str:
+        """p99 dari waktu terlama per baris log; fallback ke rata-rata untuk log lama"""
+        if peaks.count:
+            return f"p99 {peaks.percentile(99):6.1f} | max {peaks.percentile(100):6.1f}"
+        return f"p99 avg {averages.percentile(99):6.1f}"
+
+    def render(self) -> str:
+        """Render dashboard sebagai string (satu layar)"""
+        uptime = int(time.time() - self.start_time)
+        lines = []
+        lines.append("=" * 70)
+        lines.append("  LIVE DASHBOARD - Face Recognition System")
+        lines.append("=" * 70)
+        lines.append(f"Performance: {self.perf_log}")
+        lines.append(f"Recognition: {self.recog_log}")
+        lines.append(f"Watching:    {uptime // 3600:02d}:{(uptime % 3600) // 60:02d}:{uptime % 60:02d}")
+        lines.append("")
+
+        lines.append("[PERFORMANCE]")
+        if self.fps.count == 0:
+            lines.append("  (Menunggu data... jalankan recognition mode)")
+        else:
+            lines.append(f"  FPS:            now {self.fps.last():6.1f} | avg {self.fps.mean():6.1f} | "
+                         f"p1 {self.fps.percentile(1):6.1f}")
+            lines.append(f"  Frame (ms):     now {self.frame_ms.last():6.1f} | avg {self.frame_ms.mean():6.1f} | "
+                         + self._tail(self.frame_max_ms, self.frame_ms))
+            lines.append(f"  Inference (ms): now {self.inference_ms.last():6.1f} | avg {self.inference_ms.mean():6.1f} | "
+                         + self._tail(self.inference_max_ms, self.inference_ms))
+            lines.append(f"  CPU (%):        now {self.cpu.last():6.1f} | avg {self.cpu.mean():6.1f}")
+            lines.append(f"  Memory (MB):    now {self.memory_mb.last():6.1f} | max {self.memory_mb.percentile(100):6.1f}")
+            lines.append(f"  Samples:        {self.fps.count}")
+        lines.append("")
+
+        lines.append("[RECOGNITION]")
+        total = self.total_recognized + self.total_unknown
+        if total == 0:
+            lines.append("  (Belum ada recognition event)")
+        else:
+            lines.append(f"  Recognition rate (window): {self.outcomes.mean() * 100:5.1f}%")
+            lines.append(f"  Recognized / Unknown:      {self.total_recognized} / {self.total_unknown}")
+            lines.append(f"  Events/min:                {self.events_per_minute():.1f}")
+            lines.append(f"  Similarity avg / p99:      {self.similarity.mean():.3f} / "
+                         f"{self.similarity.percentile(99):.3f}")
+            lines.append(f"  Last recognized:           {self.last_name or '-'}")
+        lines.append("")
+        lines.append("Tekan Ctrl+C untuk keluar.")
+        return "\n".join(lines)
+
+    def run(self, rate: float = 2.0):
+        """
+        Loop utama: poll stream dan redraw pada rate tetap.
+
+        Args:
+            rate: Redraw per detik
+        """
+        if os.name == 'nt':
+            # Enable ANSI escape codes di Windows console
+            os.system('')
+
+        interval = 1.0 / max(rate, 0.1)
+        next_draw = time.time()
+
+        try:
+            while True:
+                self.poll()
+                sys.stdout.write("\033[H\033[J" + self.render() + "\n")
+                sys.stdout.flush()
+
+                next_draw += interval
+                delay = next_draw - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Tertinggal (terminal lambat) -> jangan kejar ketertinggalan
+                    next_draw = time.time()
+        except KeyboardInterrupt:
+            print("\n[*] Dashboard ditutup.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live dashboard untuk performance & recognition log.")
+    parser.add_argument("--perf-log", type=str, default="logs/performance.log")
+    parser.add_argument("--recog-log", type=str, default="logs/recognition.log")
+    parser.add_argument("--rate", type=float, default=2.0, help="Redraw per detik")
+    parser.add_argument("--window", type=int, default=300, help="Jumlah sample untuk rolling aggregate")
+    parser.add_argument("--from-start", action="store_true", help="Baca log dari awal file (bukan hanya data baru)")
+    args = parser.parse_args()
+
+    dashboard = LiveDashboard(perf_log=args.perf_log,
+                              recog_log=args.recog_log,
+                              window=args.window,
+                              from_start=args.from_start)
+    dashboard.run(rate=args.rate)
+
+
+if __name__ == "__main__":
+    main()
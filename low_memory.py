@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Low-Memory Mode untuk Face Recognition System (board 1-2 GB)
+Default build_face_app memakai arena allocator ORT (buffer tumbuh ke ukuran puncak
+dan tidak dikembalikan ke OS) dan FaceDB.load membuat salinan float32 gallery yang
+sudah dinormalisasi. Ditambah stack QR dan GUI cv2, board 1 GB mulai swap.
+
+Low-memory mode (LOW_MEMORY di main.py, --low-memory di CLI):
+- Hanya module detection + recognition (preset "recognize")
+- ORT: CPU memory arena & memory pattern off (buffer dialokasikan per run lalu
+  dilepas; sedikit lebih lambat, puncak RSS jauh lebih rendah)
+- Setelah model di-load, heap yang sudah di-free (graph protobuf, buffer optimasi)
+  dikembalikan ke OS dengan malloc_trim (glibc)
+- Gallery di-memory-map (np.load mmap_mode='r'): halaman file dibaca saat matching
+  dan bisa di-evict kernel, bukan salinan anonymous di heap
+- Model tambahan (cascade, inference worker) tidak di-load
+
+Breakdown memory per komponen (model per module, gallery, buffer embedding, slot
+frame) dicatat ke PerformanceMonitor (record_memory) dan tampil di summary.
+"""
+
+import os
+import ctypes
+import ctypes.util
+from typing import Dict, Optional
+
+import numpy as np
+
+LOW_MEMORY_MODULES = "recognize"
+
+
+def rss_mb() -> float:
+    """RSS proses ini (MB); 0 jika psutil tidak tersedia"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        return 0.0
+
+
+def trim_heap() -> bool:
+    """Kembalikan heap yang sudah di-free ke OS (glibc malloc_trim); False jika tidak didukung"""
+    libc_name = ctypes.util.find_library("c")
+    if not libc_name:
+        return False
+    try:
+        libc = ctypes.CDLL(libc_name)
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
+
+
+NORM_SAMPLE_ROWS = 256  # Baris yang dicek jika gallery tidak punya marker normalized
+
+
+def _marker_path(emb_path: str) -> str:
+    return f"{emb_path}.normalized"
+
+
+def _file_signature(emb_path: str) -> str:
+    st = os.stat(emb_path)
+    return f"{st.st_size} {st.st_mtime_ns}"
+
+
+def mark_normalized(emb_path: str):
+    """
+    Tandai file gallery sebagai L2-normalized (dipanggil setelah file ditulis)
+
+    Marker berisi ukuran + mtime file; file yang kemudian ditimpa / di-copy tool lain
+    tidak cocok lagi dan dicek ulang lewat sampel baris.
+    """
+    with open(_marker_path(emb_path), "w") as f:
+        f.write(_file_signature(emb_path))
+
+
+def clear_normalized(emb_path: str):
+    """Hapus marker (sebelum file gallery ditimpa / dihapus)"""
+    try:
+        os.remove(_marker_path(emb_path))
+    except FileNotFoundError:
+        pass
+
+
+def _is_marked_normalized(emb_path: str) -> bool:
+    try:
+        with open(_marker_path(emb_path)) as f:
+            return f.read().strip() == _file_signature(emb_path)
+    except OSError:
+        return False
+
+
+def load_gallery_mmap(emb_path: str) -> Optional[np.ndarray]:
+    """
+    Gallery sebagai memmap read-only
+
+    Normalisasi dicek dari marker yang ditulis FaceDB.add; tanpa marker hanya
+    NORM_SAMPLE_ROWS baris (tersebar rata) yang dibaca, bukan seluruh file.
+
+    Returns:
+        np.memmap (N, D) float32, atau None jika file tidak bisa di-map langsung
+        (dtype bukan float32 / baris belum L2-normalized -> pakai load biasa)
+    """
+    embs = np.load(emb_path, mmap_mode='r')
+    if embs.dtype != np.float32 or embs.ndim != 2:
+        return None
+    if len(embs) == 0 or _is_marked_normalized(emb_path):
+        return embs
+    # File lama / ditulis tool lain: cek sampel baris saja (tanpa temporary N x D)
+    rows = np.unique(np.linspace(0, len(embs) - 1, min(len(embs), NORM_SAMPLE_ROWS)).astype(np.int64))
+    norms = np.linalg.norm(embs[rows], axis=1)
+    if np.abs(norms - 1.0).max() > 1e-3:
+        return None
+    return embs
+
+
+def component_memory(app=None, embs: Optional[np.ndarray] = None, inference_pool=None) -> Dict[str, float]:
+    """
+    Memory per komponen (MB) untuk PerformanceMonitor.record_memory
+
+    - model:<module>  : kenaikan RSS saat session module di-load (app.load_report)
+    - gallery / gallery_mmap : ukuran array embedding (mmap = file-backed, bisa di-evict)
+    - embed_buffers   : buffer BatchEmbedder (crop, input, output)
+    - frame_slots     : shared memory slot inference pool
+    """
+    components = {}
+    report = getattr(app, "load_report", None) or {}
+    for task, mb in report.get('memory_mb', {}).items():
+        components[f"model:{task}"] = round(mb, 1)
+
+    if embs is not None:
+        key = "gallery_mmap" if isinstance(embs, np.memmap) else "gallery"
+        components[key] = round(embs.nbytes / 1024 / 1024, 2)
+
+    rec_model = getattr(app, "models", {}).get("recognition") if app is not None else None
+    embedder = getattr(rec_model, "batch_embedder", None)
+    if embedder is not None:
+        buffers = [embedder.crops, embedder.inputs, embedder.outputs]
+        components["embed_buffers"] = round(sum(b.nbytes for b in buffers if b is not None) / 1024 / 1024, 2)
+
+    if inference_pool is not None and inference_pool.shm is not None:
+        components["frame_slots"] = round(inference_pool.shm.size / 1024 / 1024, 1)
+    return components
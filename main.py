@@ -14,6 +14,8 @@ from facegate_insightface import (
     open_camera
 )
 from logger import get_logger
+from thread_budget import apply_budget
+from model_preload import ModelPreloader, warmup_app
 
 # Try to import QR manager (optional - may fail if DLLs missing)
 try:
@@ -29,10 +31,12 @@ except Exception as e:
 logger = get_logger()
 
 
-def print_menu(cam_index):
+def print_menu(cam_index, model_status=None):
     print("\n" + "="*50)
     print("  FACE RECOGNITION SYSTEM - InsightFace")
     print("="*50)
+    if model_status:
+        print(f"Model: {model_status}")
     print("1. Enroll (Daftarkan wajah baru)")
     print("2. Recognize (Kenali wajah)")
     print(f"3. Switch Camera (Saat ini: Camera {cam_index})")
@@ -243,6 +247,41 @@ def main():
     MIN_DET_SCORE = 0.6
     SAMPLES = 10
     THRESHOLD = 0.35
+    PIPELINED = False  # True = capture/detect/match/render paralel (lihat pipeline.py)
+    INFERENCE_WORKERS = 0  # >0 = recognize dengan N worker process (lihat inference_pool.py)
+    TRACKING = True  # Face tracking: embedding sekali per track (lihat face_tracker.py)
+    MODEL_MODULES = "recognize"  # Module InsightFace: recognize (det+rec), enroll, full (lihat model_loader.py)
+    ORT_INTRA_THREADS = 0  # ONNX Runtime thread per operator (0 = default ORT)
+    ORT_INTER_THREADS = 0  # ONNX Runtime thread antar operator (hanya untuk "parallel")
+    ORT_EXECUTION_MODE = "sequential"  # "sequential" / "parallel"
+    ORT_GRAPH_OPT = "all"  # "disable" / "basic" / "extended" / "all"
+    MODEL_PRECISION = "fp32"  # "int8" = model hasil quantize_models.py (validasi dulu: bench_quantized.py)
+    MODEL_CACHE = True  # Cache graph hasil optimasi ORT di models/.ort_cache (lihat ort_session.py)
+    MODEL_BACKEND = "ort"  # "ort" / "opencv" / "auto" (hasil bench_backends.py --save, lihat inference_backend.py)
+    MOTION_GATING = True  # Detection hanya saat ada motion (lihat motion_gate.py)
+    STANDBY_AFTER = 30.0  # Detik tanpa motion/wajah sebelum standby (None = nonaktif)
+    ROI_DETECTION = True  # Re-detection hanya di sekitar wajah sebelumnya (lihat roi_detector.py)
+    FULL_SWEEP_INTERVAL = 1.0  # Detik antar full-frame sweep (wajah baru) saat ROI detection aktif
+    DETECT_WIDTH = None  # e.g. 640 + WIDTH/HEIGHT 1280x720: detection di frame kecil, embedding dari frame penuh
+    QUALITY_GATE = False  # True = wajah kecil (< 40 px)/blur/menyamping tidak di-embed; orang yang berdiri jauh ikut tidak dikenali (lihat face_quality.py)
+    CASCADE_MODEL = None  # e.g. "buffalo_s": tier cepat, MODEL_NAME hanya jika ragu-ragu (lihat model_cascade.py)
+    TARGET_LATENCY_MS = 150.0  # Frame skip: target wajah muncul -> hasil tampil (lihat frame_scheduler.py)
+    THREAD_BUDGET = "default"  # Thread ORT/BLAS/OpenCV + affinity: "default" = library default; "auto" atau e.g. "ort=3,blas=1,opencv=1,cpus=0-3" setelah benchmark (lihat thread_budget.py)
+    AUTO_TUNE_PROFILE = "tune_profile.json"  # Hasil auto_tune.py: override DET_SIZE, thread, module, frame skip (None = nonaktif)
+    LOW_MEMORY = False  # Board 1-2 GB: arena ORT off, det+rec saja, gallery mmap (lihat low_memory.py)
+    BACKGROUND_LOAD = True  # Menu langsung tampil, model di-load di background (lihat model_preload.py)
+    MODEL_WARMUP = True  # Inference dummy setelah load supaya frame pertama tidak lambat
+    
+    if AUTO_TUNE_PROFILE:
+        from auto_tune import load_profile, profile_key
+        profile = load_profile(AUTO_TUNE_PROFILE, profile_key(MODEL_NAME, MODEL_PRECISION))
+        if profile:
+            DET_SIZE = profile.get("det_size", DET_SIZE)
+            ORT_INTRA_THREADS = profile.get("intra_op_threads", ORT_INTRA_THREADS)
+            MODEL_MODULES = profile.get("modules", MODEL_MODULES)
+            TARGET_LATENCY_MS = profile.get("target_latency_ms", TARGET_LATENCY_MS)
+            print(f"[*] Auto-tune profile: det_size={DET_SIZE} | threads={ORT_INTRA_THREADS} | "
+                  f"modules={MODEL_MODULES} | target latency {TARGET_LATENCY_MS:.0f} ms")
     
     print("\n[*] Memuat model InsightFace...")
     print(f"   Model: {MODEL_NAME}")
@@ -251,20 +290,57 @@ def main():
     
     logger.log_system(f"System started | Model: {MODEL_NAME} | Device: {DEVICE} | Camera: {CAM_INDEX}")
     
+    if LOW_MEMORY:
+        if CASCADE_MODEL:
+            print(f"[!] Low-memory mode: cascade {CASCADE_MODEL} dinonaktifkan (model kedua)")
+            CASCADE_MODEL = None
+        if INFERENCE_WORKERS > 0:
+            print("[!] Low-memory mode: inference worker dinonaktifkan (model di-load per worker)")
+            INFERENCE_WORKERS = 0
+    
     # Inisialisasi
-    db = FaceDB(DB_DIR)
+    db = FaceDB(DB_DIR, mmap=LOW_MEMORY)
+    app_kwargs = {"model_name": MODEL_NAME, "det_size": DET_SIZE, "device": DEVICE,
+                  "modules": MODEL_MODULES,
+                  "intra_op_threads": ORT_INTRA_THREADS, "inter_op_threads": ORT_INTER_THREADS,
+                  "execution_mode": ORT_EXECUTION_MODE, "graph_opt_level": ORT_GRAPH_OPT,
+                  "model_cache": MODEL_CACHE, "precision": MODEL_PRECISION,
+                  "backend": MODEL_BACKEND, "low_memory": LOW_MEMORY}
+    thread_budget = apply_budget(THREAD_BUDGET, app_kwargs, workers=INFERENCE_WORKERS)
     
-    try:
-        app = build_face_app(model_name=MODEL_NAME, det_size=DET_SIZE, device=DEVICE)
-        logger.log_model_load(MODEL_NAME, DEVICE, success=True)
+    def load_models(progress):
+        # Background: log per model dimatikan supaya tidak menimpa prompt menu
+        verbose = not BACKGROUND_LOAD
+        try:
+            app = build_face_app(**app_kwargs, verbose=verbose, progress=progress)
+            logger.log_model_load(MODEL_NAME, DEVICE, success=True)
+            fast_app = cascade = None
+            if CASCADE_MODEL:
+                from model_cascade import ModelCascade
+                fast_app = build_face_app(**dict(app_kwargs, model_name=CASCADE_MODEL, modules="recognize"),
+                                          verbose=verbose, progress=progress)
+                cascade = ModelCascade(fast_app, app, db, fast_model=CASCADE_MODEL, threshold=THRESHOLD)
+                logger.log_model_load(CASCADE_MODEL, DEVICE, success=True)
+        except Exception as e:
+            logger.log_model_load(MODEL_NAME, DEVICE, success=False)
+            logger.log_error("ModelLoadError", str(e))
+            raise
+        if MODEL_WARMUP:
+            progress("warm-up")
+            warmup_app(app, frame_size=(WIDTH, HEIGHT))
+            if fast_app is not None:
+                warmup_app(fast_app, detection=False)  # Tier cepat: hanya recognition yang dipakai
+        return app, cascade
+    
+    models = ModelPreloader(load_models).start(background=BACKGROUND_LOAD)
+    if not BACKGROUND_LOAD:
+        models.wait()  # Error load tetap fatal seperti sebelumnya
         print("[OK] Model berhasil dimuat!\n")
-    except Exception as e:
-        logger.log_model_load(MODEL_NAME, DEVICE, success=False)
-        logger.log_error("ModelLoadError", str(e))
-        raise
+    
+    inference_pool = None  # Dibuat saat recognize pertama (model di-load di setiap worker)
     
     while True:
-        print_menu(CAM_INDEX)
+        print_menu(CAM_INDEX, models.status())
         choice = input(f"\nPilih menu (1-4): ").strip()
         
         if choice == "1":
@@ -322,6 +398,8 @@ def main():
             input("Tekan ENTER untuk mulai...")
             
             try:
+                app, cascade = models.wait()
+                
                 # Enroll face (returns embedding index)
                 temp_label = f"{parent_name}_{student['nama']}_{student['kelas']}"
                 
@@ -334,7 +412,8 @@ def main():
                     height=HEIGHT,
                     samples=SAMPLES,
                     min_det_score=MIN_DET_SCORE,
-                    save_snapshots=True
+                    save_snapshots=True,
+                    cascade=cascade
                 )
                 
                 # Check if enrollment succeeded
@@ -379,6 +458,17 @@ def main():
             input("Tekan ENTER untuk mulai...")
             
             try:
+                app, cascade = models.wait()
+                
+                if INFERENCE_WORKERS > 0 and inference_pool is None:
+                    from inference_pool import InferencePool
+                    inference_pool = InferencePool(
+                        num_workers=INFERENCE_WORKERS,
+                        frame_shape=(max(HEIGHT, 1080), max(WIDTH, 1920), 3),
+                        app_kwargs=app_kwargs,
+                        thread_budget=thread_budget
+                    ).start()
+                
                 recognize_mode(
                     app=app,
                     db=db,
@@ -386,7 +476,18 @@ def main():
                     width=WIDTH,
                     height=HEIGHT,
                     threshold=THRESHOLD,
-                    min_det_score=MIN_DET_SCORE
+                    min_det_score=MIN_DET_SCORE,
+                    pipelined=PIPELINED,
+                    inference_pool=inference_pool,
+                    tracking=TRACKING,
+                    motion_gating=MOTION_GATING,
+                    standby_after=STANDBY_AFTER,
+                    detect_width=DETECT_WIDTH,
+                    roi_detection=ROI_DETECTION,
+                    full_sweep_interval=FULL_SWEEP_INTERVAL,
+                    quality_gate=QUALITY_GATE,
+                    cascade=cascade,
+                    target_latency_ms=TARGET_LATENCY_MS
                 )
             except Exception as e:
                 print(f"\n[X] Error saat recognition: {e}")
@@ -412,6 +513,8 @@ def main():
         
         elif choice == "5":
             print("\n[*] Terima kasih! Keluar dari program...")
+            if inference_pool is not None:
+                inference_pool.close()
             logger.log_system("System shutdown")
             sys.exit(0)
         
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Two-Tier Model Cascade untuk Face Recognition System
+--model memilih satu pack untuk semuanya, sehingga setiap wajah membayar latency
+ArcFace buffalo_l (R50) walaupun match-nya jelas.
+
+Cascade:
+1. Semua wajah di-embed dengan recognizer pack kecil (buffalo_s / buffalo_sc,
+   MobileFaceNet) dan di-match ke gallery pack kecil
+2. Keputusan tier cepat dipakai jika jelas:
+   - top-1 >= threshold + band_high dan margin top-1 - top-2 >= min_margin -> known
+   - top-1 <  threshold - band_low                                         -> unknown
+3. Sisanya (band ragu-ragu / margin tipis) di-embed ulang dengan recognizer model
+   utama (app, buffalo_l) dan di-match ke gallery utama (embeddings.npy)
+
+Detection tetap dari app utama; kedua recognizer memakai landmark yang sama.
+
+Gallery per model disimpan FaceDB (embeddings_<model>.npy, urutan baris sama dengan
+embeddings.npy). Enroll dengan cascade aktif mengisi keduanya; gallery lama yang
+belum punya versi pack kecil di-rebuild dari snapshot enroll:
+
+Usage:
+    python model_cascade.py --fast-model buffalo_s --rebuild
+    python facegate_insightface.py --mode recognize --cascade buffalo_s
+"""
+
+import os
+import glob
+import time
+import argparse
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from facegate_insightface import FaceDB, embed_with_model, l2_normalize, pick_largest_face
+from low_memory import mark_normalized, clear_normalized
+
+
+class ModelCascade:
+    """Recognizer pack kecil dulu, recognizer model utama hanya untuk match yang ragu-ragu"""
+
+    def __init__(self, fast_app, full_app, db: FaceDB,
+                 fast_model: str = "buffalo_s",
+                 threshold: float = 0.35,
+                 band_low: float = 0.10,
+                 band_high: float = 0.15,
+                 min_margin: float = 0.08):
+        """
+        Args:
+            fast_app: FaceAnalysis pack kecil (hanya model recognition yang dipakai)
+            full_app: FaceAnalysis model utama (app recognize_mode)
+            db: FaceDB; gallery utama + gallery fast_model
+            fast_model: Nama pack kecil (= nama gallery embeddings_<fast_model>.npy)
+            threshold: Cosine threshold 'known' (sama dengan recognize_mode)
+            band_low: Tier cepat memutuskan 'unknown' jika top-1 < threshold - band_low
+            band_high: Tier cepat memutuskan 'known' jika top-1 >= threshold + band_high
+            min_margin: Margin top-1 - top-2 minimum untuk keputusan 'known' tier cepat
+        """
+        self.fast_rec = fast_app.models['recognition']
+        self.full_rec = full_app.models['recognition']
+        self.db = db
+        self.fast_model = fast_model
+        self.accept_known = threshold + band_high
+        self.accept_unknown = threshold - band_low
+        self.min_margin = min_margin
+
+        self.fast_embs = None
+        self.full_embs = None
+
+        # Waktu embedding per wajah (ms) per tier; dikalibrasi saat load_galleries, lalu EMA
+        self.fast_ms: Optional[float] = None
+        self.full_ms: Optional[float] = None
+
+        # Hasil process terakhir (untuk PerformanceMonitor)
+        self.last_faces = 0
+        self.last_escalated = 0
+        self.last_saved_ms = 0.0
+
+        # Stats
+        self.faces = 0
+        self.escalated = 0
+        self.saved_ms = 0.0
+
+    def load_galleries(self) -> bool:
+        """
+        Load gallery kedua tier (panggil saat recognize dimulai, setelah enroll terbaru)
+
+        Returns:
+            False jika gallery pack kecil tidak sinkron dengan gallery utama (cascade tidak boleh dipakai)
+        """
+        self.full_embs = self.db.load()
+        self.fast_embs = self.db.load(self.fast_model)
+        if len(self.fast_embs) != len(self.full_embs) or len(self.full_embs) == 0:
+            print(f"[!] Cascade nonaktif: gallery {self.fast_model} ({len(self.fast_embs)}) tidak sinkron "
+                  f"dengan gallery utama ({len(self.full_embs)}).")
+            print(f"    Rebuild: python model_cascade.py --fast-model {self.fast_model} --rebuild")
+            return False
+        self._calibrate()
+        return True
+
+    def _calibrate(self, runs: int = 3):
+        """Ukur waktu embedding satu wajah per tier (juga warm-up kedua session)"""
+        from insightface.app.common import Face
+        from insightface.utils import face_align
+
+        img = np.full((112, 112, 3), 127, dtype=np.uint8)
+        for tier, rec in (("fast", self.fast_rec), ("full", self.full_rec)):
+            times = []
+            for _ in range(runs):
+                probe = Face(bbox=np.array([0, 0, 112, 112], dtype=np.float32),
+                             kps=face_align.arcface_dst.copy(), det_score=1.0)
+                start = time.perf_counter()
+                embed_with_model(rec, [(img, probe)])
+                times.append((time.perf_counter() - start) * 1000.0)
+            setattr(self, f"{tier}_ms", float(np.median(times)))
+
+    @staticmethod
+    def _update_ms(current: Optional[float], seconds: float, n: int, alpha: float = 0.2) -> Optional[float]:
+        if n <= 0:
+            return current
+        per_face = seconds * 1000.0 / n
+        return per_face if current is None else current + alpha * (per_face - current)
+
+    @staticmethod
+    def _top2(feats: np.ndarray, gallery: np.ndarray):
+        """(idx top-1, sim top-1, sim top-2) per baris feats"""
+        feats = feats / (np.linalg.norm(feats, axis=1, keepdims=True) + 1e-12)
+        sims = feats @ gallery.T  # (k, N), gallery sudah L2 normalized
+        idx = np.argmax(sims, axis=1)
+        top1 = sims[np.arange(len(sims)), idx]
+        if sims.shape[1] < 2:
+            return idx, top1, np.full_like(top1, -1.0)
+        top2 = np.partition(sims, -2, axis=1)[:, -2]
+        return idx, top1, top2
+
+    def process(self, img: np.ndarray, faces: list) -> None:
+        """
+        Embedding + matching cascade untuk wajah satu frame
+
+        face.embedding diisi embedding tier terakhir dan face.match = (best_idx, best_sim)
+        terhadap gallery tier tersebut (dipakai recognize_faces tanpa matching ulang).
+        """
+        faces = [f for f in faces if f.embedding is None]
+        if not faces:
+            self.last_faces, self.last_escalated, self.last_saved_ms = 0, 0, 0.0
+            return
+
+        start = time.perf_counter()
+        embed_with_model(self.fast_rec, [(img, f) for f in faces])
+        self.fast_ms = self._update_ms(self.fast_ms, time.perf_counter() - start, len(faces))
+
+        feats = np.stack([f.embedding for f in faces]).astype(np.float32)
+        idx, top1, top2 = self._top2(feats, self.fast_embs)
+        decided = (top1 < self.accept_unknown) | (
+            (top1 >= self.accept_known) & (top1 - top2 >= self.min_margin))
+
+        escalate = []
+        for face, ok, i, sim in zip(faces, decided, idx, top1):
+            if ok:
+                face.match = (int(i), float(sim))
+            else:
+                face.embedding = None
+                escalate.append(face)
+
+        if escalate:
+            start = time.perf_counter()
+            embed_with_model(self.full_rec, [(img, f) for f in escalate])
+            self.full_ms = self._update_ms(self.full_ms, time.perf_counter() - start, len(escalate))
+            feats = np.stack([f.embedding for f in escalate]).astype(np.float32)
+            idx, top1, _ = self._top2(feats, self.full_embs)
+            for face, i, sim in zip(escalate, idx, top1):
+                face.match = (int(i), float(sim))
+
+        # Saved = biaya "selalu model utama" - biaya cascade (bisa negatif jika sering eskalasi)
+        n, n_esc = len(faces), len(escalate)
+        saved = (n - n_esc) * (self.full_ms or 0.0) - n * (self.fast_ms or 0.0)
+        self.last_faces, self.last_escalated, self.last_saved_ms = n, n_esc, saved
+        self.faces += n
+        self.escalated += n_esc
+        self.saved_ms += saved
+
+    def embed_fast(self, img: np.ndarray, face) -> np.ndarray:
+        """Embedding tier cepat untuk wajah yang sudah dideteksi (enroll); face tidak diubah"""
+        from insightface.app.common import Face
+        probe = Face(bbox=face.bbox, kps=face.kps, det_score=face.det_score)
+        embed_with_model(self.fast_rec, [(img, probe)])
+        return probe.embedding
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.faces if self.faces else 0.0
+
+    def get_stats(self) -> Dict:
+        return {
+            'fast_model': self.fast_model,
+            'faces': self.faces,
+            'escalated': self.escalated,
+            'escalation_rate': round(self.escalation_rate, 3),
+            'fast_ms_per_face': round(self.fast_ms or 0.0, 2),
+            'full_ms_per_face': round(self.full_ms or 0.0, 2),
+            'saved_ms': round(self.saved_ms, 1),
+        }
+
+
+def snapshot_dir(db: FaceDB, parent: Dict) -> str:
+    """Folder snapshot enroll untuk parent (label main.py: ortu_anak_kelas)"""
+    label = f"{parent['nama_ortu']}_{parent['nama_anak']}_{parent['kelas']}"
+    return os.path.join(db.db_dir, "snapshots", label.replace(" ", "_"))
+
+
+def rebuild_gallery(db: FaceDB, student_db, fast_app, fast_model: str,
+                    min_det_score: float = 0.6) -> bool:
+    """
+    Bangun embeddings_<fast_model>.npy dari snapshot enroll, urutan = gallery utama
+
+    Setiap embedding_index di-map ke parent (students.db) -> folder snapshot; embedding =
+    rata-rata embedding wajah terbesar di setiap snapshot (sama dengan enroll_mode).
+    Gallery hanya ditulis jika SEMUA index punya snapshot (gallery parsial tidak sinkron).
+    """
+    total = db.gallery_size()
+    if total == 0:
+        print("[X] Gallery utama kosong.")
+        return False
+
+    rows, missing = [], []
+    for index in range(total):
+        parent = student_db.get_parent_by_index(index)
+        files = sorted(glob.glob(os.path.join(snapshot_dir(db, parent), "*.jpg"))) if parent else []
+        collected = []
+        for fn in files:
+            img = cv2.imread(fn)
+            face = pick_largest_face(fast_app.get(img)) if img is not None else None
+            if face is not None and float(face.det_score) >= min_det_score:
+                collected.append(face.normed_embedding.astype(np.float32))
+        if not collected:
+            missing.append(index)
+            continue
+        rows.append(l2_normalize(np.mean(np.stack(collected), axis=0)))
+        print(f"[*] Index {index}: {len(collected)} snapshot")
+
+    if missing:
+        print(f"[X] Tidak ada snapshot yang bisa dipakai untuk index: {missing}")
+        print("    Enroll ulang orang tersebut, atau jalankan tanpa cascade.")
+        return False
+
+    clear_normalized(db.gallery_path(fast_model))
+    np.save(db.gallery_path(fast_model), np.stack(rows).astype(np.float32))
+    mark_normalized(db.gallery_path(fast_model))
+    print(f"[OK] Gallery {fast_model}: {len(rows)} embedding -> {db.gallery_path(fast_model)}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gallery untuk two-tier model cascade.")
+    parser.add_argument("--fast-model", type=str, default="buffalo_s", help="Pack kecil (tier cepat)")
+    parser.add_argument("--db", type=str, default="face_db", help="DB folder")
+    parser.add_argument("--students", type=str, default="students.db", help="SQLite student database")
+    parser.add_argument("--det", type=int, default=640, help="det_size untuk deteksi snapshot")
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Bangun ulang gallery pack kecil dari snapshot enroll")
+    args = parser.parse_args()
+
+    db = FaceDB(args.db)
+    size, fast_size = db.gallery_size(), db.gallery_size(args.fast_model)
+    print(f"[*] Gallery utama: {size} | {args.fast_model}: {fast_size} "
+          f"({'sinkron' if size == fast_size else 'TIDAK sinkron'})")
+    if not args.rebuild:
+        return
+
+    from facegate_insightface import build_face_app
+    from student_database import StudentDatabase
+    fast_app = build_face_app(model_name=args.fast_model, det_size=args.det)
+    rebuild_gallery(db, StudentDatabase(args.students), fast_app, args.fast_model, min_det_score=args.min_det)
+
+
+if __name__ == "__main__":
+    main()
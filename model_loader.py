@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selective Model Loader untuk Face Recognition System
+Load hanya module InsightFace yang dipakai gate.
+
+FaceAnalysis(name=...) membuat InferenceSession untuk SEMUA file .onnx di model pack
+(termasuk genderage, 1k3d68, 2d106det), bahkan dengan allowed_modules session tetap
+dibuat dulu baru dibuang. Semua module lalu dijalankan untuk setiap wajah di app.get,
+padahal pipeline hanya memakai bbox, det_score, dan normed_embedding.
+
+Loader ini menentukan task dari nama file (tanpa membuat session), lalu hanya
+memanggil model_zoo.get_model untuk module yang dipilih.
+
+Session ONNX dibuat dengan SessionOptions dari parameter (thread, execution mode,
+graph optimization level) dan graph hasil optimasi di-cache (lihat ort_session.py).
+Detection / recognition bisa dijalankan dengan OpenCV DNN (lihat inference_backend.py).
+
+Preset:
+    recognize - detection + recognition (default, cukup untuk enroll & recognize)
+    enroll    - + landmark 3D 68 & gender/age (atribut tambahan saat pendaftaran)
+    full      - semua module (perilaku FaceAnalysis asli)
+"""
+
+import os
+import glob
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+MODULE_DETECTION = "detection"
+MODULE_RECOGNITION = "recognition"
+MODULE_LANDMARK_3D = "landmark_3d_68"
+MODULE_LANDMARK_2D = "landmark_2d_106"
+MODULE_GENDERAGE = "genderage"
+
+ALL_MODULES = (MODULE_DETECTION, MODULE_RECOGNITION, MODULE_LANDMARK_3D,
+               MODULE_LANDMARK_2D, MODULE_GENDERAGE)
+
+MODULE_PRESETS: Dict[str, tuple] = {
+    "recognize": (MODULE_DETECTION, MODULE_RECOGNITION),
+    "enroll": (MODULE_DETECTION, MODULE_RECOGNITION, MODULE_LANDMARK_3D, MODULE_GENDERAGE),
+    "full": ALL_MODULES,
+}
+
+# Potongan nama file -> task (model pack InsightFace: buffalo_l/m/s/sc, antelopev2)
+FILENAME_HINTS = (
+    (("det_", "scrfd", "retinaface"), MODULE_DETECTION),
+    (("w600k", "glintr", "arcface", "webface"), MODULE_RECOGNITION),
+    (("1k3d68",), MODULE_LANDMARK_3D),
+    (("2d106",), MODULE_LANDMARK_2D),
+    (("genderage",), MODULE_GENDERAGE),
+)
+
+
+def resolve_modules(modules: Union[str, Sequence[str], None]) -> tuple:
+    """
+    Preset name ("recognize"), daftar dipisah koma ("detection,recognition"),
+    atau list -> tuple nama module
+
+    Detection selalu disertakan (FaceAnalysis.get membutuhkan det_model).
+    """
+    if modules is None:
+        modules = "recognize"
+    if isinstance(modules, str):
+        if modules in MODULE_PRESETS:
+            selected = MODULE_PRESETS[modules]
+        else:
+            selected = tuple(m.strip() for m in modules.split(",") if m.strip())
+    else:
+        selected = tuple(modules)
+
+    unknown = [m for m in selected if m not in ALL_MODULES]
+    if unknown:
+        raise ValueError(f"Module tidak dikenal: {unknown}. "
+                         f"Pilihan: {list(MODULE_PRESETS)} atau {list(ALL_MODULES)}")
+    if MODULE_DETECTION not in selected:
+        selected = (MODULE_DETECTION,) + selected
+    return selected
+
+
+def guess_task(onnx_file: str) -> Optional[str]:
+    """Tebak task dari nama file; None jika tidak dikenali"""
+    name = os.path.basename(onnx_file).lower()
+    for hints, task in FILENAME_HINTS:
+        if any(h in name for h in hints):
+            return task
+    return None
+
+
+def build_selected_face_app(model_dir: str,
+                            modules: Union[str, Sequence[str], None] = "recognize",
+                            providers: Optional[List[str]] = None,
+                            verbose: bool = True,
+                            session_options: Optional[Dict] = None,
+                            cache_dir: Optional[str] = None,
+                            backends: Optional[Dict[str, str]] = None,
+                            progress: Optional[Callable[[str], None]] = None):
+    """
+    Buat FaceAnalysis yang hanya berisi module terpilih (belum di-prepare)
+
+    Args:
+        model_dir: Folder model pack (berisi file .onnx)
+        modules: Preset / daftar module (lihat resolve_modules)
+        providers: ONNX Runtime execution providers
+        session_options: kwargs ort_session.make_session_options (intra_op_threads,
+                         inter_op_threads, execution_mode, graph_opt_level)
+        cache_dir: Folder optimized model cache (None = tanpa cache)
+        backends: Backend per module, e.g. {"detection": "opencv"} (lihat
+                  inference_backend.resolve_backends); module lain selalu ORT
+        progress: Dipanggil dengan nama file sebelum setiap model di-load (lihat
+                  model_preload.py)
+
+    Returns:
+        FaceAnalysis (panggil app.prepare(...) setelahnya); app.load_report berisi
+        startup time, state cache, dan kenaikan RSS (memory_mb) per model
+    """
+    from insightface.app import FaceAnalysis
+    from insightface.model_zoo import model_zoo
+    from low_memory import rss_mb
+
+    cache = None
+    custom_session = session_options is not None or cache_dir is not None
+    if custom_session:
+        from ort_session import OptimizedModelCache, load_model
+        cache = OptimizedModelCache(cache_dir) if cache_dir else None
+
+    selected = resolve_modules(modules)
+    onnx_files = sorted(glob.glob(os.path.join(model_dir, "*.onnx")))
+    if not onnx_files:
+        raise FileNotFoundError(f"Tidak ada file .onnx di: {model_dir}")
+
+    # Bypass FaceAnalysis.__init__ (yang membuat session untuk semua file)
+    app = FaceAnalysis.__new__(FaceAnalysis)
+    app.model_dir = model_dir
+    app.models = {}
+
+    start = time.perf_counter()
+    states = {}
+    memory = {}
+    for onnx_file in onnx_files:
+        task = guess_task(onnx_file)
+        if task is not None and task not in selected:
+            if verbose:
+                print(f"   skip: {os.path.basename(onnx_file)} ({task})")
+            continue
+
+        if progress is not None:
+            progress(f"load {os.path.basename(onnx_file)}")
+        # Nama file tidak dikenali -> terpaksa buat session untuk tahu task-nya
+        model_start = time.perf_counter()
+        rss_before = rss_mb()
+        if task is not None and (backends or {}).get(task) == "opencv":
+            from inference_backend import load_opencv_model
+            model, state = load_opencv_model(onnx_file,
+                                             num_threads=(session_options or {}).get("intra_op_threads") or 0)
+        elif custom_session:
+            model, state = load_model(onnx_file, providers=providers,
+                                      session_options=session_options, cache=cache)
+        else:
+            model, state = model_zoo.get_model(onnx_file, providers=providers), "uncached"
+        if model is None:
+            print(f"[!] {os.path.basename(onnx_file)} bukan model InsightFace, di-skip")
+            continue
+        if model.taskname not in selected or model.taskname in app.models:
+            del model
+            continue
+        if verbose:
+            print(f"   load: {os.path.basename(onnx_file)} ({model.taskname}, {state}, "
+                  f"{time.perf_counter() - model_start:.2f} s)")
+        app.models[model.taskname] = model
+        states[model.taskname] = state
+        memory[model.taskname] = max(0.0, rss_mb() - rss_before)
+
+    if MODULE_DETECTION not in app.models:
+        raise RuntimeError(f"Model detection tidak ditemukan di: {model_dir}")
+    missing = [m for m in selected if m not in app.models]
+    if missing:
+        print(f"[!] Module tidak tersedia di model pack: {missing}")
+
+    app.det_model = app.models[MODULE_DETECTION]
+
+    # Startup dianggap warm jika tidak ada model yang dioptimasi ulang
+    startup = time.perf_counter() - start
+    kind = "cold" if "cold" in states.values() else ("warm" if "warm" in states.values() else "uncached")
+    app.load_report = {'startup_s': round(startup, 3), 'kind': kind, 'models': states,
+                       'memory_mb': {task: round(mb, 1) for task, mb in memory.items()}}
+    if cache is not None:
+        history = cache.record_startup(kind, startup) if kind != "uncached" else cache.startup_history()
+        cold = history.get('cold', {}).get('seconds')
+        warm = history.get('warm', {}).get('seconds')
+        app.load_report.update({'last_cold_s': cold, 'last_warm_s': warm})
+        if verbose:
+            print(f"[*] Model startup: {startup:.2f} s ({kind}) | "
+                  f"cold terakhir: {f'{cold:.2f} s' if cold is not None else '-'} | "
+                  f"warm terakhir: {f'{warm:.2f} s' if warm is not None else '-'}")
+    return app
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background Model Loading untuk Face Recognition System
+main.py dulu memanggil build_face_app (session ORT + optimasi graph) sebelum menu
+tampil, jadi menu QR dan switch camera yang tidak memakai model ikut menunggu.
+
+ModelPreloader menjalankan fungsi load di background thread dan mengembalikan
+hasilnya lewat concurrent.futures.Future:
+- Menu langsung tampil; status load (stage + detik) ditampilkan di menu
+- Hanya enroll & recognize yang memanggil wait() (progress ditampilkan sampai siap)
+- Error load disimpan di future dan di-raise saat wait(), menu lain tetap jalan
+- Thread daemon: exit saat load belum selesai tidak menunggu ORT
+
+warmup_app menjalankan inference dummy (detection di frame kosong + embedding satu
+crop template ArcFace) supaya frame pertama tidak menanggung alokasi buffer ORT,
+BatchEmbedder, dan IOBinding.
+"""
+
+import sys
+import time
+import threading
+from concurrent.futures import Future, wait as wait_futures
+from typing import Any, Callable, Tuple
+
+import numpy as np
+
+
+def warmup_app(app, frame_size: Tuple[int, int] = (640, 480), detection: bool = True, runs: int = 1) -> float:
+    """
+    Inference dummy di app yang sudah di-prepare
+
+    Args:
+        app: FaceAnalysis (build_face_app)
+        frame_size: (width, height) frame kamera
+        detection: False = embedding saja (misal tier cepat ModelCascade)
+        runs: Jumlah pengulangan
+
+    Returns:
+        Waktu warm-up (detik)
+    """
+    from facegate_insightface import embed_faces
+    from auto_tune import probe_faces
+
+    start = time.perf_counter()
+    frame = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+    for _ in range(runs):
+        if detection:
+            app.get(frame)  # Frame kosong: detection saja
+        embed_faces(app, probe_faces(1))
+    return time.perf_counter() - start
+
+
+class ModelPreloader:
+    """Load model di background thread; hasil lewat future"""
+
+    def __init__(self, load_fn: Callable[[Callable[[str], None]], Any], name: str = "Model"):
+        """
+        Args:
+            load_fn: load_fn(progress) -> hasil (misal (app, cascade)); panggil
+                     progress("stage") untuk update status
+            name: Nama untuk pesan status
+        """
+        self.load_fn = load_fn
+        self.name = name
+        self.future: Future = Future()
+        self.stage = "menunggu"
+        self.start_time = None
+        self.elapsed = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, background: bool = True) -> "ModelPreloader":
+        """Mulai load; background=False = load langsung di thread ini (perilaku lama)"""
+        self.start_time = time.perf_counter()
+        if not background:
+            self._run(notify=False)
+            return self
+        self._thread = threading.Thread(target=self._run, name="model-preload", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, notify: bool = True):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.load_fn(self.progress)
+        except Exception as e:
+            self.elapsed = time.perf_counter() - self.start_time
+            self.progress("gagal")
+            if notify:
+                print(f"\n[X] {self.name} gagal dimuat: {e}")
+            self.future.set_exception(e)
+            return
+        self.elapsed = time.perf_counter() - self.start_time
+        self.progress("siap")
+        if notify:
+            print(f"\n[OK] {self.name} siap ({self.elapsed:.1f} s)")
+        self.future.set_result(result)
+
+    def progress(self, stage: str):
+        """Update stage (dipanggil dari load_fn)"""
+        with self._lock:
+            self.stage = stage
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def status(self) -> str:
+        """Status singkat untuk menu, e.g. 'memuat (load det_10g.onnx, 2.1 s)'"""
+        with self._lock:
+            stage = self.stage
+        if not self.done():
+            waited = time.perf_counter() - self.start_time if self.start_time else 0.0
+            return f"memuat ({stage}, {waited:.1f} s)"
+        if self.future.exception() is not None:
+            return f"gagal ({self.future.exception()})"
+        return f"siap ({self.elapsed:.1f} s)"
+
+    def wait(self, poll: float = 0.5) -> Any:
+        """
+        Tunggu sampai load selesai, tampilkan progress
+
+        Returns:
+            Hasil load_fn
+
+        Raises:
+            Exception dari load_fn
+        """
+        if not self.done():
+            print(f"[*] Menunggu {self.name.lower()} selesai dimuat...")
+            while not self.done():
+                sys.stdout.write(f"\r    {self.status()}   ")
+                sys.stdout.flush()
+                wait_futures([self.future], timeout=poll)
+            sys.stdout.write("\n")
+        return self.future.result()
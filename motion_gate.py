@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motion Gate + Standby Mode untuk Face Recognition System
+Di luar jam jemput kamera hanya melihat koridor kosong. Detection (app.get)
+tidak perlu jalan jika tidak ada yang bergerak.
+
+- MotionGate: background subtraction (running average) pada frame grayscale kecil
+  (default lebar 160 px) -> biaya < 1 ms per frame
+- StandbyController: setelah quiet period tanpa motion/wajah, kamera diturunkan ke
+  resolusi & frame rate rendah; begitu ada motion, kamera dikembalikan dan
+  detection langsung dijalankan pada frame yang sama (wake dalam 1 frame)
+"""
+
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Frame-difference / background subtraction gate pada frame grayscale downscaled"""
+
+    def __init__(self,
+                 width: int = 160,
+                 pixel_threshold: int = 25,
+                 min_area: float = 0.005,
+                 learning_rate: float = 0.05):
+        """
+        Args:
+            width: Lebar frame kecil untuk analisis motion (tinggi mengikuti aspect ratio)
+            pixel_threshold: Selisih intensitas minimum untuk dianggap pixel bergerak
+            min_area: Fraksi pixel bergerak minimum untuk dianggap ada motion (0-1)
+            learning_rate: Kecepatan background beradaptasi (perubahan cahaya pelan)
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+
+        self.background: Optional[np.ndarray] = None
+        self.last_motion_ratio = 0.0
+
+        # Stats
+        self.checks = 0
+        self.motion_frames = 0
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        height = max(1, int(round(h * self.width / w)))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def update(self, frame: np.ndarray) -> bool:
+        """Update background dan return True jika ada motion di frame ini"""
+        gray = self._prepare(frame)
+        self.checks += 1
+
+        # Frame pertama / setelah resolusi kamera berubah: inisialisasi background
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.last_motion_ratio = 0.0
+            return False
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        moving = np.count_nonzero(diff > self.pixel_threshold)
+        self.last_motion_ratio = moving / diff.size
+        cv2.accumulateWeighted(gray.astype(np.float32), self.background, self.learning_rate)
+
+        motion = self.last_motion_ratio >= self.min_area
+        if motion:
+            self.motion_frames += 1
+        return motion
+
+    def reset(self):
+        self.background = None
+
+
+class StandbyController:
+    """
+    Turunkan capture ke mode standby setelah quiet period, bangun saat ada motion
+
+    Standby: resolusi & FPS kamera diturunkan (cap.set) dan loop di-throttle ke standby_fps.
+    Dengan LatestFrameGrabber, cap.set diantrikan dan dijalankan oleh capture thread
+    (VideoCapture tidak di-set bersamaan dengan read).
+    """
+
+    def __init__(self, cap,
+                 quiet_period: float = 30.0,
+                 active_size=(640, 480),
+                 standby_size=(320, 240),
+                 standby_fps: float = 5.0):
+        """
+        Args:
+            cap: Capture (cv2.VideoCapture / LatestFrameGrabber / SyntheticCamera)
+            quiet_period: Detik tanpa motion/wajah sebelum masuk standby (None/0 = nonaktif)
+            active_size: (width, height) capture normal
+            standby_size: (width, height) capture saat standby
+            standby_fps: Rate loop (dan request FPS kamera) saat standby
+        """
+        self.cap = cap
+        self.quiet_period = quiet_period
+        self.active_size = active_size
+        self.standby_size = standby_size
+        self.standby_fps = standby_fps
+
+        self.standby = False
+        self.last_activity = time.time()
+        self._active_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self._last_frame_time = 0.0
+
+        # Stats
+        self.standby_entries = 0
+        self.standby_seconds = 0.0
+        self._standby_since = 0.0
+
+    def mark_activity(self):
+        """Panggil saat ada motion atau wajah"""
+        self.last_activity = time.time()
+
+    def check_enter(self) -> bool:
+        """Masuk standby jika quiet period terlewati; return True saat transisi terjadi"""
+        if self.standby or not self.quiet_period:
+            return False
+        if time.time() - self.last_activity < self.quiet_period:
+            return False
+
+        self.standby = True
+        self.standby_entries += 1
+        self._standby_since = time.time()
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.standby_size[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.standby_size[1])
+        self.cap.set(cv2.CAP_PROP_FPS, self.standby_fps)
+        return True
+
+    def wake(self):
+        """Kembali ke capture normal (dipanggil begitu motion terdeteksi)"""
+        if not self.standby:
+            return
+        self.standby = False
+        self.standby_seconds += time.time() - self._standby_since
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.active_size[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.active_size[1])
+        if self._active_fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self._active_fps)
+        self.mark_activity()
+
+    def throttle(self):
+        """Saat standby: tidur sampai frame berikutnya sesuai standby_fps"""
+        if not self.standby or self.standby_fps <= 0:
+            return
+        delay = 1.0 / self.standby_fps - (time.perf_counter() - self._last_frame_time)
+        if delay > 0:
+            time.sleep(delay)
+        self._last_frame_time = time.perf_counter()
+
+    def total_standby_seconds(self) -> float:
+        extra = time.time() - self._standby_since if self.standby else 0.0
+        return self.standby_seconds + extra
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-Camera Gate Service untuk Face Recognition System
+Satu proses melayani N kamera dengan satu instance model (FaceAnalysis) bersama,
+sehingga session ONNX tidak terduplikasi di RAM dan CPU tidak oversubscribed.
+
+Setiap scheduling round:
+1. Kamera di-poll round-robin (urutan mulai dirotasi setiap round -> fair);
+   setiap kamera maksimal 1 frame (terbaru) per round
+2. Detection per frame pada model bersama
+3. Recognition (ArcFace) di-batch: semua wajah dari semua kamera dalam satu forward
+   (wajah yang gagal FaceQualityGate tidak ikut di-embed)
+4. Matching + lookup per kamera; hasil, log, event, dan metric di-attribute ke kamera sumber
+
+Usage:
+    python multi_camera.py --cams 0,1,2
+    python multi_camera.py --cams 0,rtsp://10.0.0.5/stream --max-faces 12 --no-display
+"""
+
+import time
+import argparse
+from typing import Dict, List, Optional, Union
+
+import cv2
+
+from camera_grabber import LatestFrameGrabber
+from facegate_insightface import (
+    FaceDB,
+    build_face_app,
+    select_faces_smart,
+    detect_faces,
+    embed_faces,
+    recognize_faces,
+    draw_results,
+    open_camera,
+    logger,
+    PERF_MONITOR_AVAILABLE,
+    PerformanceMonitor,
+)
+from event_ring import RecognitionEventWriter
+from face_quality import FaceQualityGate
+
+
+class CameraSource:
+    """Satu kamera di GateService: capture, monitor, dan hasil terakhir"""
+
+    def __init__(self, cam_id: int, cap, name: Optional[str] = None):
+        """
+        Args:
+            cam_id: ID kamera (dipakai di log, event, dan metric)
+            cap: Frame source (cv2.VideoCapture / SyntheticCamera / LatestFrameGrabber)
+            name: Nama tampilan (default: "Camera <cam_id>")
+        """
+        self.cam_id = cam_id
+        self.name = name or f"Camera {cam_id}"
+        # Non-blocking poll butuh capture thread
+        self.cap = cap if isinstance(cap, LatestFrameGrabber) else LatestFrameGrabber(cap)
+        self.perf_monitor = PerformanceMonitor() if PERF_MONITOR_AVAILABLE else None
+        self.perf_logger = None
+        self.active = True
+        self.processed = 0      # Frame yang diproses
+        self.deferred = 0       # Round di mana kamera ditunda karena face budget habis
+        self.last_frame = None
+        self.last_result = None
+
+        if self.perf_monitor:
+            self.perf_monitor.start_frame()
+
+    def poll(self):
+        """Ambil frame terbaru tanpa blocking; return (frame, grab_ts) atau None"""
+        ok, frame, ts = self.cap.read_with_timestamp(timeout=0)
+        if not ok:
+            if not self.cap.isOpened():
+                self.active = False
+            return None
+        return frame, ts
+
+    def release(self):
+        self.cap.release()
+
+
+class GateService:
+    """
+    Satu model, N kamera
+
+    Fairness: urutan polling dirotasi setiap round dan setiap kamera maksimal
+    1 frame per round. Jika total wajah melebihi max_batch_faces, kamera sisanya
+    ditunda ke round berikutnya dan dipindah ke depan urutan round tersebut.
+    """
+
+    def __init__(self, app, db: FaceDB, sources: List[CameraSource],
+                 threshold: float = 0.35,
+                 min_det_score: float = 0.6,
+                 student_db=None,
+                 event_writer=None,
+                 max_batch_faces: int = 16,
+                 log_performance: bool = True,
+                 detect_width: Optional[int] = None,
+                 quality_gate: bool = False):
+        self.app = app
+        self.db = db
+        self.sources = sources
+        self.threshold = threshold
+        self.min_det_score = min_det_score
+        self.event_writer = event_writer
+        self.max_batch_faces = max_batch_faces
+        self.detect_width = detect_width  # Detection di frame kecil, embedding dari frame asli
+        # Wajah kecil/blur/menyamping tidak di-embed (gate bersama, stats per kamera di PerformanceMonitor)
+        self.quality_gate = FaceQualityGate(min_det_score=min_det_score) if quality_gate else None
+
+        self.embs = db.load()
+        if student_db is None:
+            from student_database import StudentDatabase
+            student_db = StudentDatabase("students.db")
+        self.student_db = student_db
+
+        self.rounds = 0
+        self.batches = 0
+        self.batched_faces = 0
+        self._rr = 0
+        self._deferred: List[CameraSource] = []  # Ditunda di round sebelumnya -> dilayani duluan
+
+        if log_performance and PERF_MONITOR_AVAILABLE:
+            try:
+                from performance_monitor import PerformanceLogger
+                for src in sources:
+                    src.perf_logger = PerformanceLogger(f"logs/performance_cam{src.cam_id}.log")
+            except Exception as e:
+                print(f"[!] Performance logging disabled: {e}")
+
+    @property
+    def active_sources(self) -> List[CameraSource]:
+        return [s for s in self.sources if s.active]
+
+    def step(self) -> int:
+        """
+        Jalankan satu scheduling round
+
+        Returns:
+            Jumlah frame yang diproses di round ini
+        """
+        active = self.active_sources
+        if not active:
+            return 0
+
+        # Rotasi urutan mulai -> tidak ada kamera yang selalu dilayani duluan;
+        # kamera yang ditunda round sebelumnya dipindah ke depan
+        start = self._rr % len(active)
+        rotated = active[start:] + active[:start]
+        deferred = [s for s in self._deferred if s in rotated]
+        order = deferred + [s for s in rotated if s not in deferred]
+        self._deferred = []
+        self._rr += 1
+        self.rounds += 1
+
+        # 1) Poll + detection per kamera (model bersama)
+        pending = []
+        face_budget = self.max_batch_faces
+        for src in order:
+            if face_budget <= 0:
+                src.deferred += 1
+                self._deferred.append(src)
+                continue
+
+            polled = src.poll()
+            if polled is None:
+                continue
+            frame, grab_ts = polled
+
+            det_start = time.perf_counter()
+            faces = detect_faces(self.app, frame, detect_width=self.detect_width)
+            det_time = time.perf_counter() - det_start
+
+            # Hanya wajah yang akan di-recognize (sama dengan recognize_faces) yang di-embed
+            selected, _ = select_faces_smart(faces) if faces else ([], "")
+            selected = [f for f in selected if float(f.det_score) >= self.min_det_score]
+            if self.quality_gate is not None and hasattr(self.app, "det_model"):
+                selected = self.quality_gate.filter(frame, selected)
+                if src.perf_monitor:
+                    src.perf_monitor.record_quality(self.quality_gate.last_checked, self.quality_gate.last_skipped,
+                                                    self.quality_gate.last_saved_ms)
+            face_budget -= len(selected)
+            pending.append((src, frame, grab_ts, faces, selected, det_time))
+
+        if not pending:
+            return 0
+
+        # 2) Recognition batch lintas kamera
+        items = [(frame, face) for _, frame, _, _, selected, _ in pending for face in selected]
+        embed_time = 0.0
+        # App tanpa det_model (fallback app.get) sudah mengisi embedding saat detection
+        if items and hasattr(self.app, "det_model"):
+            embed_start = time.perf_counter()
+            embed_faces(self.app, items)
+            embed_time = time.perf_counter() - embed_start
+            if self.quality_gate is not None:
+                self.quality_gate.record_embed(embed_time, len(items))
+            self.batches += 1
+            self.batched_faces += len(items)
+
+        # 3) Matching + lookup + metric per kamera
+        for src, frame, grab_ts, faces, selected, det_time in pending:
+            # Biaya batch dibagi proporsional ke jumlah wajah kamera ini
+            embed_share = embed_time * len(selected) / len(items) if items else 0.0
+
+            match_start = time.perf_counter()
+            results = recognize_faces(faces, self.embs, self.student_db,
+                                      threshold=self.threshold,
+                                      min_det_score=self.min_det_score,
+                                      cam_index=src.cam_id,
+                                      event_writer=self.event_writer)
+            match_time = time.perf_counter() - match_start
+
+            src.last_frame = frame
+            src.last_result = results if results else None
+            src.processed += 1
+
+            pm = src.perf_monitor
+            if pm:
+                pm.record_inference_time(det_time + embed_share)
+                pm.record_stage_time("detect", det_time)
+                pm.record_stage_time("embed", embed_share)
+                pm.record_stage_time("match", match_time)
+                pm.record_capture(src.cap.dropped, time.time() - grab_ts)
+                # FPS per kamera = rate frame kamera ini diproses
+                pm.end_frame()
+                pm.start_frame()
+                if src.perf_logger and src.processed % 30 == 0:
+                    try:
+                        src.perf_logger.log(pm)
+                    except Exception:
+                        pass  # Silent fail for logging
+
+        return len(pending)
+
+    def render(self, show_performance: bool = True):
+        """Tampilkan window per kamera (hasil terakhir kamera tersebut)"""
+        for src in self.sources:
+            if src.last_frame is None:
+                continue
+            disp = src.last_frame.copy()
+            draw_results(disp, src.last_result)
+            if show_performance and src.perf_monitor:
+                stats_text = src.perf_monitor.get_stats_string()
+                cv2.rectangle(disp, (5, disp.shape[0] - 35), (disp.shape[1] - 5, disp.shape[0] - 5),
+                              (0, 0, 0), -1)
+                cv2.putText(disp, stats_text, (10, disp.shape[0] - 15),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+            cv2.imshow(f"Gate - {src.name} - press q to quit", disp)
+
+    def run(self, display: bool = True, show_performance: bool = True,
+            max_rounds: Optional[int] = None):
+        """
+        Loop utama sampai 'q', semua kamera habis, atau max_rounds tercapai
+
+        Returns:
+            Dict stats per kamera (lihat get_stats)
+        """
+        print(f"\n[GATE SERVICE] {len(self.sources)} kamera, 1 model")
+        for src in self.sources:
+            print(f"   - {src.name} (id={src.cam_id})")
+        if display:
+            print("Tekan 'q' untuk keluar, 'p' untuk toggle performance stats.")
+        print()
+        logger.log_system(f"Gate service started | cameras={[s.cam_id for s in self.sources]}")
+
+        try:
+            while self.active_sources and (max_rounds is None or self.rounds < max_rounds):
+                processed = self.step()
+
+                if display:
+                    self.render(show_performance)
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
+                        break
+                    elif key == ord('p'):
+                        show_performance = not show_performance
+                elif processed == 0:
+                    # Belum ada frame baru di kamera mana pun
+                    time.sleep(0.001)
+        finally:
+            self.close()
+            if display:
+                cv2.destroyAllWindows()
+
+        self.print_stats()
+        return self.get_stats()
+
+    def close(self):
+        for src in self.sources:
+            src.release()
+
+    def get_stats(self) -> Dict:
+        stats = {
+            'rounds': self.rounds,
+            'batches': self.batches,
+            'avg_batch_faces': round(self.batched_faces / self.batches, 2) if self.batches else 0.0,
+            'cameras': {},
+        }
+        for src in self.sources:
+            cam = {'processed': src.processed, 'deferred': src.deferred,
+                   'grabbed': src.cap.grabbed, 'dropped': src.cap.dropped}
+            if src.perf_monitor:
+                cam.update(src.perf_monitor.get_stats())
+            stats['cameras'][src.cam_id] = cam
+        return stats
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print("\n" + "=" * 60)
+        print("  GATE SERVICE SUMMARY")
+        print("=" * 60)
+        print(f"Rounds: {stats['rounds']} | Batches: {stats['batches']} | "
+              f"Avg faces/batch: {stats['avg_batch_faces']}")
+        for cam_id, cam in stats['cameras'].items():
+            line = (f"[Cam {cam_id}] processed={cam['processed']} grabbed={cam['grabbed']} "
+                    f"dropped={cam['dropped']} deferred={cam['deferred']}")
+            if 'fps' in cam:
+                line += f" | {cam['fps']:.1f} FPS | inference {cam['avg_inference_ms']:.1f} ms"
+            print(line)
+        print("=" * 60)
+        logger.log_system(f"Gate service stopped | rounds={stats['rounds']} | batches={stats['batches']} | "
+                          + " | ".join(f"cam{c}={v['processed']}" for c, v in stats['cameras'].items()))
+
+
+def open_sources(specs: List[Union[int, str]], width: int = 1280, height: int = 720) -> List[CameraSource]:
+    """
+    Buka kamera dari daftar index (int) atau URL/path video (str)
+
+    ID kamera = index untuk webcam, posisi di daftar untuk URL/path.
+    """
+    sources = []
+    for pos, spec in enumerate(specs):
+        if isinstance(spec, str) and spec.isdigit():
+            spec = int(spec)
+        if isinstance(spec, int):
+            cap = open_camera(spec, width, height)
+            sources.append(CameraSource(spec, cap))
+        else:
+            cap = cv2.VideoCapture(spec)
+            if not cap.isOpened():
+                raise RuntimeError(f"Source {spec} cannot be opened.")
+            sources.append(CameraSource(pos, cap, name=str(spec)))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera gate service (satu model, N kamera).")
+    parser.add_argument("--cams", type=str, required=True,
+                        help="Daftar kamera dipisah koma: index webcam atau URL/path video (e.g., 0,1,2)")
+    parser.add_argument("--db", type=str, default="face_db", help="DB folder")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--device", type=str, default="cpu", choices=["cpu", "cuda"])
+    parser.add_argument("--w", type=int, default=640)
+    parser.add_argument("--h", type=int, default=480)
+    parser.add_argument("--det", type=int, default=320, help="det_size (square)")
+    parser.add_argument("--min_det", type=float, default=0.6)
+    parser.add_argument("--thr", type=float, default=0.35)
+    parser.add_argument("--max-faces", type=int, default=16, help="Maksimal wajah per recognition batch")
+    parser.add_argument("--detect-width", type=int, default=0,
+                        help="Detection pada frame yang di-downscale ke lebar ini (0 = nonaktif)")
+    parser.add_argument("--quality-gate", action="store_true",
+                        help="Wajah kecil/blur/menyamping tidak di-embed (lihat face_quality.py)")
+    parser.add_argument("--events", type=str, default="",
+                        help="Publish recognition events ke shared-memory ring dengan nama ini")
+    parser.add_argument("--no-display", action="store_true", help="Headless (tanpa window)")
+    parser.add_argument("--thread-budget", type=str, default="default",
+                        help="Thread ORT/BLAS/OpenCV: auto, default, atau e.g. ort=3,blas=1,opencv=1 (lihat thread_budget.py)")
+    args = parser.parse_args()
+
+    db = FaceDB(args.db)
+    embs = db.load()
+    if embs is None or len(embs) == 0:
+        print(f"DB kosong. Jalankan enroll dulu. (folder: {db.db_dir})")
+        return
+
+    from thread_budget import apply_budget
+    app_kwargs = {"model_name": args.model, "det_size": args.det, "device": args.device}
+    apply_budget(args.thread_budget, app_kwargs)
+    app = build_face_app(**app_kwargs)
+    sources = open_sources([c.strip() for c in args.cams.split(",") if c.strip()], args.w, args.h)
+    event_writer = RecognitionEventWriter(args.events) if args.events else None
+
+    try:
+        service = GateService(app, db, sources,
+                              threshold=args.thr,
+                              min_det_score=args.min_det,
+                              event_writer=event_writer,
+                              max_batch_faces=args.max_faces,
+                              detect_width=args.detect_width or None,
+                              quality_gate=args.quality_gate)
+        service.run(display=not args.no_display)
+    finally:
+        if event_writer is not None:
+            event_writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime Session Tuning + Optimized Model Cache untuk Face Recognition System
+
+model_zoo.get_model hanya meneruskan providers: thread count, execution mode, dan
+graph optimization level selalu default, dan setiap start ORT mengoptimasi ulang
+setiap graph dari awal.
+
+- make_session_options: SessionOptions dari parameter sederhana (CLI / main.py)
+- OptimizedModelCache: cold start -> ORT menyimpan graph yang sudah dioptimasi
+  (optimized_model_filepath) ke cache dir; warm start -> file cache di-load
+  langsung dengan optimasi dimatikan. Key cache: hash model + versi ORT +
+  optimization level + providers + arsitektur CPU + fingerprint instruction set
+  (graph level "all" berisi layout NCHWc yang block size-nya tergantung AVX2/AVX-512,
+  jadi cache dari mesin build tidak dipakai "warm" di gate dengan CPU berbeda).
+- load_model: session dari cache + routing ke wrapper InsightFace (sama dengan
+  model_zoo.ModelRouter); wrapper tetap diberi file .onnx asli karena ArcFace/
+  Landmark membaca graph asli untuk menentukan input mean/std.
+"""
+
+import os
+import json
+import time
+import hashlib
+import platform
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import onnxruntime as ort
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+GRAPH_OPT_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+def make_session_options(intra_op_threads: int = 0,
+                         inter_op_threads: int = 0,
+                         execution_mode: str = "sequential",
+                         graph_opt_level: str = "all",
+                         allow_spinning: bool = True,
+                         low_memory: bool = False) -> ort.SessionOptions:
+    """
+    Args:
+        intra_op_threads: Thread dalam satu operator (0 = default ORT, semua core fisik)
+        inter_op_threads: Thread antar operator, hanya dipakai execution_mode "parallel" (0 = default)
+        execution_mode: "sequential" atau "parallel"
+        graph_opt_level: "disable", "basic", "extended", atau "all"
+        allow_spinning: False = thread pool ORT tidur setelah run (tidak busy-wait memakai core
+                        yang dibutuhkan capture/BLAS/OpenCV; lihat thread_budget.py)
+        low_memory: Matikan CPU memory arena & memory pattern (lihat low_memory.py)
+    """
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"execution_mode tidak dikenal: {execution_mode}. Pilihan: {list(EXECUTION_MODES)}")
+    if graph_opt_level not in GRAPH_OPT_LEVELS:
+        raise ValueError(f"graph_opt_level tidak dikenal: {graph_opt_level}. Pilihan: {list(GRAPH_OPT_LEVELS)}")
+
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = intra_op_threads
+    so.inter_op_num_threads = inter_op_threads
+    so.execution_mode = EXECUTION_MODES[execution_mode]
+    so.graph_optimization_level = GRAPH_OPT_LEVELS[graph_opt_level]
+    if low_memory:
+        so.enable_cpu_mem_arena = False
+        so.enable_mem_pattern = False
+    if not allow_spinning:
+        so.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        so.add_session_config_entry("session.inter_op.allow_spinning", "0")
+    return so
+
+
+# Flag CPU yang mempengaruhi kernel / layout pilihan ORT (x86: SSE4/AVX/AMX, ARM: NEON/SVE)
+ISA_FLAG_PREFIXES = ("sse4", "avx", "fma", "f16c", "amx", "vnni", "bf16",
+                     "asimd", "neon", "sve", "dotprod", "i8mm", "fphp")
+
+
+@lru_cache(maxsize=1)
+def cpu_fingerprint() -> str:
+    """
+    Hash pendek instruction set CPU ini (flag /proc/cpuinfo; di luar Linux
+    platform.processor()), untuk key optimized model cache
+    """
+    features = set()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    features.update(flag for flag in value.split() if flag.startswith(ISA_FLAG_PREFIXES))
+    except OSError:
+        pass
+    ident = " ".join(sorted(features)) if features else platform.processor()
+    return hashlib.sha256(f"{platform.machine()}|{ident}".encode()).hexdigest()[:8]
+
+
+def route_model(onnx_file: str, session):
+    """Pilih wrapper InsightFace dari input/output session (logika model_zoo.ModelRouter)"""
+    from insightface.model_zoo.model_zoo import RetinaFace, Landmark, Attribute, ArcFaceONNX
+
+    input_shape = session.get_inputs()[0].shape
+    if len(session.get_outputs()) >= 5:
+        return RetinaFace(model_file=onnx_file, session=session)
+    if input_shape[2] == 192 and input_shape[3] == 192:
+        return Landmark(model_file=onnx_file, session=session)
+    if input_shape[2] == 96 and input_shape[3] == 96:
+        return Attribute(model_file=onnx_file, session=session)
+    if input_shape[2] == input_shape[3] and input_shape[2] >= 112 and input_shape[2] % 16 == 0:
+        return ArcFaceONNX(model_file=onnx_file, session=session)
+    return None
+
+
+class OptimizedModelCache:
+    """Cache graph ONNX yang sudah dioptimasi ORT (per model hash + versi ORT)"""
+
+    INDEX_FILE = "hashes.json"
+    STARTUP_FILE = "startup.json"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._read_json(self.INDEX_FILE)
+
+    def _read_json(self, name: str) -> Dict:
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, name: str, data: Dict):
+        path = os.path.join(self.cache_dir, name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+    def model_hash(self, onnx_file: str) -> str:
+        """
+        SHA-256 file model; di-memo per (path, size, mtime) supaya warm start
+        tidak membaca ulang file model ratusan MB
+        """
+        st = os.stat(onnx_file)
+        key = os.path.abspath(onnx_file)
+        entry = self._index.get(key)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['sha256']
+
+        h = hashlib.sha256()
+        with open(onnx_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        self._index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': h.hexdigest()}
+        self._write_json(self.INDEX_FILE, self._index)
+        return self._index[key]['sha256']
+
+    def cache_path(self, onnx_file: str, graph_opt_level: str, providers: Optional[List[str]]) -> str:
+        stem = os.path.splitext(os.path.basename(onnx_file))[0]
+        ep = (providers or ["CPUExecutionProvider"])[0].replace("ExecutionProvider", "").lower()
+        name = (f"{stem}-{self.model_hash(onnx_file)[:16]}-ort{ort.__version__}"
+                f"-{graph_opt_level}-{ep}-{platform.machine().lower()}-{cpu_fingerprint()}.onnx")
+        return os.path.join(self.cache_dir, name)
+
+    def create_session(self, onnx_file: str,
+                       providers: Optional[List[str]] = None,
+                       session_options: Optional[Dict] = None) -> Tuple[object, str]:
+        """
+        Returns:
+            (InferenceSession, state) dengan state "warm" (load dari cache),
+            "cold" (dioptimasi lalu disimpan), atau "uncached"
+        """
+        opts = dict(session_options or {})
+        level = opts.get("graph_opt_level", "all")
+        if level == "disable":
+            return ort.InferenceSession(onnx_file, make_session_options(**opts), providers=providers), "uncached"
+
+        cached = self.cache_path(onnx_file, level, providers)
+        if os.path.exists(cached):
+            so = make_session_options(**dict(opts, graph_opt_level="disable"))
+            try:
+                return ort.InferenceSession(cached, so, providers=providers), "warm"
+            except Exception as e:
+                print(f"[!] Cache {os.path.basename(cached)} tidak valid ({e}), dioptimasi ulang")
+                os.remove(cached)
+
+        # Tulis ke file sementara per proses (worker pool bisa cold start bersamaan)
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        so = make_session_options(**opts)
+        so.optimized_model_filepath = tmp
+        session = ort.InferenceSession(onnx_file, so, providers=providers)
+        if os.path.exists(tmp):
+            os.replace(tmp, cached)
+            return session, "cold"
+        return session, "uncached"
+
+    def startup_history(self) -> Dict:
+        """Startup time terakhir per state: {"cold": {...}, "warm": {...}}"""
+        return self._read_json(self.STARTUP_FILE)
+
+    def record_startup(self, state: str, seconds: float) -> Dict:
+        """Simpan startup time terakhir per state ("cold" / "warm"); return semua record"""
+        startup = self.startup_history()
+        startup[state] = {'seconds': round(seconds, 3), 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                          'ort': ort.__version__}
+        self._write_json(self.STARTUP_FILE, startup)
+        return startup
+
+
+def load_model(onnx_file: str,
+               providers: Optional[List[str]] = None,
+               session_options: Optional[Dict] = None,
+               cache: Optional[OptimizedModelCache] = None):
+    """
+    Model InsightFace dengan SessionOptions custom (dan optimized model cache jika diberikan)
+
+    Returns:
+        (model atau None, state cache)
+    """
+    if cache is not None:
+        session, state = cache.create_session(onnx_file, providers, session_options)
+    else:
+        so = make_session_options(**(session_options or {}))
+        session, state = ort.InferenceSession(onnx_file, so, providers=providers), "uncached"
+    return route_model(onnx_file, session), state
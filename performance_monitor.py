@@ -24,6 +24,13 @@ class PerformanceMonitor:
         self.fps_samples = deque(maxlen=window_size)
         self.inference_times = deque(maxlen=window_size)
         self.frame_times = deque(maxlen=window_size)
+        self.frame_ages = deque(maxlen=window_size)
+        self.stage_times: Dict[str, deque] = {}  # Per-stage timing (pipeline)
+        self.schedule_decisions = deque(maxlen=window_size)  # 1 = detection jalan, 0 = skip
+        self.motion_decisions = deque(maxlen=window_size)    # 1 = ada motion, 0 = diam
+        self.wake_latencies = deque(maxlen=window_size)      # Standby -> hasil detection pertama
+        self.cpu_by_state = {'active': deque(maxlen=window_size), 'standby': deque(maxlen=window_size)}
+        self.detect_times_by_region = {'roi': deque(maxlen=window_size), 'full': deque(maxlen=window_size)}
         
         # Timestamps
         self.last_frame_time = None
@@ -31,10 +38,30 @@ class PerformanceMonitor:
         
         # Process info
         self.process = psutil.Process()
+        self.process.cpu_percent(interval=None)  # Prime: pemanggilan pertama selalu 0.0
+        self._cpu_percent = 0.0
+        self._cpu_sample_time = time.time()
         
         # Stats
         self.total_frames = 0
         self.total_inferences = 0
+        self.dropped_frames = 0
+        self.schedule_interval_ms = 0.0
+        self.schedule_mode = ""
+        self.standby = False
+        self.standby_entries = 0
+        self.roi_detections = 0
+        self.full_detections = 0
+        self.quality_checked = 0
+        self.quality_skipped: Dict[str, int] = {}  # Alasan skip -> jumlah wajah
+        self.quality_saved_ms = 0.0
+        self.cascade_faces = 0
+        self.cascade_escalated = 0
+        self.cascade_saved_ms = 0.0
+        self.memory_components: Dict[str, float] = {}  # Komponen -> MB (low_memory.component_memory)
+        # Waktu terlama sejak take_peaks() terakhir (tail latency per baris performance.log)
+        self.peak_frame_time = 0.0
+        self.peak_inference_time = 0.0
         
     def start_frame(self):
         """Mark start of frame processing"""
@@ -45,6 +72,7 @@ class PerformanceMonitor:
         if self.last_frame_time is not None:
             frame_time = time.time() - self.last_frame_time
             self.frame_times.append(frame_time)
+            self.peak_frame_time = max(self.peak_frame_time, frame_time)
             
             # Calculate FPS
             if frame_time > 0:
@@ -56,12 +84,194 @@ class PerformanceMonitor:
     def record_inference_time(self, inference_time: float):
         """Record inference time (in seconds)"""
         self.inference_times.append(inference_time)
+        self.peak_inference_time = max(self.peak_inference_time, inference_time)
         self.total_inferences += 1
+
+    def take_peaks(self) -> Dict[str, float]:
+        """Frame/inference time terlama (ms) sejak pemanggilan sebelumnya, lalu reset"""
+        peaks = {'max_frame_ms': round(self.peak_frame_time * 1000, 2),
+                 'max_inference_ms': round(self.peak_inference_time * 1000, 2)}
+        self.peak_frame_time = 0.0
+        self.peak_inference_time = 0.0
+        return peaks
+    
+    def record_capture(self, dropped_frames: int, frame_age: float):
+        """
+        Record capture stats dari LatestFrameGrabber
+        
+        Args:
+            dropped_frames: Total frame yang di-drop capture thread (kumulatif)
+            frame_age: Umur frame saat mulai diproses (detik sejak grab)
+        """
+        self.dropped_frames = dropped_frames
+        self.frame_ages.append(frame_age)
+    
+    def record_stage_time(self, stage: str, seconds: float):
+        """Record waktu satu stage (misal: 'detect', 'match', 'render') dalam detik"""
+        if stage not in self.stage_times:
+            self.stage_times[stage] = deque(maxlen=self.window_size)
+        self.stage_times[stage].append(seconds)
+    
+    def record_schedule(self, ran: bool, interval_ms: float, mode: str):
+        """
+        Record keputusan AdaptiveScheduler untuk satu frame
+        
+        Args:
+            ran: True jika detection dijalankan di frame ini
+            interval_ms: Interval detection saat ini (ms)
+            mode: Mode scheduler ('active' / 'idle')
+        """
+        self.schedule_decisions.append(1 if ran else 0)
+        self.schedule_interval_ms = interval_ms
+        self.schedule_mode = mode
+    
+    def record_motion(self, motion: bool, standby: bool):
+        """
+        Record hasil MotionGate untuk satu frame + state standby
+        
+        CPU usage dicatat per state supaya penghematan standby terlihat.
+        """
+        self.motion_decisions.append(1 if motion else 0)
+        if standby and not self.standby:
+            self.standby_entries += 1
+        self.standby = standby
+        self.cpu_by_state['standby' if standby else 'active'].append(self.get_cpu_usage())
+    
+    def record_wake(self, latency: float):
+        """Record wake-up latency (detik): frame motion pertama -> hasil detection"""
+        self.wake_latencies.append(latency)
+    
+    def record_detection_region(self, region: str, det_time: float):
+        """
+        Record satu detection RoiDetector
+        
+        Args:
+            region: 'roi' (crop sekitar wajah sebelumnya) atau 'full' (full-frame sweep)
+            det_time: Waktu detection saja (detik, tanpa embedding)
+        """
+        self.detect_times_by_region[region].append(det_time)
+        if region == 'roi':
+            self.roi_detections += 1
+        else:
+            self.full_detections += 1
+    
+    def record_quality(self, checked: int, skipped: Dict[str, int], saved_ms: float):
+        """
+        Record hasil FaceQualityGate untuk satu frame
+        
+        Args:
+            checked: Jumlah wajah yang dinilai
+            skipped: Alasan skip -> jumlah wajah yang tidak di-embed
+            saved_ms: Estimasi waktu embedding yang dihemat (ms)
+        """
+        self.quality_checked += checked
+        self.quality_saved_ms += saved_ms
+        for reason, count in skipped.items():
+            self.quality_skipped[reason] = self.quality_skipped.get(reason, 0) + count
+    
+    def get_quality_skip_ratio(self) -> float:
+        """Fraksi wajah yang di-skip quality gate (sebelum embedding)"""
+        if self.quality_checked == 0:
+            return 0.0
+        return sum(self.quality_skipped.values()) / self.quality_checked
+    
+    def record_cascade(self, faces: int, escalated: int, saved_ms: float):
+        """
+        Record hasil ModelCascade untuk satu frame
+        
+        Args:
+            faces: Jumlah wajah yang di-embed tier cepat
+            escalated: Jumlah wajah yang di-embed ulang model utama
+            saved_ms: Estimasi waktu yang dihemat vs selalu model utama (ms, bisa negatif)
+        """
+        self.cascade_faces += faces
+        self.cascade_escalated += escalated
+        self.cascade_saved_ms += saved_ms
+    
+    def record_memory(self, component: str, mb: float):
+        """
+        Record memory satu komponen (misal 'model:detection', 'gallery', 'embed_buffers')
+        
+        Args:
+            component: Nama komponen
+            mb: Ukuran (MB); dicatat ulang -> nilai lama ditimpa
+        """
+        self.memory_components[component] = mb
+    
+    def get_memory_breakdown(self) -> Dict[str, float]:
+        """Memory per komponen (MB) + 'other' = RSS dikurangi komponen yang tercatat"""
+        if not self.memory_components:
+            return {}
+        breakdown = dict(self.memory_components)
+        # gallery_mmap file-backed: tidak selalu resident, tidak dikurangi dari RSS
+        counted = sum(mb for name, mb in breakdown.items() if name != 'gallery_mmap')
+        breakdown['other'] = round(max(self.get_memory_usage()['rss_mb'] - counted, 0.0), 1)
+        return breakdown
+    
+    def get_escalation_rate(self) -> float:
+        """Fraksi wajah yang di-escalate ke model utama"""
+        return self.cascade_escalated / self.cascade_faces if self.cascade_faces else 0.0
+    
+    def get_roi_ratio(self) -> float:
+        """Fraksi detection (total) yang berupa ROI detection"""
+        total = self.roi_detections + self.full_detections
+        return self.roi_detections / total if total else 0.0
+    
+    def get_roi_saving(self) -> float:
+        """Selisih average waktu full sweep vs ROI detection (ms per detection)"""
+        roi, full = self.detect_times_by_region['roi'], self.detect_times_by_region['full']
+        if len(roi) == 0 or len(full) == 0:
+            return 0.0
+        return (sum(full) / len(full) - sum(roi) / len(roi)) * 1000
+    
+    def get_motion_ratio(self) -> float:
+        """Fraksi frame (moving window) dengan motion"""
+        if len(self.motion_decisions) == 0:
+            return 0.0
+        return sum(self.motion_decisions) / len(self.motion_decisions)
+    
+    def get_cpu_by_state(self) -> Dict[str, float]:
+        """Average CPU usage (%) per state ('active' / 'standby')"""
+        return {
+            state: round(sum(samples) / len(samples), 2)
+            for state, samples in self.cpu_by_state.items() if len(samples) > 0
+        }
+    
+    def get_avg_wake_latency(self) -> float:
+        """Average wake-up latency (ms)"""
+        if len(self.wake_latencies) == 0:
+            return 0.0
+        return (sum(self.wake_latencies) / len(self.wake_latencies)) * 1000
+    
+    def get_detect_ratio(self) -> float:
+        """Fraksi frame (moving window) yang menjalankan detection"""
+        if len(self.schedule_decisions) == 0:
+            return 0.0
+        return sum(self.schedule_decisions) / len(self.schedule_decisions)
+    
+    def get_stage_times(self) -> Dict[str, float]:
+        """Get average waktu per stage (ms)"""
+        return {
+            stage: round((sum(samples) / len(samples)) * 1000, 2)
+            for stage, samples in list(self.stage_times.items()) if len(samples) > 0
+        }
+    
+    def get_avg_frame_age(self) -> float:
+        """Get average frame age saat diproses (ms)"""
+        if len(self.frame_ages) == 0:
+            return 0.0
+        return (sum(self.frame_ages) / len(self.frame_ages)) * 1000  # Convert to ms
         
     def get_cpu_usage(self) -> float:
-        """Get current CPU usage (%)"""
+        """Get current CPU usage (%) sejak pemanggilan sebelumnya (non-blocking)"""
         try:
-            return self.process.cpu_percent(interval=0.1)
+            # interval=None: tidak sleep (interval=0.1 menahan frame loop 100ms setiap overlay/log).
+            # Sample di-refresh paling cepat tiap 0.5s supaya interval pengukuran tidak terlalu pendek.
+            now = time.time()
+            if now - self._cpu_sample_time >= 0.5:
+                self._cpu_percent = self.process.cpu_percent(interval=None)
+                self._cpu_sample_time = now
+            return self._cpu_percent
         except:
             return 0.0
     
@@ -113,6 +323,26 @@ class PerformanceMonitor:
             'memory_percent': round(mem['percent'], 2),
             'total_frames': self.total_frames,
             'total_inferences': self.total_inferences,
+            'dropped_frames': self.dropped_frames,
+            'avg_frame_age_ms': round(self.get_avg_frame_age(), 2),
+            'stage_ms': self.get_stage_times(),
+            'detect_ratio': round(self.get_detect_ratio(), 3),
+            'schedule_interval_ms': round(self.schedule_interval_ms, 1),
+            'schedule_mode': self.schedule_mode,
+            'motion_ratio': round(self.get_motion_ratio(), 3),
+            'standby': self.standby,
+            'standby_entries': self.standby_entries,
+            'cpu_by_state': self.get_cpu_by_state(),
+            'avg_wake_ms': round(self.get_avg_wake_latency(), 2),
+            'roi_ratio': round(self.get_roi_ratio(), 3),
+            'roi_saving_ms': round(self.get_roi_saving(), 2),
+            'quality_checked': self.quality_checked,
+            'quality_skipped': dict(self.quality_skipped),
+            'quality_skip_ratio': round(self.get_quality_skip_ratio(), 3),
+            'quality_saved_ms': round(self.quality_saved_ms, 1),
+            'cascade_escalation_rate': round(self.get_escalation_rate(), 3),
+            'cascade_saved_ms': round(self.cascade_saved_ms, 1),
+            'memory_breakdown': self.get_memory_breakdown(),
             'uptime_seconds': round(uptime, 2),
             'uptime_formatted': self._format_uptime(uptime)
         }
@@ -138,6 +368,36 @@ class PerformanceMonitor:
         print(f"Memory Usage:     {stats['memory_mb']:.2f} MB ({stats['memory_percent']:.2f}%)")
         print(f"Total Frames:     {stats['total_frames']}")
         print(f"Total Inferences: {stats['total_inferences']}")
+        print(f"Dropped Frames:   {stats['dropped_frames']}")
+        print(f"Frame Age:        {stats['avg_frame_age_ms']:.2f} ms")
+        for stage, ms in stats['stage_ms'].items():
+            print(f"  Stage {stage + ':':<10} {ms:.2f} ms")
+        if stats['schedule_mode']:
+            interval = f"interval {stats['schedule_interval_ms']:.0f} ms, " if stats['schedule_interval_ms'] else ""
+            print(f"Detect Ratio:     {stats['detect_ratio'] * 100:.0f}% "
+                  f"({interval}{stats['schedule_mode']})")
+        if len(self.motion_decisions) > 0:
+            cpu_states = " | ".join(f"{s} {v:.1f}%" for s, v in stats['cpu_by_state'].items())
+            print(f"Motion Ratio:     {stats['motion_ratio'] * 100:.0f}% | "
+                  f"Standby: {'ON' if stats['standby'] else 'off'} ({stats['standby_entries']}x)")
+            print(f"CPU by State:     {cpu_states}")
+            if len(self.wake_latencies) > 0:
+                print(f"Wake Latency:     {stats['avg_wake_ms']:.2f} ms")
+        if self.roi_detections + self.full_detections > 0:
+            print(f"ROI Detection:    {stats['roi_ratio'] * 100:.0f}% "
+                  f"(roi {self.roi_detections} / full {self.full_detections}) | "
+                  f"saving {stats['roi_saving_ms']:.2f} ms/detection")
+        if self.quality_checked > 0:
+            reasons = ", ".join(f"{r} {n}" for r, n in sorted(stats['quality_skipped'].items()))
+            print(f"Quality Gate:     {stats['quality_skip_ratio'] * 100:.0f}% skipped"
+                  f"{f' ({reasons})' if reasons else ''} | saved {stats['quality_saved_ms']:.0f} ms")
+        if self.cascade_faces > 0:
+            print(f"Cascade:          {stats['cascade_escalation_rate'] * 100:.0f}% escalated "
+                  f"({self.cascade_escalated}/{self.cascade_faces}) | saved {stats['cascade_saved_ms']:.0f} ms")
+        if stats['memory_breakdown']:
+            print("Memory Breakdown:")
+            for component, mb in stats['memory_breakdown'].items():
+                print(f"  {component + ':':<18} {mb:.1f} MB")
         print(f"Uptime:           {stats['uptime_formatted']}")
         print("="*50)
     
@@ -152,6 +412,10 @@ class PerformanceMonitor:
             f"CPU: {stats['cpu_percent']:.1f}%",
             f"RAM: {stats['memory_mb']:.0f}MB"
         ]
+        if stats['schedule_mode']:
+            lines.append(f"Det: {stats['detect_ratio'] * 100:.0f}% ({stats['schedule_mode']})")
+        if stats['standby']:
+            lines.append("STANDBY")
         
         return " | ".join(lines)
     
@@ -160,11 +424,41 @@ class PerformanceMonitor:
         self.fps_samples.clear()
         self.inference_times.clear()
         self.frame_times.clear()
+        self.frame_ages.clear()
+        self.stage_times.clear()
+        self.schedule_decisions.clear()
+        self.schedule_interval_ms = 0.0
+        self.schedule_mode = ""
+        self.motion_decisions.clear()
+        self.wake_latencies.clear()
+        for samples in self.cpu_by_state.values():
+            samples.clear()
+        self.standby = False
+        self.standby_entries = 0
+        for samples in self.detect_times_by_region.values():
+            samples.clear()
+        self.roi_detections = 0
+        self.full_detections = 0
+        self.quality_checked = 0
+        self.quality_skipped = {}
+        self.quality_saved_ms = 0.0
+        self.cascade_faces = 0
+        self.cascade_escalated = 0
+        self.cascade_saved_ms = 0.0
+        self.memory_components = {}
+        self.peak_frame_time = 0.0
+        self.peak_inference_time = 0.0
         self.total_frames = 0
         self.total_inferences = 0
+        self.dropped_frames = 0
         self.start_time = time.time()
 
 
+# frame_ms / inference_ms = rata-rata window; max_* = terlama sejak baris sebelumnya
+PERFORMANCE_LOG_HEADER = ("timestamp,fps,frame_ms,inference_ms,cpu_percent,memory_mb,memory_percent,"
+                          "max_frame_ms,max_inference_ms")
+
+
 class PerformanceLogger:
     """Log performance metrics to file"""
     
@@ -178,7 +472,7 @@ class PerformanceLogger:
         
         # Write header
         with open(self.log_file, 'w') as f:
-            f.write("timestamp,fps,frame_ms,inference_ms,cpu_percent,memory_mb,memory_percent\n")
+            f.write(PERFORMANCE_LOG_HEADER + "\n")
     
     def _ensure_log_dir(self):
         """Ensure log directory exists"""
@@ -188,12 +482,14 @@ class PerformanceLogger:
             os.makedirs(log_dir)
     
     def log(self, monitor: PerformanceMonitor):
-        """Log current stats"""
+        """Log current stats (rata-rata window + waktu terlama sejak baris sebelumnya)"""
         stats = monitor.get_stats()
+        peaks = monitor.take_peaks()
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         
         line = f"{timestamp},{stats['fps']},{stats['avg_frame_ms']},{stats['avg_inference_ms']}," \
-               f"{stats['cpu_percent']},{stats['memory_mb']},{stats['memory_percent']}\n"
+               f"{stats['cpu_percent']},{stats['memory_mb']},{stats['memory_percent']}," \
+               f"{peaks['max_frame_ms']},{peaks['max_inference_ms']}\n"
         
         with open(self.log_file, 'a') as f:
             f.write(line)
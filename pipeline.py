@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipelined Recognize Engine untuk Face Recognition System
+Capture, detection/embedding, matching/identity, dan render berjalan di stage
+terpisah yang dihubungkan dengan bounded queue "latest-wins":
+
+    capture ──> [detect_q] ──> detect (detect_and_embed) ──> [match_q] ──> match + lookup
+       │                                                              │
+       └──> [display_slot] ──────> render (main thread) <── [result_slot]
+
+- Detection frame N+1 overlap dengan matching & drawing frame N
+  (ONNX Runtime melepas GIL saat inference)
+- Jika stage berikutnya masih sibuk, item lama di queue di-drop (bukan diantrikan),
+  jadi latency tidak menumpuk
+- Display refresh pada rate sendiri (display_fps) dengan video live dari capture
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Optional
+
+import cv2
+
+from facegate_insightface import (
+    detect_and_embed,
+    recognize_faces,
+    draw_results,
+    open_camera,
+    logger,
+    PERF_MONITOR_AVAILABLE,
+    PerformanceMonitor,
+)
+
+
+class LatestQueue:
+    """
+    Bounded queue dengan kebijakan latest-wins
+
+    put() tidak pernah blocking: jika penuh, item tertua dibuang dan dihitung di `dropped`.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Ambil item tertua; return None jika timeout atau queue ditutup dan kosong"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                return None
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def peek_latest(self):
+        """Lihat item terbaru tanpa mengambilnya (untuk display slot)"""
+        with self._cond:
+            return self._items[-1] if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class RecognitionPipeline:
+    """Multi-stage recognize engine (capture / detect / match / render)"""
+
+    def __init__(self, app, embs, student_db, cap,
+                 threshold: float = 0.35,
+                 min_det_score: float = 0.6,
+                 cam_index: int = 0,
+                 event_writer=None,
+                 perf_monitor=None,
+                 queue_size: int = 1,
+                 max_frames: Optional[int] = None):
+        self.app = app
+        self.embs = embs
+        self.student_db = student_db
+        self.cap = cap
+        self.threshold = threshold
+        self.min_det_score = min_det_score
+        self.cam_index = cam_index
+        self.event_writer = event_writer
+        self.perf_monitor = perf_monitor
+        self.max_frames = max_frames
+
+        self.detect_q = LatestQueue(queue_size)
+        self.match_q = LatestQueue(queue_size)
+        self.display_slot = LatestQueue(1)
+        self.result_slot = LatestQueue(1)
+
+        self.stop_event = threading.Event()
+        self.captured = 0
+        self.detected = 0
+        self.matched = 0
+        self._threads = []
+
+    # ---- stages ----
+
+    def _capture_stage(self):
+        while not self.stop_event.is_set():
+            if self.max_frames is not None and self.captured >= self.max_frames:
+                break
+            ok, frame = self.cap.read()
+            if not ok:
+                print("Gagal baca frame.")
+                break
+            self.captured += 1
+            item = (self.captured, frame, time.time())
+            self.display_slot.put(item)
+            self.detect_q.put(item)
+        self.stop_event.set()
+        self.detect_q.close()
+
+    def _detect_stage(self):
+        while True:
+            item = self.detect_q.get(timeout=0.1)
+            if item is None:
+                if self.stop_event.is_set():
+                    break
+                continue
+            frame_id, frame, ts = item
+            start = time.perf_counter()
+            faces = detect_and_embed(self.app, frame)
+            elapsed = time.perf_counter() - start
+            self.detected += 1
+            if self.perf_monitor:
+                self.perf_monitor.record_inference_time(elapsed)
+                self.perf_monitor.record_stage_time("detect", elapsed)
+            self.match_q.put((frame_id, faces, ts))
+        self.match_q.close()
+
+    def _match_stage(self):
+        while True:
+            item = self.match_q.get(timeout=0.1)
+            if item is None:
+                if self.stop_event.is_set():
+                    break
+                continue
+            frame_id, faces, ts = item
+            start = time.perf_counter()
+            results = recognize_faces(faces, self.embs, self.student_db,
+                                      threshold=self.threshold,
+                                      min_det_score=self.min_det_score,
+                                      cam_index=self.cam_index,
+                                      event_writer=self.event_writer)
+            self.matched += 1
+            if self.perf_monitor:
+                self.perf_monitor.record_stage_time("match", time.perf_counter() - start)
+                # End-to-end: grab frame -> hasil identity siap
+                self.perf_monitor.record_stage_time("e2e", time.time() - ts)
+            self.result_slot.put((frame_id, results if results else None))
+
+    def start(self):
+        for target, name in ((self._capture_stage, "capture"),
+                             (self._detect_stage, "detect"),
+                             (self._match_stage, "match")):
+            t = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self.stop_event.set()
+        self.detect_q.close()
+        self.match_q.close()
+        for t in self._threads:
+            t.join(timeout=2.0)
+
+    @property
+    def running(self) -> bool:
+        return not self.stop_event.is_set() or any(t.is_alive() for t in self._threads[1:])
+
+    def latest_frame(self):
+        return self.display_slot.peek_latest()
+
+    def latest_result(self):
+        item = self.result_slot.peek_latest()
+        return item[1] if item else None
+
+
+def run_pipelined_recognition(app, db,
+                              cam_index: int = 0,
+                              width: int = 1280,
+                              height: int = 720,
+                              threshold: float = 0.35,
+                              min_det_score: float = 0.6,
+                              show_performance: bool = True,
+                              event_writer=None,
+                              capture=None,
+                              student_db=None,
+                              display: bool = True,
+                              max_frames: Optional[int] = None,
+                              display_fps: float = 30.0,
+                              queue_size: int = 1):
+    """
+    Recognize mode versi pipelined (parameter sama dengan recognize_mode)
+
+    Args:
+        display_fps: Rate refresh window (independen dari rate detection)
+        queue_size: Kapasitas queue antar stage (1 = selalu frame terbaru)
+
+    Returns:
+        Dict performance stats (jika PerformanceMonitor tersedia)
+    """
+    embs = db.load()
+    if embs is None or len(embs) == 0:
+        print(f"DB kosong. Jalankan enroll dulu. (folder: {db.db_dir})")
+        return
+
+    if student_db is None:
+        from student_database import StudentDatabase
+        student_db = StudentDatabase("students.db")
+
+    # Capture stage sudah berupa thread -> tidak perlu LatestFrameGrabber
+    cap = capture if capture is not None else open_camera(cam_index, width, height)
+    print("\n[RECOGNIZE - PIPELINED]")
+    print("Tekan 'q' untuk keluar.")
+    if show_performance and PERF_MONITOR_AVAILABLE:
+        print("Tekan 'p' untuk toggle performance stats.")
+        print("Performance akan di-log ke: logs/performance.log")
+    print()
+
+    perf_monitor = PerformanceMonitor() if PERF_MONITOR_AVAILABLE else None
+    show_perf_overlay = show_performance and PERF_MONITOR_AVAILABLE and display
+
+    perf_logger = None
+    if PERF_MONITOR_AVAILABLE:
+        try:
+            from performance_monitor import PerformanceLogger
+            perf_logger = PerformanceLogger("logs/performance.log")
+        except Exception as e:
+            print(f"[!] Performance logging disabled: {e}")
+
+    pipeline = RecognitionPipeline(app, embs, student_db, cap,
+                                   threshold=threshold,
+                                   min_det_score=min_det_score,
+                                   cam_index=cam_index,
+                                   event_writer=event_writer,
+                                   perf_monitor=perf_monitor,
+                                   queue_size=queue_size,
+                                   max_frames=max_frames)
+    pipeline.start()
+
+    interval = 1.0 / max(display_fps, 1.0)
+    next_draw = time.perf_counter()
+    rendered = 0
+    last_frame_id = 0
+
+    # FPS = rate display (periode antar render), bukan lama render
+    if perf_monitor:
+        perf_monitor.start_frame()
+
+    try:
+        while pipeline.running:
+            item = pipeline.latest_frame()
+            if item is None or item[0] == last_frame_id:
+                # Belum ada frame baru dari capture
+                time.sleep(0.001)
+                continue
+
+            last_frame_id, frame, _ = item
+            render_start = time.perf_counter()
+            disp = frame.copy()
+            draw_results(disp, pipeline.latest_result())
+
+            if show_perf_overlay and perf_monitor:
+                stats_text = perf_monitor.get_stats_string()
+                cv2.rectangle(disp, (5, disp.shape[0] - 35), (disp.shape[1] - 5, disp.shape[0] - 5),
+                              (0, 0, 0), -1)
+                cv2.putText(disp, stats_text, (10, disp.shape[0] - 15),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+
+            if display:
+                cv2.imshow("Recognize (pipelined) - press q to quit", disp)
+            rendered += 1
+
+            if perf_monitor:
+                perf_monitor.record_stage_time("render", time.perf_counter() - render_start)
+                perf_monitor.end_frame()
+                perf_monitor.start_frame()
+                if perf_logger and rendered % 30 == 0:
+                    try:
+                        perf_logger.log(perf_monitor)
+                    except Exception:
+                        pass  # Silent fail for logging
+
+            if display:
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('p') and perf_monitor:
+                    show_perf_overlay = not show_perf_overlay
+
+            # Display rate sendiri (tidak mengikuti rate detection)
+            next_draw += interval
+            delay = next_draw - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_draw = time.perf_counter()
+    finally:
+        pipeline.stop()
+        cap.release()
+        if display:
+            cv2.destroyAllWindows()
+
+    print(f"\n[*] Pipeline: captured={pipeline.captured} | detected={pipeline.detected} | "
+          f"matched={pipeline.matched} | rendered={rendered}")
+    print(f"    Dropped: detect_q={pipeline.detect_q.dropped} | match_q={pipeline.match_q.dropped}")
+    logger.log_system(f"Pipelined recognize | captured={pipeline.captured} | detected={pipeline.detected} | "
+                      f"dropped={pipeline.detect_q.dropped + pipeline.match_q.dropped}")
+
+    if perf_monitor:
+        print("\n[*] Performance Summary:")
+        perf_monitor.print_stats()
+        stats = perf_monitor.get_stats()
+        stats['pipeline'] = {
+            'captured': pipeline.captured,
+            'detected': pipeline.detected,
+            'matched': pipeline.matched,
+            'rendered': rendered,
+            'detect_q_dropped': pipeline.detect_q.dropped,
+            'match_q_dropped': pipeline.match_q.dropped,
+        }
+        return stats
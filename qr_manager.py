@@ -15,6 +15,8 @@ from typing import Optional, Dict
 import base64
 import hashlib
 
+from camera_grabber import LatestFrameGrabber
+
 
 class QRCodeManager:
     """Manager untuk generate dan scan QR code dengan enkripsi"""
@@ -189,6 +191,9 @@ class QRCodeManager:
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         
+        # Capture thread: decode QR selalu di frame terbaru (bukan frame basi di buffer driver)
+        cap = LatestFrameGrabber(cap)
+        
         print("\n[*] QR CODE SCANNER")
         print("    Arahkan QR code ke kamera")
         print("    Tekan 'q' untuk keluar\n")
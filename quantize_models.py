@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+INT8 Quantization untuk Face Recognition System
+Buat versi INT8 dari model detection (SCRFD) dan recognition (ArcFace) untuk gate
+yang hanya memakai CPU.
+
+- static  : QDQ INT8 dengan kalibrasi dari gambar lokal (default; cocok untuk CNN)
+- dynamic : hanya weight yang di-quantize, tanpa kalibrasi (ConvInteger di CPU
+            sering TIDAK lebih cepat untuk CNN; ukur dulu dengan bench_quantized.py)
+
+Kalibrasi memakai preprocessing yang sama dengan InsightFace:
+- detection  : frame di-letterbox ke det_size, (x - 127.5) / 128, BGR -> RGB
+- recognition: crop norm_crop 112x112 dari wajah yang dideteksi model FP32,
+               (x - input_mean) / input_std
+
+Output: models/<model>_int8/ dengan nama file sama (module lain di-copy apa adanya),
+di-load dengan build_face_app(..., precision="int8").
+
+Usage:
+    python quantize_models.py --calib "face_db/snapshots/*/*.jpg"
+    python quantize_models.py --calib recordings/gate_pagi.mp4 --mode dynamic
+    python bench_quantized.py --source recordings/gate_pagi.mp4     # validasi vs FP32
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+def det_blob(img: np.ndarray, input_size) -> np.ndarray:
+    """Preprocessing SCRFD.detect: letterbox ke input_size (kiri-atas) + normalisasi"""
+    im_ratio = float(img.shape[0]) / img.shape[1]
+    model_ratio = float(input_size[1]) / input_size[0]
+    if im_ratio > model_ratio:
+        new_height = input_size[1]
+        new_width = int(new_height / im_ratio)
+    else:
+        new_width = input_size[0]
+        new_height = int(new_width * im_ratio)
+    resized = cv2.resize(img, (new_width, new_height))
+    det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
+    det_img[:new_height, :new_width, :] = resized
+    return cv2.dnn.blobFromImage(det_img, 1.0 / 128, tuple(input_size), (127.5, 127.5, 127.5), swapRB=True)
+
+
+def rec_blob(crop: np.ndarray, rec_model) -> np.ndarray:
+    """Preprocessing ArcFaceONNX.get_feat untuk satu crop aligned"""
+    mean = rec_model.input_mean
+    return cv2.dnn.blobFromImages([crop], 1.0 / rec_model.input_std, tuple(rec_model.input_size),
+                                  (mean, mean, mean), swapRB=True)
+
+
+class BlobDataReader:
+    """CalibrationDataReader dari list blob (satu blob per get_next)"""
+
+    def __init__(self, input_name: str, blobs: List[np.ndarray]):
+        self.input_name = input_name
+        self.blobs = blobs
+        self._iter = iter(blobs)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        blob = next(self._iter, None)
+        return None if blob is None else {self.input_name: blob}
+
+    def rewind(self):
+        self._iter = iter(self.blobs)
+
+
+def collect_calibration(app, frames: List[np.ndarray], det_size: int, max_faces: int = 200):
+    """
+    Blob kalibrasi detection (per frame) dan recognition (per wajah terdeteksi FP32)
+
+    Returns:
+        (det_blobs, rec_blobs)
+    """
+    from insightface.utils import face_align
+
+    rec_model = app.models.get('recognition')
+    det_blobs, rec_blobs = [], []
+    for frame in frames:
+        det_blobs.append(det_blob(frame, (det_size, det_size)))
+        if rec_model is None or len(rec_blobs) >= max_faces:
+            continue
+        for face in app.get(frame):
+            crop = face_align.norm_crop(frame, landmark=face.kps, image_size=rec_model.input_size[0])
+            rec_blobs.append(rec_blob(crop, rec_model))
+    return det_blobs, rec_blobs[:max_faces]
+
+
+def preprocess_model(src: str, dst: str) -> str:
+    """quant_pre_process (shape inference + optimasi) sebelum quantization; fallback ke src"""
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        quant_pre_process(src, dst, skip_symbolic_shape=True)
+        return dst
+    except Exception as e:
+        print(f"[!] Pre-process dilewati untuk {os.path.basename(src)}: {e}")
+        return src
+
+
+def quantize_one(src: str, dst: str, mode: str, blobs: Optional[List[np.ndarray]] = None,
+                 calib_method: str = "minmax", per_channel: bool = True):
+    from onnxruntime.quantization import (
+        quantize_static, quantize_dynamic, QuantFormat, QuantType, CalibrationMethod,
+    )
+
+    if mode == "static" and not blobs:
+        raise RuntimeError(f"Tidak ada data kalibrasi untuk {os.path.basename(src)}")
+    methods = {"minmax": CalibrationMethod.MinMax,
+               "entropy": CalibrationMethod.Entropy,
+               "percentile": CalibrationMethod.Percentile}
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    prep = preprocess_model(src, dst + ".prep.onnx")
+    try:
+        if mode == "dynamic":
+            quantize_dynamic(prep, dst, weight_type=QuantType.QInt8, per_channel=per_channel)
+            return
+        quantize_static(prep, dst, BlobDataReader(input_name, blobs),
+                        quant_format=QuantFormat.QDQ,
+                        per_channel=per_channel,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        calibrate_method=methods[calib_method])
+    finally:
+        if prep != src and os.path.exists(prep):
+            os.remove(prep)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat model INT8 (detection + recognition) untuk CPU.")
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--calib", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Gambar kalibrasi: video file, folder gambar, atau glob pattern (berisi wajah)")
+    parser.add_argument("--mode", type=str, default="static", choices=["static", "dynamic"])
+    parser.add_argument("--det", type=int, default=320, help="det_size untuk kalibrasi detection (sama dengan DET_SIZE)")
+    parser.add_argument("--max-frames", type=int, default=100, help="Maksimal frame kalibrasi")
+    parser.add_argument("--max-faces", type=int, default=200, help="Maksimal crop wajah kalibrasi")
+    parser.add_argument("--calib-method", type=str, default="minmax", choices=["minmax", "entropy", "percentile"])
+    parser.add_argument("--no-per-channel", action="store_true", help="Quantize weight per-tensor")
+    parser.add_argument("--modules", type=str, default="detection,recognition",
+                        help="Module yang di-quantize (CSV: detection, recognition)")
+    args = parser.parse_args()
+
+    from facegate_insightface import build_face_app
+    from bench_replay import iter_replay_frames
+
+    selected = [m.strip() for m in args.modules.split(",") if m.strip()]
+    app = build_face_app(model_name=args.model, det_size=args.det, modules="recognize")
+
+    # Folder model pack yang benar-benar dipakai build_face_app (bisa di parent directory)
+    src_dir = os.path.dirname(os.path.abspath(app.det_model.model_file))
+    dst_dir = os.path.join(os.path.dirname(src_dir), f"{args.model}_int8")
+
+    det_blobs, rec_blobs = [], []
+    if args.mode == "static":
+        frames = list(iter_replay_frames(args.calib, args.max_frames))
+        if not frames:
+            print(f"[X] Tidak ada gambar kalibrasi di: {args.calib}")
+            sys.exit(1)
+        det_blobs, rec_blobs = collect_calibration(app, frames, args.det, args.max_faces)
+        print(f"[*] Kalibrasi: {len(det_blobs)} frame, {len(rec_blobs)} wajah")
+
+    # Pack INT8 = salinan pack FP32, file detection/recognition diganti versi INT8
+    os.makedirs(dst_dir, exist_ok=True)
+    targets = {os.path.basename(app.models[m].model_file): m for m in selected if m in app.models}
+    for name in sorted(os.listdir(src_dir)):
+        src = os.path.join(src_dir, name)
+        dst = os.path.join(dst_dir, name)
+        if name not in targets:
+            if os.path.isfile(src):
+                shutil.copy2(src, dst)
+            continue
+
+        task = targets[name]
+        blobs = det_blobs if task == "detection" else rec_blobs
+        print(f"[*] Quantize {name} ({task}, {args.mode})...")
+        start = time.perf_counter()
+        quantize_one(src, dst, args.mode, blobs,
+                     calib_method=args.calib_method, per_channel=not args.no_per_channel)
+        print(f"[OK] {name}: {os.path.getsize(src) / 1e6:.1f} MB -> {os.path.getsize(dst) / 1e6:.1f} MB "
+              f"({time.perf_counter() - start:.1f} s)")
+
+    print(f"\n[OK] Model INT8: {dst_dir}")
+    print(f"     Validasi: python bench_quantized.py --model {args.model} --source \"{args.calib}\"")
+
+
+if __name__ == "__main__":
+    main()
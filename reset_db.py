@@ -5,6 +5,7 @@ Script untuk reset/clear database face recognition
 """
 
 import os
+import glob
 import shutil
 
 DB_DIR = "face_db"
@@ -21,11 +22,15 @@ def reset_database():
         print("[X] Reset dibatalkan.")
         return
     
-    # Hapus embeddings.npy
-    emb_path = os.path.join(DB_DIR, "embeddings.npy")
-    if os.path.exists(emb_path):
-        os.remove(emb_path)
-        print(f"[OK] Deleted: {emb_path}")
+    # Hapus embeddings.npy (+ gallery per model cascade: embeddings_<model>.npy)
+    # beserta marker normalisasi (<file>.normalized, lihat low_memory.py)
+    for emb_path in [os.path.join(DB_DIR, "embeddings.npy")] + sorted(glob.glob(os.path.join(DB_DIR, "embeddings_*.npy"))):
+        if os.path.exists(emb_path):
+            os.remove(emb_path)
+            print(f"[OK] Deleted: {emb_path}")
+    for marker_path in sorted(glob.glob(os.path.join(DB_DIR, "embeddings*.npy.normalized"))):
+        os.remove(marker_path)
+        print(f"[OK] Deleted: {marker_path}")
     
     # Reset labels.json ke array kosong
     label_path = os.path.join(DB_DIR, "labels.json")
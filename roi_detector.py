@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ROI Re-detection untuk Face Recognition System
+Setelah wajah ditemukan, detector tidak perlu menyapu seluruh canvas det_size
+setiap kali. RoiDetector menjalankan detector hanya pada crop (dengan padding)
+di sekitar wajah hasil detection sebelumnya, dengan input_size kecil sesuai
+ukuran crop; full-frame sweep tetap dijadwalkan setiap full_sweep_interval
+detik untuk menangkap wajah yang baru datang.
+
+Full sweep juga dipakai jika:
+- belum ada wajah (atau ROI tidak menemukan wajah sama sekali)
+- total area ROI terlalu besar (lebih murah sekalian full frame)
+- model detection tidak mendukung input dinamis (input_size tetap dari model)
+"""
+
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROI_ALIGN = 32  # Stride terbesar SCRFD -> input_size harus kelipatan 32
+MIN_CROP_SIDE = 8  # Crop ROI lebih tipis dari ini di-skip (bukan wajah yang bisa dikenali)
+
+
+def supports_dynamic_input(det_model) -> bool:
+    """True jika model detection menerima input_size selain det_size (input ONNX dinamis)"""
+    session = getattr(det_model, "session", None)
+    if session is None:
+        return False
+    shape = session.get_inputs()[0].shape
+    return not isinstance(shape[2], int) or not isinstance(shape[3], int)
+
+
+def merge_boxes(boxes: List[np.ndarray]) -> List[np.ndarray]:
+    """Gabungkan box (x1, y1, x2, y2) yang overlap sampai tidak ada yang overlap"""
+    merged = [b.copy() for b in boxes]
+    changed = True
+    while changed:
+        changed = False
+        out = []
+        for box in merged:
+            for other in out:
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    other[:2] = np.minimum(other[:2], box[:2])
+                    other[2:] = np.maximum(other[2:], box[2:])
+                    changed = True
+                    break
+            else:
+                out.append(box)
+        merged = out
+    return merged
+
+
+def nms(bboxes: np.ndarray, iou_threshold: float = 0.4) -> np.ndarray:
+    """Index detection yang dipertahankan (wajah di perbatasan dua ROI bisa terdeteksi dua kali)"""
+    order = np.argsort(-bboxes[:, 4])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(bboxes[i, 0], bboxes[rest, 0])
+        y1 = np.maximum(bboxes[i, 1], bboxes[rest, 1])
+        x2 = np.minimum(bboxes[i, 2], bboxes[rest, 2])
+        y2 = np.minimum(bboxes[i, 3], bboxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area_i = (bboxes[i, 2] - bboxes[i, 0]) * (bboxes[i, 3] - bboxes[i, 1])
+        area_r = (bboxes[rest, 2] - bboxes[rest, 0]) * (bboxes[rest, 3] - bboxes[rest, 1])
+        iou = inter / np.maximum(area_i + area_r - inter, 1e-6)
+        order = rest[iou < iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+class RoiDetector:
+    """Jadwalkan detection ROI (sekitar wajah sebelumnya) vs full-frame sweep"""
+
+    MODE_ROI = "roi"
+    MODE_FULL = "full"
+
+    def __init__(self,
+                 full_sweep_interval: float = 1.0,
+                 padding: float = 0.5,
+                 max_area_ratio: float = 0.5,
+                 min_roi_size: int = 64):
+        """
+        Args:
+            full_sweep_interval: Full-frame sweep minimal setiap N detik (wajah baru)
+            padding: Padding ROI relatif terhadap ukuran wajah di setiap sisi
+            max_area_ratio: Jika total area ROI > rasio ini dari frame -> full sweep
+            min_roi_size: Sisi input_size minimum untuk detection ROI (pixel)
+        """
+        self.full_sweep_interval = full_sweep_interval
+        self.padding = padding
+        self.max_area_ratio = max_area_ratio
+        self.min_roi_size = min_roi_size
+
+        self.prev_boxes: List[np.ndarray] = []
+        self.last_full_sweep: Optional[float] = None
+        self.last_mode = self.MODE_FULL
+        self.last_time = 0.0
+        self.enabled = True
+
+        # Stats
+        self.roi_runs = 0
+        self.full_runs = 0
+
+    def plan(self, img_shape, now: Optional[float] = None) -> Optional[List[np.ndarray]]:
+        """
+        Tentukan region untuk detection berikutnya
+
+        Returns:
+            List ROI (x1, y1, x2, y2) dalam koordinat frame, atau None = full sweep
+        """
+        now = time.perf_counter() if now is None else now
+        if not self.enabled or not self.prev_boxes or self.last_full_sweep is None:
+            return None
+        if now - self.last_full_sweep >= self.full_sweep_interval:
+            return None
+
+        h, w = img_shape[:2]
+        rois = []
+        for box in self.prev_boxes:
+            bw, bh = box[2] - box[0], box[3] - box[1]
+            pad_x, pad_y = bw * self.padding, bh * self.padding
+            rois.append(np.array([max(0.0, box[0] - pad_x), max(0.0, box[1] - pad_y),
+                                  min(float(w), box[2] + pad_x), min(float(h), box[3] + pad_y)]))
+        rois = merge_boxes(rois)
+
+        area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rois)
+        if area > self.max_area_ratio * w * h:
+            return None
+        return rois
+
+    def detect_rois(self, det_model, img: np.ndarray, rois: List[np.ndarray],
+                    scale: float = 1.0, max_input: int = 640) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Detection pada setiap ROI dengan input_size sesuai ukuran crop
+
+        Args:
+            scale: Skala detection relatif terhadap frame (detect_width / lebar frame)
+            max_input: Sisi input_size maksimum (det_size model)
+
+        Returns:
+            (bboxes (N, 5), kpss (N, 5, 2) atau None) dalam koordinat frame
+        """
+        all_boxes, all_kps = [], []
+        for roi in rois:
+            x1, y1, x2, y2 = [int(round(v)) for v in roi]
+            crop = img[y1:y2, x1:x2]
+            if min(crop.shape[:2]) < MIN_CROP_SIDE:
+                # Box di tepi frame / degenerate: resize di detect() gagal untuk crop setipis ini
+                continue
+            side = max(crop.shape[0], crop.shape[1]) * scale
+            side = int(np.ceil(side / ROI_ALIGN) * ROI_ALIGN)
+            side = min(max(side, self.min_roi_size), max_input)
+
+            bboxes, kpss = det_model.detect(crop, input_size=(side, side), max_num=0, metric='default')
+            if bboxes.shape[0] == 0:
+                continue
+            bboxes = bboxes.copy()
+            bboxes[:, [0, 2]] += x1
+            bboxes[:, [1, 3]] += y1
+            all_boxes.append(bboxes)
+            if kpss is not None:
+                kpss = kpss.copy()
+                kpss[:, :, 0] += x1
+                kpss[:, :, 1] += y1
+                all_kps.append(kpss)
+
+        if not all_boxes:
+            return np.zeros((0, 5), dtype=np.float32), None
+        bboxes = np.concatenate(all_boxes)
+        kpss = np.concatenate(all_kps) if len(all_kps) == len(all_boxes) else None
+        keep = nms(bboxes)
+        return bboxes[keep], (kpss[keep] if kpss is not None else None)
+
+    def record(self, mode: str, bboxes: np.ndarray, det_time: float, now: Optional[float] = None):
+        """Simpan hasil detection (box untuk ROI berikutnya) dan timing"""
+        now = time.perf_counter() if now is None else now
+        self.last_mode = mode
+        self.last_time = det_time
+        self.prev_boxes = [b[:4].astype(np.float64) for b in bboxes]
+        if mode == self.MODE_FULL:
+            self.full_runs += 1
+            self.last_full_sweep = now
+        else:
+            self.roi_runs += 1
+            if not self.prev_boxes:
+                # Semua wajah hilang dari ROI -> full sweep di detection berikutnya
+                self.last_full_sweep = None
+
+    @property
+    def roi_ratio(self) -> float:
+        total = self.roi_runs + self.full_runs
+        return self.roi_runs / total if total else 0.0
+
+    def reset(self):
+        self.prev_boxes = []
+        self.last_full_sweep = None
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Camera + Fake FaceAnalysis untuk load testing
+Jalankan recognize_mode, logging, dan database path tanpa webcam dan tanpa
+model buffalo_l (~300 MB). Semua output deterministic (seeded).
+
+- SyntheticCamera: pengganti cv2.VideoCapture (read/set/get/release)
+- FakeFaceAnalysis: pengganti FaceAnalysis.get dengan jumlah wajah, bbox,
+  det_score, dan embedding (dari gallery sintetis) yang bisa dikonfigurasi,
+  plus simulated latency
+
+Usage (load test):
+    python synthetic_source.py --frames 5000 --faces 1-3 --gallery 1000
+    python synthetic_source.py --frames 2000 --det-latency 20 --rec-latency 5
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from bench_matching import synthetic_gallery
+
+
+def _sleep_ms(ms: float):
+    """Simulated latency (busy-wait untuk < 1ms supaya akurat)"""
+    if ms <= 0:
+        return
+    if ms >= 1.0:
+        time.sleep(ms / 1000.0)
+        return
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+# =========================
+# Synthetic Camera
+# =========================
+
+class SyntheticCamera:
+    """
+    Frame source sintetis dengan interface seperti cv2.VideoCapture
+
+    Frame di-render sekali ke pool kecil lalu diputar berulang, sehingga
+    biaya read() hanya copy frame (bisa ribuan FPS).
+    """
+
+    def __init__(self,
+                 width: int = 640,
+                 height: int = 480,
+                 fps: Optional[float] = None,
+                 max_frames: Optional[int] = None,
+                 pool_size: int = 16,
+                 seed: int = 0):
+        """
+        Args:
+            width, height: Ukuran frame
+            fps: Batasi rate read() (None = secepat mungkin)
+            max_frames: read() return (False, None) setelah N frame (None = tanpa batas)
+            pool_size: Jumlah frame unik yang di-render
+            seed: Seed untuk konten frame
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.max_frames = max_frames
+        self.pool_size = pool_size
+        self.seed = seed
+        self.frame_index = 0
+        self._opened = True
+        self._next_time = None
+        self._render_pool()
+
+    def _render_pool(self):
+        rng = np.random.default_rng(self.seed)
+        base = rng.integers(40, 80, size=(self.height, self.width, 3), dtype=np.uint8)
+        self.pool = []
+        for i in range(self.pool_size):
+            frame = base.copy()
+            # Blob bergerak supaya frame tidak identik (berguna untuk motion/tracking test)
+            cx = int((i / self.pool_size) * self.width)
+            cy = self.height // 2
+            cv2.circle(frame, (cx, cy), max(8, self.height // 8), (180, 160, 140), -1)
+            cv2.putText(frame, f"SYNTHETIC {i}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.8, (255, 255, 255), 2)
+            self.pool.append(frame)
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        if self.max_frames is not None and self.frame_index >= self.max_frames:
+            return False, None
+
+        if self.fps:
+            now = time.perf_counter()
+            if self._next_time is None:
+                self._next_time = now
+            delay = self._next_time - now
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+        frame = self.pool[self.frame_index % self.pool_size].copy()
+        self.frame_index += 1
+        return True, frame
+
+    def set(self, prop_id: int, value: float) -> bool:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH and int(value) != self.width:
+            self.width = int(value)
+            self._render_pool()
+        elif prop_id == cv2.CAP_PROP_FRAME_HEIGHT and int(value) != self.height:
+            self.height = int(value)
+            self._render_pool()
+        elif prop_id == cv2.CAP_PROP_FPS:
+            self.fps = float(value) if value > 0 else None
+        return True
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0.0)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+
+# =========================
+# Fake FaceAnalysis
+# =========================
+
+class SyntheticFace:
+    """Face object dengan atribut yang dipakai pipeline (bbox, kps, det_score, embedding)"""
+
+    def __init__(self, bbox: np.ndarray, kps: np.ndarray, det_score: float,
+                 embedding: Optional[np.ndarray] = None, identity: int = -1):
+        self.bbox = bbox
+        self.kps = kps
+        self.det_score = np.float32(det_score)
+        self.embedding = embedding
+        self.identity = identity  # Ground-truth gallery index (-1 = orang asing)
+
+    @property
+    def normed_embedding(self) -> Optional[np.ndarray]:
+        if self.embedding is None:
+            return None
+        return self.embedding / np.linalg.norm(self.embedding)
+
+
+def _parse_range(value: Union[int, float, Tuple, str], cast=int) -> Tuple:
+    """'1-3' / 2 / (1, 3) -> (min, max)"""
+    if isinstance(value, str):
+        if "-" in value:
+            lo, hi = value.split("-", 1)
+            return cast(lo), cast(hi)
+        return cast(value), cast(value)
+    if isinstance(value, (tuple, list)):
+        return cast(value[0]), cast(value[1])
+    return cast(value), cast(value)
+
+
+class FakeFaceAnalysis:
+    """
+    Stand-in deterministic untuk FaceAnalysis (get/prepare)
+
+    Setiap pemanggilan get() memakai RNG yang di-seed dari (seed, nomor panggilan),
+    jadi urutan hasil selalu sama untuk konfigurasi yang sama.
+    """
+
+    def __init__(self,
+                 gallery: Optional[np.ndarray] = None,
+                 faces_per_frame: Union[int, Tuple[int, int], str] = 1,
+                 det_score_range: Union[Tuple[float, float], str] = (0.55, 0.99),
+                 known_ratio: float = 0.8,
+                 noise: float = 0.6,
+                 det_latency_ms: float = 0.0,
+                 rec_latency_ms: float = 0.0,
+                 face_size_range: Union[Tuple[int, int], str] = (60, 180),
+                 seed: int = 0):
+        """
+        Args:
+            gallery: Gallery embeddings (N, 512). None = gallery sintetis 100 identitas
+            faces_per_frame: Jumlah wajah per frame (int atau range (min, max))
+            det_score_range: Range detection score
+            known_ratio: Probabilitas wajah berasal dari gallery (sisanya orang asing)
+            noise: Besar noise embedding relatif terhadap gallery (0 = identik)
+            det_latency_ms: Simulated latency detection per frame
+            rec_latency_ms: Simulated latency recognition per wajah
+            face_size_range: Range ukuran sisi bbox (pixel)
+            seed: Seed RNG
+        """
+        self.gallery = gallery if gallery is not None else synthetic_gallery(100, seed=seed)
+        self.faces_per_frame = _parse_range(faces_per_frame, int)
+        self.det_score_range = _parse_range(det_score_range, float)
+        self.known_ratio = known_ratio
+        self.noise = noise
+        self.det_latency_ms = det_latency_ms
+        self.rec_latency_ms = rec_latency_ms
+        self.face_size_range = _parse_range(face_size_range, int)
+        self.seed = seed
+        self.calls = 0
+        self.det_size = (640, 640)
+        self.models = {}
+
+    def prepare(self, ctx_id: int = -1, det_thresh: float = 0.5, det_size=(640, 640)):
+        self.det_size = det_size
+
+    def get(self, img: np.ndarray, max_num: int = 0) -> List[SyntheticFace]:
+        rng = np.random.default_rng((self.seed, self.calls))
+        self.calls += 1
+        h, w = img.shape[:2]
+
+        _sleep_ms(self.det_latency_ms)
+
+        num = int(rng.integers(self.faces_per_frame[0], self.faces_per_frame[1] + 1))
+        if max_num > 0:
+            num = min(num, max_num)
+
+        faces = []
+        dim = self.gallery.shape[1]
+        for _ in range(num):
+            size = int(rng.integers(self.face_size_range[0], self.face_size_range[1] + 1))
+            size = min(size, w - 2, h - 2)
+            x1 = float(rng.integers(0, max(1, w - size)))
+            y1 = float(rng.integers(0, max(1, h - size)))
+            bbox = np.array([x1, y1, x1 + size, y1 + size], dtype=np.float32)
+
+            # 5 landmark (mata kiri, mata kanan, hidung, mulut kiri, mulut kanan)
+            kps = np.array([[0.35, 0.40], [0.65, 0.40], [0.50, 0.58], [0.38, 0.75], [0.62, 0.75]],
+                           dtype=np.float32) * size + np.array([x1, y1], dtype=np.float32)
+
+            det_score = float(rng.uniform(self.det_score_range[0], self.det_score_range[1]))
+
+            if len(self.gallery) > 0 and rng.random() < self.known_ratio:
+                identity = int(rng.integers(0, len(self.gallery)))
+                emb = self.gallery[identity] + self.noise * rng.standard_normal(dim).astype(np.float32) / np.sqrt(dim)
+            else:
+                identity = -1
+                emb = rng.standard_normal(dim).astype(np.float32)
+
+            _sleep_ms(self.rec_latency_ms)
+            faces.append(SyntheticFace(bbox, kps, det_score, emb.astype(np.float32), identity))
+
+        return faces
+
+
+# =========================
+# Load Test
+# =========================
+
+def populate_databases(work_dir: str, gallery: np.ndarray):
+    """
+    Buat FaceDB + students.db sintetis di work_dir (satu parent per embedding index)
+
+    Returns:
+        (FaceDB, StudentDatabase)
+    """
+    from facegate_insightface import FaceDB
+    from student_database import StudentDatabase
+
+    db = FaceDB(os.path.join(work_dir, "face_db"))
+    np.save(db.emb_path, gallery)
+
+    student_db = StudentDatabase(os.path.join(work_dir, "students.db"))
+    # Bulk insert (API add_student/add_parent membuka koneksi per baris)
+    conn = sqlite3.connect(student_db.db_path)
+    conn.executemany("INSERT OR IGNORE INTO students (nis, nama, kelas) VALUES (?, ?, ?)",
+                     [(f"S{i:06d}", f"Anak {i}", f"{1 + i % 6}A") for i in range(len(gallery))])
+    conn.executemany("INSERT INTO parents (nis, nama_ortu, embedding_index) VALUES (?, ?, ?)",
+                     [(f"S{i:06d}", f"Ortu {i}", i) for i in range(len(gallery))])
+    conn.commit()
+    conn.close()
+    return db, student_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test recognize_mode dengan kamera & model sintetis.")
+    parser.add_argument("--frames", type=int, default=3000, help="Jumlah frame")
+    parser.add_argument("--w", type=int, default=640)
+    parser.add_argument("--h", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=0, help="Batasi FPS kamera (0 = secepat mungkin)")
+    parser.add_argument("--faces", type=str, default="1-3", help="Jumlah wajah per frame (e.g., 2 atau 1-3)")
+    parser.add_argument("--gallery", type=int, default=1000, help="Jumlah identitas di gallery")
+    parser.add_argument("--known", type=float, default=0.8, help="Rasio wajah yang terdaftar")
+    parser.add_argument("--det-latency", type=float, default=0.0, help="Simulated detection latency (ms/frame)")
+    parser.add_argument("--rec-latency", type=float, default=0.0, help="Simulated recognition latency (ms/face)")
+    parser.add_argument("--thr", type=float, default=0.35)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=str, default="", help="Folder kerja (default: temporary)")
+    parser.add_argument("--display", action="store_true", help="Tampilkan window (default: headless)")
+    parser.add_argument("--every", type=int, default=1,
+                        help="Detection setiap N frame (1 = setiap frame, stress recognition/DB/logging)")
+    args = parser.parse_args()
+
+    work_dir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="facegate_loadtest_")
+    os.makedirs(work_dir, exist_ok=True)
+    # Log (recognition.log, performance.log) ditulis ke work_dir, bukan ke logs/ produksi.
+    # Harus chdir sebelum facegate_insightface di-import (logger dibuat saat import).
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(work_dir)
+
+    from facegate_insightface import recognize_mode
+    from frame_scheduler import FixedIntervalScheduler
+
+    print(f"[*] Work dir: {work_dir}")
+    gallery = synthetic_gallery(args.gallery, seed=args.seed)
+    db, student_db = populate_databases(work_dir, gallery)
+
+    camera = SyntheticCamera(args.w, args.h, fps=args.fps or None, max_frames=args.frames, seed=args.seed)
+    app = FakeFaceAnalysis(gallery=gallery,
+                           faces_per_frame=args.faces,
+                           known_ratio=args.known,
+                           det_latency_ms=args.det_latency,
+                           rec_latency_ms=args.rec_latency,
+                           seed=args.seed)
+
+    # Tanpa komponen yang men-skip detection/embedding: setiap frame ke-N lewat
+    # app.get -> recognize_faces -> DB lookup -> logging
+    every = max(1, args.every)
+    start = time.perf_counter()
+    stats = recognize_mode(app, db,
+                           threshold=args.thr,
+                           capture=camera,
+                           student_db=student_db,
+                           display=args.display,
+                           max_frames=args.frames,
+                           frame_scheduler=FixedIntervalScheduler(every=every),
+                           tracking=False,
+                           motion_gating=False,
+                           standby_after=None,
+                           roi_detection=False,
+                           quality_gate=False)
+    elapsed = time.perf_counter() - start
+    expected_calls = camera.frame_index // every
+
+    print("\n" + "=" * 50)
+    print("  LOAD TEST RESULT")
+    print("=" * 50)
+    print(f"Frames:      {camera.frame_index}")
+    print(f"Elapsed:     {elapsed:.2f} s")
+    print(f"Throughput:  {camera.frame_index / elapsed:.1f} FPS")
+    print(f"app.get:     {app.calls} calls")
+    if stats:
+        print(f"Inference:   {stats['avg_inference_ms']:.2f} ms (avg)")
+    print(f"Logs:        {os.path.join(work_dir, 'logs')}")
+    print("=" * 50)
+
+    if abs(app.calls - expected_calls) > 1:
+        print(f"[X] app.get dipanggil {app.calls}x, seharusnya ~{expected_calls}x "
+              f"(detection di-skip oleh komponen recognize_mode?)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
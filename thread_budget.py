@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Thread Budget untuk Face Recognition System
+Tiga thread pool berjalan bersamaan di recognize_mode, dan masing-masing default
+memakai semua core:
+
+- ONNX Runtime intra-op pool (detection + ArcFace), busy-wait (spinning) setelah run
+- BLAS NumPy (matching embs @ emb, OpenBLAS/MKL)
+- OpenCV (resize, cvtColor, blobFromImage, overlay)
+
+Di Raspberry Pi 4 core ini berarti 12+ thread aktif untuk 4 core: frame time
+jitter besar karena thread saling preempt. ThreadBudget adalah satu tempat untuk
+membagi core:
+
+    ort      - intra_op_num_threads (inference; bagian terbesar)
+    blas     - thread BLAS (threadpoolctl jika ada; fallback env var untuk proses baru)
+    opencv   - cv2.setNumThreads
+    cpus     - CPU affinity proses (os.sched_setaffinity, Linux); worker pool
+               mendapat potongan CPU masing-masing
+    spin     - ORT allow_spinning (0 = thread ORT tidur setelah run)
+
+Affinity berlaku per proses: ORT, BLAS, dan OpenCV berbagi thread utama yang sama,
+dan hanya ORT yang punya pool sendiri, jadi pembagian per library dilakukan lewat
+jumlah thread, dan pembagian core antar worker lewat affinity.
+
+Spec string (main.py THREAD_BUDGET / CLI --thread-budget):
+    "auto"                               - ORT = core - 1 (sisa untuk capture/display),
+                                           BLAS = 1, OpenCV = 1, tanpa spinning
+    "ort=3,blas=1,opencv=1,cpus=0-3,spin=0"
+    "default"                            - tidak diubah (semua library default)
+
+Benchmark jitter & throughput per alokasi (setiap alokasi di subprocess baru):
+    python thread_budget.py --bench --source recordings/gate_pagi.mp4
+    python thread_budget.py --bench --synthetic --budgets "default;auto;ort=4,blas=4,opencv=4"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from typing import Dict, List, Optional, Sequence
+
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+def available_cpus() -> List[int]:
+    """CPU yang boleh dipakai proses ini (affinity saat ini, atau semua CPU)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores() -> int:
+    """Jumlah core fisik (psutil); fallback jumlah CPU logical"""
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or len(available_cpus())
+    except ImportError:
+        return len(available_cpus())
+
+
+def parse_cpus(value: str) -> List[int]:
+    """'0-3' / '0,2,4' / '0-1:4-5' -> [0, 1, 2, 3] (':' pemisah karena ',' dipakai spec)"""
+    cpus = []
+    for part in value.replace(":", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def set_blas_threads(num_threads: int) -> bool:
+    """
+    Batasi thread BLAS NumPy di proses ini
+
+    Returns:
+        False jika threadpoolctl tidak tersedia (hanya env var, berlaku untuk proses baru)
+    """
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(num_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return False
+    threadpool_limits(limits=num_threads, user_api="blas")
+    return True
+
+
+def blas_threads() -> Optional[int]:
+    """Thread BLAS aktif (None jika threadpoolctl tidak tersedia)"""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return None
+    counts = [p['num_threads'] for p in threadpool_info() if p.get('user_api') == 'blas']
+    return max(counts) if counts else None
+
+
+class ThreadBudget:
+    """Jumlah thread per library + CPU affinity untuk satu proses"""
+
+    def __init__(self,
+                 ort: Optional[int] = None,
+                 blas: Optional[int] = None,
+                 opencv: Optional[int] = None,
+                 cpus: Optional[Sequence[int]] = None,
+                 spin: bool = True):
+        """
+        Args:
+            ort: ORT intra-op threads (None = default ORT)
+            blas: Thread BLAS (None = default library)
+            opencv: cv2.setNumThreads (None = default OpenCV)
+            cpus: CPU affinity proses (None = tidak diubah)
+            spin: ORT allow_spinning
+        """
+        self.ort = ort
+        self.blas = blas
+        self.opencv = opencv
+        self.cpus = list(cpus) if cpus else None
+        self.spin = spin
+
+    @classmethod
+    def parse(cls, spec: Optional[str], workers: int = 0, ort_threads: int = 0) -> Optional["ThreadBudget"]:
+        """
+        Spec string -> ThreadBudget (None untuk "default" / kosong)
+
+        Args:
+            spec: "auto", "default", atau "ort=3,blas=1,opencv=1,cpus=0-3,spin=0"
+            workers: Jumlah worker inference pool (auto membagi core ORT per worker)
+            ort_threads: ORT threads yang sudah dipilih (ORT_INTRA_THREADS / auto_tune); 0 = belum
+        """
+        if not spec or spec == "default":
+            return None
+        if spec == "auto":
+            return cls.auto(workers=workers, ort_threads=ort_threads)
+
+        kwargs = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            key, _, value = item.partition("=")
+            key, value = key.strip(), value.strip()
+            if key in ("ort", "blas", "opencv"):
+                kwargs[key] = int(value)
+            elif key == "cpus":
+                kwargs["cpus"] = parse_cpus(value)
+            elif key == "spin":
+                kwargs["spin"] = value not in ("0", "false", "off")
+            else:
+                raise ValueError(f"Key thread budget tidak dikenal: {key}. Pilihan: ort, blas, opencv, cpus, spin")
+        if ort_threads and "ort" not in kwargs:
+            kwargs["ort"] = ort_threads
+        return cls(**kwargs)
+
+    @classmethod
+    def auto(cls, workers: int = 0, ort_threads: int = 0, reserve: int = 1) -> "ThreadBudget":
+        """
+        ORT mendapat semua core kecuali `reserve` (capture thread, display, matching), maksimal
+        jumlah core fisik (default ORT; hyperthread tidak menambah throughput conv);
+        BLAS & OpenCV 1 thread (kerja mereka per frame kecil, pool-nya hanya menambah preemption).
+        Dengan worker pool, ORT dibagi rata per worker (lihat for_worker).
+        """
+        cpus = available_cpus()
+        inference_cores = max(1, min(physical_cores(), len(cpus) - reserve))
+        if workers > 0:
+            inference_cores = max(1, inference_cores // workers)
+        return cls(ort=ort_threads or inference_cores, blas=1, opencv=1, spin=False)
+
+    def for_worker(self, worker_id: int, num_workers: int) -> "ThreadBudget":
+        """Budget proses worker: potongan CPU sendiri (jika affinity diatur), ORT <= jumlah CPU itu"""
+        cpus = None
+        ort = self.ort
+        if self.cpus:
+            per_worker = max(1, len(self.cpus) // num_workers)
+            start = (worker_id * per_worker) % len(self.cpus)
+            cpus = self.cpus[start:start + per_worker]
+            ort = min(ort, len(cpus)) if ort else len(cpus)
+        return ThreadBudget(ort=ort, blas=self.blas, opencv=self.opencv, cpus=cpus, spin=self.spin)
+
+    def apply(self) -> Dict:
+        """Terapkan ke proses ini (affinity, BLAS, OpenCV); ORT lewat app_kwargs()"""
+        import cv2
+
+        applied = {}
+        if self.cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cpus)
+            applied['cpus'] = self.cpus
+        elif self.cpus:
+            print("[!] CPU affinity tidak didukung di OS ini, diabaikan")
+        if self.blas is not None:
+            if not set_blas_threads(self.blas):
+                print("[!] threadpoolctl tidak terinstall: thread BLAS hanya berlaku untuk proses baru "
+                      "(pip install threadpoolctl)")
+            applied['blas'] = self.blas
+        if self.opencv is not None:
+            cv2.setNumThreads(self.opencv)
+            applied['opencv'] = cv2.getNumThreads()
+        return applied
+
+    def app_kwargs(self) -> Dict:
+        """Argumen build_face_app untuk bagian ORT"""
+        kwargs = {"ort_spinning": self.spin}
+        if self.ort is not None:
+            kwargs["intra_op_threads"] = self.ort
+        return kwargs
+
+    def env(self) -> Dict[str, str]:
+        """Env var untuk proses baru (BLAS membaca env saat NumPy di-import)"""
+        env = {}
+        if self.blas is not None:
+            env.update({var: str(self.blas) for var in BLAS_ENV_VARS})
+        return env
+
+    def describe(self) -> str:
+        def fmt(v):
+            return "default" if v is None else str(v)
+        cpus = f"{self.cpus[0]}-{self.cpus[-1]}" if self.cpus and self.cpus == list(
+            range(self.cpus[0], self.cpus[-1] + 1)) else (",".join(map(str, self.cpus)) if self.cpus else "all")
+        return (f"ORT {fmt(self.ort)} | BLAS {fmt(self.blas)} | OpenCV {fmt(self.opencv)} | "
+                f"CPU {cpus} | spin {'on' if self.spin else 'off'}")
+
+
+def apply_budget(spec: Optional[str], app_kwargs: Dict, workers: int = 0) -> Optional[ThreadBudget]:
+    """
+    Parse + terapkan budget ke proses ini dan update app_kwargs (ORT)
+
+    ORT threads yang sudah diatur di app_kwargs (ORT_INTRA_THREADS / profile auto_tune)
+    dipertahankan; budget hanya mengisi yang masih default.
+    """
+    budget = ThreadBudget.parse(spec, workers=workers, ort_threads=app_kwargs.get("intra_op_threads") or 0)
+    if budget is None:
+        return None
+    budget.apply()
+    app_kwargs.update(budget.app_kwargs())
+    print(f"[*] Thread budget: {budget.describe()}" + (f" (per worker, {workers} worker)" if workers > 0 else ""))
+    return budget
+
+
+# =========================
+# Benchmark
+# =========================
+
+def _capture_load(stop: threading.Event, width: int, height: int, fps: float):
+    """Beban capture thread: baca frame + resize/convert seperti LatestFrameGrabber + display"""
+    import cv2
+    from synthetic_source import SyntheticCamera
+    cam = SyntheticCamera(width=width, height=height, fps=fps)
+    while not stop.is_set():
+        ok, frame = cam.read()
+        if not ok:
+            break
+        cv2.cvtColor(cv2.resize(frame, (width // 2, height // 2)), cv2.COLOR_BGR2GRAY)
+
+
+def run_budget(spec: str, frames, model: str, det_size: int, gallery_size: int,
+               duration: float, warmup: int) -> Dict:
+    """Loop recognize (detect + embed + matching + overlay) dengan satu alokasi (di subprocess)"""
+    import cv2
+    import numpy as np
+    from facegate_insightface import build_face_app, detect_and_embed, embed_faces
+    from bench_replay import summarize
+    from auto_tune import probe_faces
+
+    app_kwargs = {"model_name": model, "det_size": det_size}
+    budget = apply_budget(spec, app_kwargs)
+    app = build_face_app(**app_kwargs)
+
+    # Dimensi embedding dari satu probe (512 untuk ArcFace buffalo)
+    probe = probe_faces(1)
+    embed_faces(app, probe)
+    emb_dim = len(probe[0][1].embedding)
+    rng = np.random.default_rng(0)
+    gallery = rng.standard_normal((gallery_size, emb_dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+
+    def process(frame):
+        faces = detect_and_embed(app, frame)
+        feats = [f.embedding for f in faces if f.embedding is not None] or [rng.standard_normal(emb_dim)]
+        for emb in feats:
+            sims = gallery @ np.asarray(emb, dtype=np.float32)
+            int(np.argmax(sims))
+        overlay = frame.copy()
+        for f in faces:
+            x1, y1, x2, y2 = [int(v) for v in f.bbox[:4]]
+            cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        return len(faces)
+
+    for frame in frames[:warmup]:
+        process(frame)
+
+    stop = threading.Event()
+    h, w = frames[0].shape[:2]
+    capture = threading.Thread(target=_capture_load, args=(stop, w, h, 30.0), daemon=True)
+    capture.start()
+
+    times = []
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < duration:
+        t0 = time.perf_counter()
+        process(frames[i % len(frames)])
+        times.append(time.perf_counter() - t0)
+        i += 1
+    elapsed = time.perf_counter() - start
+    stop.set()
+    capture.join(timeout=1.0)
+
+    stats = summarize(times)
+    arr = np.asarray(times) * 1000.0
+    return {
+        'budget': spec,
+        'describe': budget.describe() if budget else "default",
+        'frames': len(times),
+        'fps': round(len(times) / elapsed, 2),
+        'frame_ms': stats,
+        'jitter_ms': round(float(arr.std()), 3),
+        'p99_minus_p50_ms': round(stats['p99_ms'] - stats['p50_ms'], 3),
+        'blas_threads': blas_threads(),
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def run_budget_subprocess(spec: str, args) -> Dict:
+    """Setiap alokasi di proses baru: thread pool library dibuat sekali per proses"""
+    budget = ThreadBudget.parse(spec)
+    env = dict(os.environ, **(budget.env() if budget else {}))
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", spec,
+           "--model", args.model, "--det", str(args.det),
+           "--gallery", str(args.gallery), "--duration", str(args.duration),
+           "--warmup", str(args.warmup), "--max-frames", str(args.max_frames),
+           "--w", str(args.w), "--h", str(args.h)]
+    cmd += ["--synthetic"] if args.synthetic else ["--source", args.source]
+    out = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, env=env,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    # Baris terakhir stdout = JSON (baris lain: log loading model)
+    return json.loads(out.stdout.decode('utf-8').strip().splitlines()[-1])
+
+
+def load_frames(args) -> list:
+    if args.synthetic:
+        from auto_tune import synthetic_frames
+        return synthetic_frames(args.w, args.h, args.max_frames)
+    from bench_replay import iter_replay_frames
+    return list(iter_replay_frames(args.source, args.max_frames))
+
+
+def print_table(rows: List[Dict]):
+    print("\n" + "=" * 100)
+    print("  THREAD BUDGET BENCHMARK")
+    print("=" * 100)
+    print(f"{'budget':>28} {'fps':>7} {'mean ms':>8} {'p50':>7} {'p99':>7} {'jitter':>7} {'p99-p50':>8}  alokasi")
+    for r in rows:
+        fm = r['frame_ms']
+        print(f"{r['budget'][:28]:>28} {r['fps']:>7.2f} {fm['mean_ms']:>8.2f} {fm['p50_ms']:>7.2f} "
+              f"{fm['p99_ms']:>7.2f} {r['jitter_ms']:>7.2f} {r['p99_minus_p50_ms']:>8.2f}  {r['describe']}")
+    print("=" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jitter & throughput per alokasi thread (ORT/BLAS/OpenCV).")
+    parser.add_argument("--bench", action="store_true", help="Jalankan benchmark")
+    parser.add_argument("--budgets", type=str, default="default;auto;ort=1,blas=1,opencv=1,spin=0",
+                        help="Alokasi dipisah ';' (spec ThreadBudget)")
+    parser.add_argument("--source", type=str, default="face_db/snapshots/*/*.jpg",
+                        help="Video file, folder gambar, atau glob pattern")
+    parser.add_argument("--synthetic", action="store_true", help="Frame sintetis (tanpa wajah)")
+    parser.add_argument("--w", type=int, default=640)
+    parser.add_argument("--h", type=int, default=480)
+    parser.add_argument("--model", type=str, default="buffalo_l")
+    parser.add_argument("--det", type=int, default=320, help="det_size (square)")
+    parser.add_argument("--gallery", type=int, default=2000, help="Ukuran gallery untuk matching (BLAS)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Detik per alokasi")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--max-frames", type=int, default=50)
+    parser.add_argument("--out", type=str, default="bench/thread_budget.json", help="Path output JSON")
+    parser.add_argument("--worker", type=str, default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        frames = load_frames(args)
+        row = run_budget(args.worker, frames, args.model, args.det, args.gallery, args.duration, args.warmup)
+        sys.stdout.write("\n" + json.dumps(row) + "\n")
+        return
+
+    if not args.bench:
+        print(f"[*] CPU tersedia: {len(available_cpus())} | BLAS threads: {blas_threads() or '-'}")
+        print(f"[*] auto: {ThreadBudget.auto().describe()}")
+        print("    Benchmark: python thread_budget.py --bench --source <video/glob>")
+        return
+
+    rows = []
+    for spec in [s.strip() for s in args.budgets.split(";") if s.strip()]:
+        print(f"[*] Budget: {spec}")
+        rows.append(run_budget_subprocess(spec, args))
+    print_table(rows)
+
+    from bench_replay import host_info
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': {'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                            'source': "synthetic" if args.synthetic else args.source,
+                            'model': args.model, 'det_size': args.det, 'duration_s': args.duration,
+                            'host': host_info()},
+                   'results': rows}, f, indent=2)
+    print(f"[OK] JSON: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -197,7 +197,8 @@ def clear_log(log_file: str = "logs/performance.log"):
     if confirm == 'y':
         # Recreate with header only
         with open(log_file, 'w') as f:
-            f.write("timestamp,fps,frame_ms,inference_ms,cpu_percent,memory_mb,memory_percent\n")
+            f.write("timestamp,fps,frame_ms,inference_ms,cpu_percent,memory_mb,memory_percent,"
+                    "max_frame_ms,max_inference_ms\n")
         print("✅ Log file cleared!")
     else:
         print("❌ Cancelled")
@@ -214,10 +215,11 @@ def main():
         print("2. Show recent entries (last 10)")
         print("3. Show recent entries (last 50)")
         print("4. Clear log file")
-        print("5. Exit")
+        print("5. Live dashboard (follow log)")
+        print("6. Exit")
         print("="*70)
         
-        choice = input("\nPilih menu (1-5): ").strip()
+        choice = input("\nPilih menu (1-6): ").strip()
         
         if choice == "1":
             view_performance_log()
@@ -228,6 +230,9 @@ def main():
         elif choice == "4":
             clear_log()
         elif choice == "5":
+            from live_dashboard import LiveDashboard
+            LiveDashboard().run()
+        elif choice == "6":
             print("\n[*] Terima kasih!")
             break
         else: